@@ -1,2 +1,17 @@
 # app/__init__.py
-from . import storage, steam, ai, main  # noqa: F401
+# Submodules load on first attribute access (`app.steam`, `from app import ai`),
+# so `python -m app.main` does not import app.main twice and importing one
+# helper does not drag in requests / numpy.
+import importlib
+
+__all__ = ["storage", "steam", "ai", "main"]
+
+
+def __getattr__(name):
+    if not name.startswith("__"):
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,26 +1,90 @@
 # app/ai.py
 """
-LLM helpers for Hidden Gem Games — Cloudflare Workers AI edition.
+LLM helpers for Hidden Gem Games.
 Produces short, connected prose (no bullet points) with a light editorial tone.
+
+Every call goes through one backend, picked by HGG_AI_BACKEND:
+
+- cloudflare  Workers AI REST endpoint (CF_ACCOUNT_ID / CF_API_TOKEN)
+- hf          Hugging Face Inference API (HF_API_TOKEN; also used by scripts/hf_client.py)
+- local       a quantised GGUF instruct model on the CPU via llama-cpp-python
+              (HGG_AI_LOCAL_MODEL=/path/model.gguf, HGG_AI_THREADS=<cores>)
+- auto        (default) cloudflare when its credentials are set, else local when
+              a model file is configured; never hf (flan-t5-small is far below
+              post quality), which has to be asked for by name
+
+Backends take batches (generate_batch): remote ones fan out over
+HGG_AI_CONCURRENCY threads. The local one loads the model once per process and
+runs every request through a single queue, so sections of one post and
+concurrent posts (backfill / rerender threads) are batched back to back; prompts
+start with the shared system prompt + game corpus, so llama.cpp's prefix cache
+only evaluates each corpus once per post.
 """
 
 from __future__ import annotations
 
 import os
 import json
+import queue
+import threading
 import time
-from typing import Optional, Dict, Any
-
-import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 
 # Default model (cheap + solid). You can swap to @cf/meta/llama-3.1-8b-instruct too.
 DEFAULT_MODEL = os.environ.get("HGG_AI_MODEL", "@cf/meta/llama-3-8b-instruct")
 
+BACKEND       = os.environ.get("HGG_AI_BACKEND", "auto").strip().lower()
+CONCURRENCY   = int(os.environ.get("HGG_AI_CONCURRENCY", "4"))   # remote requests in flight per batch
+
 CF_ACCOUNT_ID = os.environ.get("CF_ACCOUNT_ID", "")
 CF_API_TOKEN  = os.environ.get("CF_API_TOKEN", "")
 CF_TIMEOUT    = float(os.environ.get("HGG_AI_TIMEOUT", "20"))
 CF_RETRIES    = int(os.environ.get("HGG_AI_RETRIES", "2"))  # minimal retries to save quota
 
+HF_API_TOKEN  = os.environ.get("HF_API_TOKEN", "")
+HF_MODEL      = os.environ.get("HGG_AI_HF_MODEL", "google/flan-t5-small")
+HF_RETRIES    = 5
+
+LOCAL_MODEL   = os.environ.get("HGG_AI_LOCAL_MODEL", "")         # path to a .gguf file
+LOCAL_THREADS = int(os.environ.get("HGG_AI_THREADS", "0")) or (os.cpu_count() or 1)
+LOCAL_CTX     = int(os.environ.get("HGG_AI_CTX", "2048"))
+LOCAL_BATCH   = 16                                                # requests drained per queue pass
+
+
+# ---------- Backends ----------
+
+class Backend:
+    """generate() one prompt; generate_batch() many ({"prompt", "system", "max_tokens", "temperature"})."""
+
+    name = "none"
+
+    def available(self) -> bool:
+        return False
+
+    def generate(
+        self,
+        prompt: str,
+        *,
+        max_tokens: int = 220,
+        temperature: float = 0.7,
+        system: Optional[str] = None,
+    ) -> str:
+        raise NotImplementedError
+
+    def generate_batch(self, reqs: List[Dict[str, Any]]) -> List[str]:
+        """Results in request order; a failed request yields ""."""
+        def _one(req: Dict[str, Any]) -> str:
+            try:
+                return self.generate(**req)
+            except Exception:
+                return ""
+
+        if len(reqs) <= 1:
+            return [_one(r) for r in reqs]
+        with ThreadPoolExecutor(max_workers=max(1, min(CONCURRENCY, len(reqs)))) as ex:
+            return list(ex.map(_one, reqs))
+
 
 def _cf_url(model: str) -> str:
     # REST inference endpoint
@@ -56,6 +120,8 @@ def cf_generate(
         payload["messages"].append({"role": "system", "content": system})
     payload["messages"].append({"role": "user", "content": prompt})
 
+    import requests
+
     url = _cf_url(model)
 
     last_err = None
@@ -85,6 +151,182 @@ def cf_generate(
     raise last_err or RuntimeError("Workers AI call failed")
 
 
+class CloudflareBackend(Backend):
+    name = "cloudflare"
+
+    def available(self) -> bool:
+        return bool(CF_ACCOUNT_ID and CF_API_TOKEN)
+
+    def generate(self, prompt, *, max_tokens=220, temperature=0.7, system=None) -> str:
+        return cf_generate(prompt, max_tokens=max_tokens, temperature=temperature, system=system)
+
+
+def hf_generate(prompt: str, max_new_tokens: int = 160, temperature: float = 0.2, retries: int = HF_RETRIES) -> str:
+    """
+    Minimal Hugging Face Inference API call with retry/backoff for 429/5xx.
+    """
+    from random import uniform
+
+    import requests
+
+    url = f"https://api-inference.huggingface.co/models/{HF_MODEL}"
+    headers = {"Authorization": f"Bearer {HF_API_TOKEN}"} if HF_API_TOKEN else {}
+    payload = {"inputs": prompt, "parameters": {"max_new_tokens": max_new_tokens, "temperature": temperature}}
+    backoff = 0.8
+    for i in range(retries):
+        r = requests.post(url, headers=headers, json=payload, timeout=60)
+        if r.status_code in (200, 201):
+            out = r.json()
+            # Inference API returns a list of dicts for text-generation
+            if isinstance(out, list) and out and "generated_text" in out[0]:
+                return out[0]["generated_text"].strip()
+            # Some models return dict with 'summary_text'
+            if isinstance(out, dict) and "summary_text" in out:
+                return out["summary_text"].strip()
+            # anything else (error payloads, other task shapes) must never end up as prose
+            raise RuntimeError(f"Unexpected Hugging Face response: {json.dumps(out)[:200]}")
+        if r.status_code in (429, 500, 502, 503, 504) and i < retries - 1:
+            time.sleep(backoff + uniform(0, 0.4))
+            backoff *= 1.8
+            continue
+        r.raise_for_status()
+    raise RuntimeError("Hugging Face inference call failed")
+
+
+class HuggingFaceBackend(Backend):
+    name = "hf"
+
+    def available(self) -> bool:
+        return bool(HF_API_TOKEN)
+
+    def generate(self, prompt, *, max_tokens=220, temperature=0.7, system=None) -> str:
+        # text2text models have no system role: prepend it
+        text = f"{system}\n\n{prompt}" if system else prompt
+        return hf_generate(text, max_new_tokens=max_tokens, temperature=temperature)
+
+
+class LocalBackend(Backend):
+    """
+    llama-cpp-python on the CPU. The model is loaded on first use and shared;
+    one worker thread serves a queue, draining up to LOCAL_BATCH requests per
+    pass and running those with the same prefix (system + corpus) back to back.
+    """
+
+    name = "local"
+
+    def __init__(self, model_path: str = LOCAL_MODEL, *, threads: int = LOCAL_THREADS):
+        self.model_path = model_path
+        self.threads = threads
+        self._llm = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.served = 0
+        self.passes = 0
+
+    def available(self) -> bool:
+        if not self.model_path or not os.path.isfile(self.model_path):
+            return False
+        try:
+            import llama_cpp  # noqa: F401  (optional dependency)
+        except ImportError:
+            return False
+        return True
+
+    def _load(self):
+        with self._lock:
+            if self._llm is None:
+                from llama_cpp import Llama, LlamaRAMCache
+
+                self._llm = Llama(
+                    model_path=self.model_path,
+                    n_ctx=LOCAL_CTX,
+                    n_threads=self.threads,
+                    verbose=False,
+                )
+                self._llm.set_cache(LlamaRAMCache())
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._serve, name="ai-local", daemon=True)
+                self._worker.start()
+        return self._llm
+
+    def _run(self, req: Dict[str, Any]) -> str:
+        messages = []
+        if req.get("system"):
+            messages.append({"role": "system", "content": req["system"]})
+        messages.append({"role": "user", "content": req["prompt"]})
+        out = self._llm.create_chat_completion(
+            messages=messages,
+            max_tokens=req.get("max_tokens", 220),
+            temperature=req.get("temperature", 0.7),
+        )
+        return (out["choices"][0]["message"]["content"] or "").strip()
+
+    def _serve(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < LOCAL_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # same system prompt + corpus adjacent: the prefix cache evaluates it once
+            batch.sort(key=lambda item: (item[0].get("system") or "", item[0]["prompt"][:2000]))
+            self.passes += 1
+            for req, fut in batch:
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                try:
+                    fut.set_result(self._run(req))
+                except Exception as e:
+                    fut.set_exception(e)
+                self.served += 1
+
+    def submit(self, req: Dict[str, Any]) -> Future:
+        self._load()
+        fut: Future = Future()
+        self._queue.put((req, fut))
+        return fut
+
+    def generate(self, prompt, *, max_tokens=220, temperature=0.7, system=None) -> str:
+        req = {"prompt": prompt, "max_tokens": max_tokens, "temperature": temperature, "system": system}
+        return self.submit(req).result()
+
+    def generate_batch(self, reqs: List[Dict[str, Any]]) -> List[str]:
+        futures = [self.submit(r) for r in reqs]
+        out = []
+        for f in futures:
+            try:
+                out.append(f.result())
+            except Exception:
+                out.append("")
+        return out
+
+
+BACKENDS = {"cloudflare": CloudflareBackend, "hf": HuggingFaceBackend, "local": LocalBackend}
+AUTO_ORDER = ("cloudflare", "local")   # hf is opt-in (HGG_AI_BACKEND=hf)
+_BACKEND: Dict[str, Backend] = {}
+
+
+def backend(name: Optional[str] = None) -> Backend:
+    """The backend for `name` (default HGG_AI_BACKEND), created once per process."""
+    name = (name or BACKEND).strip().lower()
+    if name == "auto":
+        for cand in AUTO_ORDER:
+            if backend(cand).available():
+                return backend(cand)
+        return _BACKEND.setdefault("none", Backend())
+    if name not in BACKENDS:
+        raise ValueError(f"unknown HGG_AI_BACKEND {name!r} (expected one of: auto, {', '.join(BACKENDS)})")
+    if name not in _BACKEND:
+        _BACKEND[name] = BACKENDS[name]()
+    return _BACKEND[name]
+
+
+def generate(prompt: str, *, max_tokens: int = 220, temperature: float = 0.7, system: Optional[str] = None) -> str:
+    return backend().generate(prompt, max_tokens=max_tokens, temperature=temperature, system=system)
+
+
 # ---------- Task-specific generators (prose, no lists) ----------
 
 SYS_NEUTRAL = (
@@ -92,6 +334,35 @@ SYS_NEUTRAL = (
     "Use plain, neutral language; avoid marketing fluff and avoid bullet points."
 )
 
+# Each task: (instruction, max_tokens, temperature). The prompt puts the corpus
+# first so all sections of one game share a prefix.
+TASKS: Dict[str, tuple] = {
+    "overview": (
+        "Write a 2–4 sentence neutral overview of the game based on the provided description and review snippets. "
+        "Explain what you do in the game and its key mechanics without hype. "
+        "Avoid bullet points.",
+        220, 0.5,
+    ),
+    "gem_reason": (
+        "In 1–2 sentences, explain *why this could be a hidden gem* for some players, "
+        "focusing on specific qualities (mechanics, vibe, art, depth, or uniqueness). "
+        "Avoid bullet points and marketing tone.",
+        140, 0.6,
+    ),
+    "likes": (
+        "Summarize in 2–3 sentences what players like about this game. "
+        "Write connected editorial prose (no lists, no 'some players say'). "
+        "Be specific but concise.",
+        160, 0.6,
+    ),
+    "dislikes": (
+        "Summarize in 2–3 sentences what players criticize about this game. "
+        "Write connected editorial prose (no lists, no 'some players say'). "
+        "Be specific but concise.",
+        160, 0.6,
+    ),
+}
+
 def build_corpus(short_description: str, reviews_sample: str) -> str:
     # Short, bounded input to save tokens
     intro = f"Description:\n{short_description.strip()}\n"
@@ -100,49 +371,74 @@ def build_corpus(short_description: str, reviews_sample: str) -> str:
     return intro
 
 
+def _request(task: str, corpus: str) -> Dict[str, Any]:
+    instruction, max_tokens, temperature = TASKS[task]
+    prompt = f"=== INPUT ===\n{corpus}\n=== END ===\n\n{instruction}"
+    return {"prompt": prompt, "system": SYS_NEUTRAL, "max_tokens": max_tokens, "temperature": temperature}
+
+
+def _task(task: str, corpus: str) -> str:
+    return backend().generate(**_request(task, corpus))
+
+
 def make_overview_text(corpus: str) -> str:
-    prompt = (
-        "Write a 2–4 sentence neutral overview of the game based on the provided description and review snippets. "
-        "Explain what you do in the game and its key mechanics without hype. "
-        "Avoid bullet points."
-        "\n\n=== INPUT ===\n"
-        f"{corpus}\n"
-        "=== END ==="
-    )
-    return cf_generate(prompt, system=SYS_NEUTRAL, max_tokens=220, temperature=0.5)
+    return _task("overview", corpus)
 
 
 def make_hidden_gem_text(corpus: str) -> str:
-    prompt = (
-        "In 1–2 sentences, explain *why this could be a hidden gem* for some players, "
-        "focusing on specific qualities (mechanics, vibe, art, depth, or uniqueness). "
-        "Avoid bullet points and marketing tone."
-        "\n\n=== INPUT ===\n"
-        f"{corpus}\n"
-        "=== END ==="
-    )
-    return cf_generate(prompt, system=SYS_NEUTRAL, max_tokens=140, temperature=0.6)
+    return _task("gem_reason", corpus)
 
 
 def make_likes_text(corpus: str) -> str:
-    prompt = (
-        "Summarize in 2–3 sentences what players like about this game. "
-        "Write connected editorial prose (no lists, no 'some players say'). "
-        "Be specific but concise."
-        "\n\n=== INPUT ===\n"
-        f"{corpus}\n"
-        "=== END ==="
-    )
-    return cf_generate(prompt, system=SYS_NEUTRAL, max_tokens=160, temperature=0.6)
+    return _task("likes", corpus)
 
 
 def make_dislikes_text(corpus: str) -> str:
-    prompt = (
-        "Summarize in 2–3 sentences what players criticize about this game. "
-        "Write connected editorial prose (no lists, no 'some players say'). "
-        "Be specific but concise."
-        "\n\n=== INPUT ===\n"
-        f"{corpus}\n"
-        "=== END ==="
-    )
-    return cf_generate(prompt, system=SYS_NEUTRAL, max_tokens=160, temperature=0.6)
+    return _task("dislikes", corpus)
+
+
+# ---------- Wrappers used by app/main.py (appdetails payload in, prose out) ----------
+
+SNIPPET_CHARS = 1500   # review text budget per prompt
+REVIEW_SECTIONS = ("likes", "dislikes")   # need player reviews
+
+
+def available() -> bool:
+    return backend().available()
+
+
+def _corpus(data: Dict[str, Any], snippets: Optional[list] = None) -> str:
+    sample, used = [], 0
+    for s in snippets or []:
+        s = " ".join(str(s).split())[:400]
+        if used + len(s) > SNIPPET_CHARS:
+            break
+        sample.append(f"- {s}")
+        used += len(s)
+    return build_corpus(data.get("short_description") or data.get("name") or "", "\n".join(sample))
+
+
+def summarize_overview(data: Dict[str, Any], snippets: Optional[list] = None) -> str:
+    return make_overview_text(_corpus(data, snippets))
+
+
+def summarize_gem_reason(data: Dict[str, Any], snippets: Optional[list] = None) -> str:
+    return make_hidden_gem_text(_corpus(data, snippets))
+
+
+def summarize_likes(data: Dict[str, Any], snippets: Optional[list] = None) -> str:
+    # without player reviews there is nothing to summarise (and nothing to invent)
+    return make_likes_text(_corpus(data, snippets)) if snippets else ""
+
+
+def summarize_dislikes(data: Dict[str, Any], snippets: Optional[list] = None) -> str:
+    return make_dislikes_text(_corpus(data, snippets)) if snippets else ""
+
+
+def summarize_sections(data: Dict[str, Any], snippets: Optional[list] = None, keys=tuple(TASKS)) -> Dict[str, str]:
+    """Several sections of one game in one backend batch ("" for failures / sections without reviews)."""
+    keys = [k for k in keys if k in TASKS and (snippets or k not in REVIEW_SECTIONS)]
+    if not keys or not available():
+        return {}
+    corpus = _corpus(data, snippets)
+    return dict(zip(keys, backend().generate_batch([_request(k, corpus) for k in keys])))
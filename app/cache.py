@@ -0,0 +1,469 @@
+# app/cache.py
+"""
+Maintenance for the on-disk caches (appdetails, review summaries, AI summaries).
+
+The caches live under config.CACHE_DIR, outside the committed content tree; CI
+restores them from a cache artifact. This module keeps them bounded:
+
+- touch(path)       records a read hit (atime) so eviction is least-recently-used
+- gc(name)          removes orphaned temp files, expires entries past their TTL
+                    (by write time), then evicts LRU entries above the size cap
+- compact(name)     rewrites pretty-printed JSON records in compact form
+
+Records can be stored compressed (read_record / write_record): zstd with a
+dictionary trained on our own appstats corpus when `zstandard` is installed,
+gzip otherwise. Readers accept every variant, so plain, .zst and .gz records can
+coexist while compress_all() migrates a cache.
+
+Reads go through MEMO, a bounded in-process LRU of decoded records keyed by the
+record's base path, so a record read twice in one process (harvest, rescore,
+the daily pipeline, the worker) is parsed once. write_record() replaces the
+entry; gc() drops the records it deletes. Memoised objects are shared between
+callers: treat them as read-only.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import config as cfg
+
+CACHE_DIRS: Dict[str, Path] = {
+    "appstats": cfg.APPSTATS_DIR,
+    "reviewsum": cfg.REVIEWSUM_DIR,
+    "summaries": cfg.SUM_CACHE_DIR,
+}
+
+
+
+ZDICT_DIR    = cfg.CACHE_DIR / "zdict"
+ZDICT_SIZE   = 112 * 1024
+ZSTD_LEVEL   = 10
+GZIP_LEVEL   = 6
+SUFFIXES     = (".json", ".json.zst", ".json.gz")
+
+
+# -----------------
+# Codecs
+# -----------------
+_zstd_mod: Any = None
+_zstd_state: Dict[str, Any] = {"loaded": False, "dicts": {}, "current": None}
+
+
+def _zstd():
+    """Import zstandard on first use; None when it is not installed."""
+    global _zstd_mod
+    if _zstd_mod is None:
+        try:
+            import zstandard  # type: ignore
+            _zstd_mod = zstandard
+        except ImportError:
+            _zstd_mod = False
+    return _zstd_mod or None
+
+
+def _load_dicts() -> None:
+    """Load trained dictionaries lazily; the newest one is used for writing."""
+    if _zstd_state["loaded"]:
+        return
+    _zstd_state["loaded"] = True
+    zstd = _zstd()
+    if not zstd or not ZDICT_DIR.is_dir():
+        return
+    newest = None
+    for p in sorted(ZDICT_DIR.glob("*.dict"), key=lambda p: p.stat().st_mtime):
+        d = zstd.ZstdCompressionDict(p.read_bytes())
+        _zstd_state["dicts"][d.dict_id()] = d
+        newest = d
+    _zstd_state["current"] = newest
+
+
+def codec() -> str:
+    """Configured codec for new records: HGG_CACHE_CODEC=zstd|gzip|none (default: best available)."""
+    want = os.getenv("HGG_CACHE_CODEC", "auto").strip().lower()
+    if want in ("none", "json", "off"):
+        return "none"
+    if want == "gzip":
+        return "gzip"
+    return "zstd" if _zstd() else "gzip"
+
+
+def _encode(raw: bytes, kind: str) -> bytes:
+    if kind == "zstd":
+        _load_dicts()
+        d = _zstd_state["current"]
+        cctx = _zstd().ZstdCompressor(level=ZSTD_LEVEL, dict_data=d) if d else _zstd().ZstdCompressor(level=ZSTD_LEVEL)
+        return cctx.compress(raw)
+    if kind == "gzip":
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    return raw
+
+
+def _decode(blob: bytes, suffix: str) -> bytes:
+    if suffix == ".json.zst":
+        zstd = _zstd()
+        if not zstd:
+            raise RuntimeError("zstandard is required to read .zst cache records")
+        _load_dicts()
+        dict_id = zstd.get_frame_parameters(blob).dict_id
+        d = _zstd_state["dicts"].get(dict_id) if dict_id else None
+        if dict_id and d is None:
+            raise RuntimeError(f"missing zstd dictionary {dict_id}")
+        dctx = zstd.ZstdDecompressor(dict_data=d) if d else zstd.ZstdDecompressor()
+        return dctx.decompress(blob)
+    if suffix == ".json.gz":
+        return gzip.decompress(blob)
+    return blob
+
+
+# -----------------
+# In-process memo
+# -----------------
+class Memo:
+    """
+    LRU of decoded records bounded by the size of their JSON text (a proxy for
+    the parsed objects, which are a few times larger). Thread-safe.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key: str, value: Any, nbytes: int) -> None:
+        if nbytes > self.max_bytes:
+            self.invalidate(key)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                _, (_, size) = self._entries.popitem(last=False)
+                self.bytes -= size
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+MEMO = Memo(int(cfg.MEMO_MAX_MB * 1024 * 1024))
+
+
+def _memo_key(path: Path) -> str:
+    return str(_base(path))
+
+
+# -----------------
+# Records
+# -----------------
+def _suffix(path: Path) -> str:
+    for suf in (".json.zst", ".json.gz", ".json"):
+        if path.name.endswith(suf):
+            return suf
+    return ""
+
+
+def record_key(path: Path) -> str:
+    """'123.json.zst' -> '123'."""
+    suf = _suffix(path)
+    return path.name[: -len(suf)] if suf else path.stem
+
+
+def _base(path: Path) -> Path:
+    """Normalise any record path to its plain '<key>.json' form."""
+    return path.with_name(record_key(path) + ".json")
+
+
+def find_record(path: Path) -> Optional[Path]:
+    """The on-disk variant of a record (plain, .zst or .gz), if any."""
+    base = _base(path)
+    for suf in SUFFIXES:
+        cand = base.with_name(record_key(base) + suf)
+        if cand.exists():
+            return cand
+    return None
+
+
+def read_record(path: Path, *, touch_hit: bool = False) -> Optional[Any]:
+    """
+    Read a JSON cache record in whatever encoding it was stored; None on miss/error.
+    Served from MEMO when this process has already read or written it (the
+    on-disk atime was refreshed on that first read).
+    """
+    key = _memo_key(path)
+    hit, data = MEMO.get(key)
+    if hit:
+        return data
+    found = find_record(path)
+    if found is None:
+        return None
+    try:
+        raw = _decode(found.read_bytes(), _suffix(found))
+        data = json.loads(raw)
+    except Exception:
+        return None
+    if touch_hit:
+        touch(found)
+    MEMO.put(key, data, len(raw))
+    return data
+
+
+def write_record(path: Path, obj: Any, *, kind: Optional[str] = None) -> Path:
+    """Write a record with the configured codec and drop any other variants."""
+    kind = kind or codec()
+    base = _base(path)
+    suffix = {"zstd": ".json.zst", "gzip": ".json.gz"}.get(kind, ".json")
+    target = base.with_name(record_key(base) + suffix)
+    raw = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # unique temp name: concurrent writers (threads, shard processes) never share one
+    fd, tmp_name = tempfile.mkstemp(dir=str(target.parent), prefix=f".{target.name}.", suffix=".tmp")
+    tmp = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_encode(raw, kind))
+        tmp.replace(target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    for suf in SUFFIXES:
+        other = base.with_name(record_key(base) + suf)
+        if other != target and other.exists():
+            other.unlink(missing_ok=True)
+    MEMO.put(_memo_key(base), obj, len(raw))
+    return target
+
+
+def iter_records(directory: Path) -> Iterator[Tuple[str, Path]]:
+    """(key, path) for every record in a cache directory, any encoding."""
+    if not directory.is_dir():
+        return
+    for p in directory.iterdir():
+        if _suffix(p) and p.is_file():
+            yield record_key(p), p
+
+
+def touch(path: Path) -> None:
+    """Mark a cache entry as just read (atime only; mtime stays the write time)."""
+    try:
+        st = path.stat()
+        os.utime(path, (time.time(), st.st_mtime))
+    except OSError:
+        pass
+
+
+def forget(path: Path) -> None:
+    """Drop a record from MEMO (its file was removed or replaced behind write_record)."""
+    MEMO.invalidate(_memo_key(path))
+
+
+def _records(directory: Path) -> List[Path]:
+    if not directory.is_dir():
+        return []
+    return [p for p in directory.iterdir() if p.is_file()]
+
+
+# -----------------
+# Eviction
+# -----------------
+def gc(
+    name: str,
+    *,
+    max_bytes: Optional[int] = None,
+    ttl_secs: Optional[float] = None,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Evict entries from one cache. Limits default to config.CACHE_LIMITS[name];
+    a limit of 0 disables that rule.
+    """
+    directory = CACHE_DIRS[name]
+    limits = cfg.CACHE_LIMITS.get(name, {})
+    if max_bytes is None:
+        max_bytes = int(limits.get("max_mb", 0) * 1024 * 1024)
+    if ttl_secs is None:
+        ttl_secs = float(limits.get("ttl_days", 0)) * 86400
+
+    now = time.time()
+    stats = {"files": 0, "bytes": 0, "tmp": 0, "expired": 0, "evicted": 0, "freed": 0}
+    live = []
+    for path in _records(directory):
+        st = path.stat()
+        if not _suffix(path):
+            # orphaned temp files from interrupted writes
+            if now - st.st_mtime > 3600:
+                stats["tmp"] += 1
+                stats["freed"] += st.st_size
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+            continue
+        if ttl_secs and now - st.st_mtime > ttl_secs:
+            stats["expired"] += 1
+            stats["freed"] += st.st_size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+                forget(path)
+            continue
+        live.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+
+    total = sum(size for _, size, _ in live)
+    if max_bytes and total > max_bytes:
+        live.sort()  # least recently used first
+        while live and total > max_bytes:
+            _, size, path = live.pop(0)
+            total -= size
+            stats["evicted"] += 1
+            stats["freed"] += size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+                forget(path)
+
+    stats["files"] = len(live)
+    stats["bytes"] = total
+    return stats
+
+
+# -----------------
+# Compaction
+# -----------------
+def compact(name: str, *, dry_run: bool = False) -> Dict[str, int]:
+    """Rewrite records with indentation/whitespace into compact JSON (mtime preserved)."""
+    stats = {"rewritten": 0, "saved": 0}
+    for path in _records(CACHE_DIRS[name]):
+        if not path.name.endswith(".json"):
+            continue
+        try:
+            raw = path.read_bytes()
+            text = json.dumps(json.loads(raw), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        except Exception:
+            continue
+        if len(text) >= len(raw):
+            continue
+        stats["rewritten"] += 1
+        stats["saved"] += len(raw) - len(text)
+        if dry_run:
+            continue
+        st = path.stat()
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(text)
+        os.utime(tmp, (st.st_atime, st.st_mtime))
+        tmp.replace(path)
+    return stats
+
+
+# -----------------
+# Compression migration
+# -----------------
+def train_dictionary(name: str = "appstats", *, max_samples: int = 2000) -> Optional[int]:
+    """Train a zstd dictionary on a cache's records. Returns its id (None without zstandard)."""
+    zstd = _zstd()
+    if not zstd:
+        return None
+    paths = [p for _, p in iter_records(CACHE_DIRS[name])]
+    random.Random(0).shuffle(paths)
+    samples = []
+    for p in paths[:max_samples]:
+        try:
+            samples.append(_decode(p.read_bytes(), _suffix(p)))
+        except Exception:
+            continue
+    if len(samples) < 8:
+        return None
+    d = zstd.train_dictionary(ZDICT_SIZE, samples)
+    ZDICT_DIR.mkdir(parents=True, exist_ok=True)
+    (ZDICT_DIR / f"{d.dict_id()}.dict").write_bytes(d.as_bytes())
+    _zstd_state["loaded"] = False
+    _zstd_state["dicts"] = {}
+    _load_dicts()
+    return d.dict_id()
+
+
+def _frame_dict_id(path: Path) -> int:
+    """Dictionary id in a .zst record's frame header (0 = no dictionary)."""
+    with path.open("rb") as f:
+        return _zstd().get_frame_parameters(f.read(18)).dict_id
+
+
+def compress_all(name: str, *, kind: Optional[str] = None) -> Dict[str, int]:
+    """
+    Re-encode every record of a cache with the given codec (mtime preserved).
+    .zst records written without the current dictionary (none, or an older one)
+    are re-encoded too.
+    """
+    kind = kind or codec()
+    want = {"zstd": ".json.zst", "gzip": ".json.gz"}.get(kind, ".json")
+    dict_id = 0
+    if kind == "zstd":
+        _load_dicts()
+        dict_id = _zstd_state["current"].dict_id() if _zstd_state["current"] else 0
+    stats = {"converted": 0, "before": 0, "after": 0}
+    for _, path in list(iter_records(CACHE_DIRS[name])):
+        st = path.stat()
+        stats["before"] += st.st_size
+        if _suffix(path) == want and (kind != "zstd" or _frame_dict_id(path) == dict_id):
+            stats["after"] += st.st_size
+            continue
+        obj = read_record(path)
+        if obj is None:
+            stats["after"] += st.st_size
+            continue
+        target = write_record(path, obj, kind=kind)
+        os.utime(target, (st.st_atime, st.st_mtime))
+        stats["converted"] += 1
+        stats["after"] += target.stat().st_size
+    return stats
+
+
+def maintain(*, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """GC + compact every cache."""
+    report: Dict[str, Dict[str, int]] = {}
+    for name in CACHE_DIRS:
+        report[name] = {**gc(name, dry_run=dry_run), **compact(name, dry_run=dry_run)}
+    return report
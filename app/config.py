@@ -1,6 +1,6 @@
 import os
 import time
-import importlib.util
+from functools import lru_cache
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
@@ -8,25 +8,93 @@ from zoneinfo import ZoneInfo
 ROOT            = Path(".")
 CONTENT_DIR     = ROOT / "content"
 POST_DIR        = CONTENT_DIR / "posts"
-DATA_DIR        = CONTENT_DIR / "data"
-SUM_CACHE_DIR   = DATA_DIR / "summaries"
+DATA_DIR        = CONTENT_DIR / "data"          # committed: pool + seen-history only
 POOL_PATH       = DATA_DIR / "candidate_pool.json"
 POOL_META_PATH  = DATA_DIR / "pool_meta.json"
-APPSTATS_DIR    = DATA_DIR / "appstats"
 SEEN_PATH       = DATA_DIR / "seen.json"
-APPLIST_CACHE   = DATA_DIR / "applist.json"
 
-for p in (POST_DIR, DATA_DIR, SUM_CACHE_DIR, APPSTATS_DIR):
-    p.mkdir(parents=True, exist_ok=True)
+# -------- Caches (outside the committed tree; restored from a CI cache artifact)
+CACHE_DIR       = Path(os.getenv("HGG_CACHE_DIR", ".cache/hgg"))
+APPSTATS_DIR    = CACHE_DIR / "appstats"
+REVIEWSUM_DIR   = CACHE_DIR / "reviewsum"
+SUM_CACHE_DIR   = CACHE_DIR / "summaries"
+APPLIST_CACHE   = CACHE_DIR / "applist.json"
+OUTCOMES_PATH   = CACHE_DIR / "outcomes.json"
+SAMPLER_STATS_PATH = CACHE_DIR / "sampler_stats.json"
+POST_MANIFEST_PATH = CACHE_DIR / "posts_manifest.json"
+SIMILARITY_INDEX_PATH = CACHE_DIR / "similarity.npz"
+SEARCH_IDS_PATH = CACHE_DIR / "search_ids.json"   # post url -> stable search doc id
+POOL_HEALTH_PATH = CACHE_DIR / "pool_health.json"
+
+# -------- Post images (content-addressed, served by Pelican as static files)
+IMAGES_DIR       = CONTENT_DIR / "images" / "hdr"
+IMAGES_URL       = "images/hdr"                    # relative to the site root
+IMAGE_INDEX_PATH = CACHE_DIR / "images.json"       # source URL -> local variants
+IMAGE_WIDTHS     = (230, 460, 920)
+LOCAL_IMAGES     = os.getenv("HGG_LOCAL_IMAGES", "1") != "0"
 
 LOCAL_TZ = ZoneInfo("Europe/Berlin")
 
-# -------- Harvest cadence & pool sizing
+# -------- Harvest cadence & pool sizing (app/poolhealth.py tops the pool up
+# HARVEST_MAX_PROBE probes at a time while it is below POOL_MIN_SIZE or older
+# than POOL_TTL_SECS; HARVEST_FORCE=1 forces a top-up)
 APPLIST_TTL_SECS  = 60 * 60 * 24 * 7   # 7 days
 POOL_TTL_SECS     = 60 * 60 * 24 * 7   # 7 days
 POOL_MIN_SIZE     = int(os.getenv("POOL_MIN_SIZE", "80"))
 HARVEST_MAX_PROBE = int(os.getenv("HARVEST_MAX_PROBE", "180"))
 HARVEST_FORCE     = os.getenv("HARVEST_FORCE") == "1"
+POOL_TARGET_SIZE  = int(os.getenv("POOL_TARGET_SIZE", "2000"))
+POOL_STALE_SECS   = 60 * 60 * 24 * 90  # re-verify (or drop) candidates after ~3 months
+
+# -------- Known-outcome sets (Bloom filters sized for the whole catalogue)
+OUTCOME_ERROR_RATE = 0.01
+OUTCOME_CAPACITY   = {
+    "rejected": 150_000,
+    "below":    100_000,
+    "nsfw":      20_000,
+    "failed":    30_000,
+}
+
+# -------- Cache maintenance (per cache: size cap in MB, TTL in days; 0 = unlimited)
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return float(default)
+
+CACHE_LIMITS = {
+    "appstats":  {"max_mb": _env_num("HGG_CACHE_APPSTATS_MB", 200),  "ttl_days": _env_num("HGG_CACHE_APPSTATS_TTL_DAYS", 180)},
+    "reviewsum": {"max_mb": _env_num("HGG_CACHE_REVIEWSUM_MB", 100), "ttl_days": _env_num("HGG_CACHE_REVIEWSUM_TTL_DAYS", 60)},
+    "summaries": {"max_mb": _env_num("HGG_CACHE_SUMMARIES_MB", 50),  "ttl_days": _env_num("HGG_CACHE_SUMMARIES_TTL_DAYS", 0)},
+}
+# In-process memo of decoded records (app/cache.MEMO), by JSON text size
+MEMO_MAX_MB = _env_num("HGG_MEMO_MB", 64)
+
+# -------- Harvest filter rules (compiled by app/rules.py)
+# Each rule matches when ANY of its criteria does; the first match (id rules in
+# order, then the shared free-text pattern) is reported as the reason.
+#   types_allowed  payload "type" must be one of these
+#   genres / categories / descriptors   Steam ids (content_descriptors.ids)
+#   pattern        regex over genre + category descriptions (word-bounded, no case)
+# HGG_FILTER_RULES=/path/rules.json replaces whole sections ("reject", "nsfw").
+FILTER_RULES = {
+    "reject": [
+        {"name": "not-a-game", "types_allowed": ["game", "dlc"]},
+        # 50 Accounting, 56 Software Training, 57 Utilities, 58 Video Production,
+        # 59 Web Publishing, 84 Tutorial
+        {"name": "software-genre", "genres": [50, 56, 57, 58, 59, 84]},
+        # 80 Movie, 81 Documentary, 85 360 Video
+        {"name": "video-genre", "genres": [80, 81, 85]},
+    ],
+    "nsfw": [
+        # 3 Adult Only Sexual Content, 4 Frequent Nudity or Sexual Content
+        {"name": "adult-descriptor", "descriptors": [3, 4]},
+        # 71 Sexual Content, 72 Nudity
+        {"name": "adult-genre", "genres": [71, 72]},
+        {"name": "adult-text", "pattern": r"\b(?:hentai|porn\w*|nsfw|nudity|sexual|sex)\b"},
+    ],
+}
+FILTER_RULES_PATH = os.getenv("HGG_FILTER_RULES")
 
 # -------- Hidden-gem hard gates
 MIN_REVIEWS   = 50
@@ -37,6 +105,15 @@ MIN_POS_RATIO = 0.85  # lifetime positivity if recent unavailable
 NO_REPEAT_GENRE_DAYS     = 5
 NO_REPEAT_PUBLISHER_DAYS = 14
 
+# -------- Similar games (app/similarity.py; cosine of the projected TF-IDF vectors)
+SIMILAR_RELATED_K   = 3      # "More like this" entries per post
+SIMILAR_RELATED_MIN = 0.25   # ... only when at least this similar
+SIMILAR_REPEAT_MAX  = 0.6    # picks this close to a post within NO_REPEAT_GENRE_DAYS count as a repeat
+
+# -------- Daily pipeline (details, review snippets, AI sections and the header
+# image run concurrently; whatever misses the deadline falls back)
+DAILY_DEADLINE_S = _env_num("HGG_DAILY_DEADLINE", 60)
+
 # -------- Cloudflare Workers AI
 CF_ACCOUNT_ID = os.getenv("CF_ACCOUNT_ID")
 CF_API_TOKEN  = os.getenv("CF_API_TOKEN")
@@ -48,7 +125,11 @@ RETRY_BACKOFF  = 0.8
 RATE_LIMIT_S   = 0.75
 
 # -------- Offline / no-fetch toggle
+@lru_cache(maxsize=1)
 def _pelican_flag_default_true() -> bool:
+    # executes pelicanconf.py: only once per process, and only when asked
+    import importlib.util
+
     pelicanconf = Path("pelicanconf.py")
     try:
         if pelicanconf.exists():
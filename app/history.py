@@ -0,0 +1,215 @@
+# app/history.py
+"""
+Seen-history: what has been posted, in order.
+
+Two views over one file (config.SEEN_PATH, committed with the posts):
+
+- recent   a ring buffer of the last RECENT_SIZE picked appids in insertion
+           order, with a counting index for O(1) membership; pickers exclude it
+- posts    the complete long-term record, one entry per post
+           {"appid", "date", "genres", "publisher"}, kept sorted by date so the
+           NO_REPEAT_* windows are a bisect plus a walk over the window only
+
+The first load migrates the legacy files: seen.json ({"seen_appids": [...]},
+unordered) and seen_daily.json ({"ids": [...]}, written from a set, so its
+"most recent" order was arbitrary). Dates for legacy ids are recovered from the
+post manifest (one record per post), genres/publisher from cached appdetails
+(no network), so the migration is left to the first daily run in CI, where the
+appdetails cache is restored.
+"""
+from __future__ import annotations
+
+import bisect
+import datetime as dt
+import json
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+from . import config as cfg
+from .storage import load_json, write_text
+
+HISTORY_VERSION = 2
+RECENT_SIZE = 50
+
+LEGACY_DAILY_PATH = cfg.DATA_DIR / "seen_daily.json"
+
+def _genre_ids(payload: dict) -> List[int]:
+    out = []
+    for g in payload.get("genres") or []:
+        try:
+            out.append(int(g.get("id") if isinstance(g, dict) else g))
+        except (TypeError, ValueError):
+            continue
+    return out
+
+
+class SeenHistory:
+    def __init__(self, *, recent_size: int = RECENT_SIZE):
+        self.recent: Deque[int] = deque(maxlen=recent_size)
+        self._recent_count: Counter = Counter()
+        self.posts: List[Dict[str, Any]] = []      # sorted by date (undated first)
+        self._dates: List[str] = []                # parallel sort keys for bisect
+
+    # ----- ring buffer
+    def _push_recent(self, appid: int) -> None:
+        if len(self.recent) == self.recent.maxlen:
+            old = self.recent[0]
+            self._recent_count[old] -= 1
+            if self._recent_count[old] <= 0:
+                del self._recent_count[old]
+        self.recent.append(appid)
+        self._recent_count[appid] += 1
+
+    def __contains__(self, appid: int) -> bool:
+        """Picked within the last RECENT_SIZE posts."""
+        return int(appid) in self._recent_count
+
+    def recent_ids(self) -> Set[int]:
+        return set(self._recent_count)
+
+    # ----- long-term record
+    def _insert_post(self, rec: Dict[str, Any]) -> None:
+        key = rec.get("date") or ""
+        i = bisect.bisect_right(self._dates, key)
+        self._dates.insert(i, key)
+        self.posts.insert(i, rec)
+
+    def add(
+        self,
+        appid: int,
+        *,
+        date: dt.date | str | None = None,
+        genres: Iterable[int] = (),
+        publisher: Optional[str] = None,
+    ) -> None:
+        """Record a post (and push its appid onto the recent ring)."""
+        appid = int(appid)
+        day = date.isoformat() if isinstance(date, dt.date) else date
+        self._insert_post({"appid": appid, "date": day, "genres": list(genres), "publisher": publisher})
+        self._push_recent(appid)
+
+    def add_payload(self, appid: int, payload: dict, *, date: dt.date | str | None = None) -> None:
+        """Record a post from its appdetails payload."""
+        self.add(
+            appid,
+            date=date,
+            genres=_genre_ids(payload or {}),
+            publisher=next(iter((payload or {}).get("publishers") or []), None),
+        )
+
+    # ----- NO_REPEAT_* queries
+    def _window(self, days: int, today: dt.date) -> List[Dict[str, Any]]:
+        start = (today - dt.timedelta(days=max(0, int(days)) - 1)).isoformat()
+        return self.posts[bisect.bisect_left(self._dates, start):]
+
+    def genres_within(self, days: int, *, today: Optional[dt.date] = None) -> Set[int]:
+        """Genre ids posted in the last `days` days (today included)."""
+        return {g for rec in self._window(days, today or cfg.now_local().date()) for g in rec.get("genres") or ()}
+
+    def publishers_within(self, days: int, *, today: Optional[dt.date] = None) -> Set[str]:
+        """Publishers posted in the last `days` days (today included)."""
+        return {
+            rec["publisher"] for rec in self._window(days, today or cfg.now_local().date()) if rec.get("publisher")
+        }
+
+    def appids_within(self, days: int, *, today: Optional[dt.date] = None) -> Set[int]:
+        """Appids posted in the last `days` days (today included)."""
+        return {rec["appid"] for rec in self._window(days, today or cfg.now_local().date())}
+
+    def exclusions(self, items: Iterable[Dict[str, Any]], *, today: Optional[dt.date] = None) -> Set[int]:
+        """
+        Pool appids that would break a no-repeat rule: picked recently, primary
+        genre posted within NO_REPEAT_GENRE_DAYS, or publisher posted within
+        NO_REPEAT_PUBLISHER_DAYS.
+        """
+        today = today or cfg.now_local().date()
+        genres = self.genres_within(cfg.NO_REPEAT_GENRE_DAYS, today=today)
+        publishers = self.publishers_within(cfg.NO_REPEAT_PUBLISHER_DAYS, today=today)
+        out = self.recent_ids()
+        for item in items:
+            if not isinstance(item, dict) or item.get("appid") is None:
+                continue
+            primary = next(iter(item.get("genres") or []), None)
+            if primary in genres or (item.get("publisher") or None) in publishers:
+                out.add(int(item["appid"]))
+        return out
+
+    # ----- persistence
+    def to_dict(self) -> dict:
+        return {
+            "version": HISTORY_VERSION,
+            "recent_size": self.recent.maxlen,
+            "recent": list(self.recent),
+            "posts": self.posts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SeenHistory":
+        h = cls(recent_size=int(data.get("recent_size") or RECENT_SIZE))
+        for rec in data.get("posts") or []:
+            h._insert_post({
+                "appid": int(rec["appid"]),
+                "date": rec.get("date"),
+                "genres": list(rec.get("genres") or []),
+                "publisher": rec.get("publisher"),
+            })
+        for appid in data.get("recent") or []:
+            h._push_recent(int(appid))
+        return h
+
+
+def _posted() -> List[tuple]:
+    """(appid, date) for every existing auto post (migration only)."""
+    from . import manifest
+
+    out = [
+        (appid, (post.get("date") or "")[:10])
+        for appid, posts in manifest.current().by_appid.items()
+        for post in posts
+    ]
+    return sorted(out, key=lambda x: x[1])
+
+
+def _migrate(legacy: dict) -> SeenHistory:
+    from . import steam  # local import: only needed once
+
+    daily = load_json(LEGACY_DAILY_PATH, default={}) or {}
+    posted = _posted()
+    undated = [int(x) for x in legacy.get("seen_appids") or []]
+    undated = list(dict.fromkeys(aid for aid in undated if aid not in {a for a, _ in posted}))
+
+    h = SeenHistory()
+    details: Dict[int, tuple] = {}
+    for appid, day in posted + [(aid, None) for aid in undated]:
+        if appid not in details:
+            details[appid] = steam._unwrap_details(steam.get_appdetails_cached(appid) or {})
+        ok, payload = details[appid]
+        h._insert_post({
+            "appid": appid,
+            "date": day,
+            "genres": _genre_ids(payload) if ok else [],
+            "publisher": next(iter(payload.get("publishers") or []), None) if ok else None,
+        })
+    # the ring: dated posts oldest -> newest, then whatever seen_daily.json still adds
+    for rec in h.posts:
+        if rec.get("date"):
+            h._push_recent(rec["appid"])
+    for appid in daily.get("ids") or []:
+        if int(appid) not in h:
+            h._push_recent(int(appid))
+    return h
+
+
+def load(path: Path | None = None) -> SeenHistory:
+    path = path or cfg.SEEN_PATH
+    data = load_json(path, default={}) or {}
+    if data.get("version") == HISTORY_VERSION:
+        return SeenHistory.from_dict(data)
+    return _migrate(data)
+
+
+def save(history: SeenHistory, path: Path | None = None) -> None:
+    write_text(path or cfg.SEEN_PATH, json.dumps(history.to_dict(), ensure_ascii=False, indent=1))
+    if LEGACY_DAILY_PATH.exists():
+        LEGACY_DAILY_PATH.unlink()
@@ -0,0 +1,129 @@
+# app/images.py
+"""
+Local image pipeline for post header images.
+
+Instead of hotlinking Steam's CDN, each header image is downloaded once into a
+content-addressed store under content/images/hdr (served by Pelican as static
+files) and, when Pillow is available, turned into:
+
+- resized WebP variants (and AVIF when the Pillow build supports it)
+- a tiny blurred JPEG placeholder, inlined as a data: URI
+
+The theme renders these as <picture>/srcset with lazy loading (see
+themes/hgg/templates/_picture.html). Without Pillow only the original is
+localised. The URL -> digest index lives in the cache dir so re-renders never
+download the same image twice.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from . import config as cfg
+from .storage import load_json, save_json
+
+Fetch = Callable[[str], Optional[bytes]]
+
+_INDEX_LOCK = threading.Lock()   # batch renders localise images from several threads
+
+_EXT = {b"\xff\xd8": ".jpg", b"\x89P": ".png", b"GI": ".gif", b"RI": ".webp"}
+
+
+def _http_fetch(url: str) -> Optional[bytes]:
+    import requests
+
+    try:
+        res = requests.get(url, headers={"User-Agent": cfg.USER_AGENT}, timeout=30)
+    except Exception:
+        return None
+    if res.status_code != 200 or not res.content:
+        return None
+    return res.content
+
+
+def _pillow():
+    try:
+        from PIL import Image  # type: ignore
+        return Image
+    except ImportError:
+        return None
+
+
+def _variants(Image, raw: bytes, digest: str, out_dir: Path) -> Dict[str, object]:
+    """Resized WebP/AVIF variants + LQIP placeholder for one source image."""
+    img = Image.open(io.BytesIO(raw))
+    img.load()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    info: Dict[str, object] = {"width": img.width, "height": img.height}
+
+    formats = [("webp", "WEBP", {"quality": 80, "method": 6})]
+    if "AVIF" in Image.SAVE:
+        formats.append(("avif", "AVIF", {"quality": 55}))
+    for key, fmt, opts in formats:
+        entries = []
+        for w in sorted({min(w, img.width) for w in cfg.IMAGE_WIDTHS}):
+            name = f"{digest}-{w}.{key}"
+            path = out_dir / name
+            if not path.exists():
+                h = max(1, round(img.height * w / img.width))
+                img.resize((w, h), Image.LANCZOS).save(path, fmt, **opts)
+            entries.append(f"{cfg.IMAGES_URL}/{name} {w}w")
+        info[key] = ", ".join(entries)
+
+    tiny = img.convert("RGB")
+    tiny.thumbnail((24, 24))
+    buf = io.BytesIO()
+    tiny.save(buf, "JPEG", quality=40)
+    info["lqip"] = "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+    return info
+
+
+def _present(info: Dict[str, object]) -> bool:
+    """Every file an index entry links to exists (the index is cached, the images are committed)."""
+    names = [Path(str(info["src"])).name]
+    for key in ("webp", "avif"):
+        names += [Path(entry.split()[0]).name for entry in str(info.get(key) or "").split(", ") if entry]
+    return all((cfg.IMAGES_DIR / name).exists() for name in names)
+
+
+def localize_header(url: str, *, fetch: Optional[Fetch] = None) -> Optional[Dict[str, object]]:
+    """
+    Return {"src", "width", "height", "webp", "avif", "lqip"} for a remote image,
+    downloading and processing it only the first time. None if it cannot be fetched.
+    Paths are relative to the site root (prefix with SITEURL / {static}).
+    """
+    if not url:
+        return None
+    with _INDEX_LOCK:
+        cached = (load_json(cfg.IMAGE_INDEX_PATH, default={}) or {}).get(url)
+    if cached and _present(cached):
+        return cached
+
+    raw = (fetch or _http_fetch)(url)
+    if not raw:
+        return None
+    digest = hashlib.sha256(raw).hexdigest()[:20]
+    ext = _EXT.get(raw[:2], ".jpg")
+    cfg.IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    original = cfg.IMAGES_DIR / f"{digest}{ext}"
+    if not original.exists():   # content-addressed: files committed by an earlier run are reused
+        original.write_bytes(raw)
+
+    info: Dict[str, object] = {"src": f"{cfg.IMAGES_URL}/{original.name}"}
+    Image = _pillow()
+    if Image is not None:
+        try:
+            info.update(_variants(Image, raw, digest, cfg.IMAGES_DIR))
+        except Exception as e:
+            print(f"[images] variant generation failed for {url}: {e}")
+
+    with _INDEX_LOCK:
+        index = load_json(cfg.IMAGE_INDEX_PATH, default={}) or {}
+        index[url] = info
+        save_json(cfg.IMAGE_INDEX_PATH, index)
+    return info
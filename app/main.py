@@ -3,11 +3,19 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
-import json
+import html
+import re
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
 from zoneinfo import ZoneInfo
 
-from app import steam, storage
+from app import (
+    cache, config, history, images, manifest, outcomes, poolhealth, search, shards, steam, storage,
+)
+# app.scoring / app.similarity pull in numpy: imported by the commands that use them
 
 # Optional AI module (Cloudflare / HF / etc.). Safe to be missing.
 try:
@@ -33,16 +41,233 @@ def _mk_review_line(data: dict) -> str:
     return "Reviews: —"
 
 
-def _write_post_from_appdetails(appid: int, data: dict, *, now_utc: dt.datetime | None = None) -> None:
+def _header_markup(appid: int, name: str, header: str, *, offline: bool = False) -> tuple[str, str, str]:
+    """
+    Returns (cover, extra front-matter, inline image markdown/HTML).
+    Localises the header image (resized variants + placeholder) when possible,
+    otherwise falls back to hotlinking Steam's CDN. offline=True only uses images
+    already in the local index (never downloads).
+    """
+    info = None
+    if header and config.LOCAL_IMAGES:
+        try:
+            info = images.localize_header(header, fetch=(lambda url: None) if offline else None)
+        except Exception as e:
+            print(f"[images] could not localise header for {appid}: {e}")
+    if not info:
+        return header, "", f"![{name}]({header})"
+
+    meta = []
+    if info.get("width"):
+        meta.append(f"CoverSize: {info['width']}x{info['height']}")
+    for key, label in (("avif", "CoverAvif"), ("webp", "CoverWebp"), ("lqip", "CoverLqip")):
+        if info.get(key):
+            meta.append(f"{label}: {info[key]}")
+    size = f' width="{info["width"]}" height="{info["height"]}"' if info.get("width") else ""
+    inline = (
+        f'<img src="{{static}}/{info["src"]}" alt="{html.escape(name, quote=True)}"{size} '
+        f'loading="lazy" decoding="async">'
+    )
+    return str(info["src"]), "".join(f"{m}\n" for m in meta), inline
+
+
+NO_OVERVIEW = "No overview available."
+DEFAULT_GEM_REASON = "Overlooked by the mainstream, but it stands out for its mechanics, style, or niche appeal."
+
+_SECTION_HEADINGS = {
+    "gem_reason": "### Why it’s a hidden gem",
+    "likes": "### What players like",
+    "dislikes": "### What players don’t like",
+}
+
+
+def _post_sections(text: str) -> dict:
+    """
+    The prose sections of a rendered post ({overview, gem_reason, likes, dislikes});
+    missing ones and the fallback texts are omitted, so the renderer fills them in again.
+    """
+    out = {}
+    m = re.search(r"\n\n- (?:Reviews|Release):", text)
+    if m:
+        # prose paragraphs right above the facts list (below the title / image / store link)
+        paras = []
+        for para in reversed(text[:m.start()].split("\n\n")):
+            if not para.strip() or para.lstrip().startswith(("!", "<", "#", "*", "Title:")):
+                break
+            paras.insert(0, para.strip())
+        if paras:
+            out["overview"] = "\n\n".join(paras)
+    for key, heading in _SECTION_HEADINGS.items():
+        m = re.search(rf"^{re.escape(heading)}\n\n(.+?)(?=\n\n### |\n\n\*|\Z)", text, re.S | re.M)
+        if m:
+            out[key] = m.group(1).strip()
+    return {k: v for k, v in out.items() if v not in (NO_OVERVIEW, DEFAULT_GEM_REASON)}
+
+
+def _details_payload(raw: dict | None) -> dict | None:
+    """appdetails as cached ({"<appid>": {"success", "data"}}) -> the inner payload."""
+    if not raw:
+        return None
+    ok, payload = steam._unwrap_details(raw)
+    if ok:
+        return payload
+    # slim legacy records already are the payload
+    return raw if isinstance(raw, dict) and "name" in raw else None
+
+
+AI_SECTIONS = ("overview", "gem_reason", "likes", "dislikes")
+
+
+def _ai_section(key: str, data: dict, snippets: list | None = None) -> str:
+    """One AI section via ai.summarize_<key>; "" when AI is off or the call fails."""
+    fn = getattr(ai, f"summarize_{key}", None) if ai else None
+    if fn is None:
+        return ""
+    try:
+        return fn(data, snippets) or ""
+    except Exception:
+        return ""
+
+
+def _ai_sections(data: dict, snippets: list | None = None) -> dict:
+    """All AI sections of one post as one backend batch (local model: one queue pass)."""
+    batch = getattr(ai, "summarize_sections", None) if ai else None
+    if batch is None:
+        return {key: _ai_section(key, data, snippets) for key in AI_SECTIONS}
+    try:
+        return batch(data, snippets, AI_SECTIONS)
+    except Exception:
+        return {}
+
+
+def _spawn(fn, *args) -> Future:
+    """Run fn on a daemon thread: work that misses the deadline never delays exit."""
+    fut: Future = Future()
+
+    def _run():
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=_run, daemon=True).start()
+    return fut
+
+
+def _render_daily(appid: int, backup: int | None, fetch_details, *, deadline_s: float) -> tuple[int, dict, Path]:
+    """
+    Concurrent daily render under one deadline:
+    details for the primary and backup pick + review snippets run at once, then
+    the AI sections and the header image run at once. Anything that misses the
+    deadline falls back (AI -> default text, image -> hotlink); only the details
+    are required. Returns (appid, payload, post path).
+    """
+    t0 = time.monotonic()
+    t_end = t0 + deadline_s
+
+    def _get(fut: Future, default=None):
+        try:
+            return fut.result(timeout=max(0.0, t_end - time.monotonic()))
+        except Exception:   # timeout or failure -> fallback
+            return default
+
+    use_ai = bool(ai) and getattr(ai, "available", lambda: True)()
+    picks = [a for a in (appid, backup) if a is not None]
+    details = {a: _spawn(fetch_details, a) for a in picks}
+    snippets = {a: _spawn(steam.get_review_snippets_safe, a, 12) for a in picks} if use_ai else {}
+
+    chosen, payload = None, None
+    for a in picks:
+        payload = _details_payload(_get(details[a]))
+        if payload:
+            chosen = a
+            break
+        print(f"[daily] no appdetails for {a} within the deadline")
+    if not payload:
+        raise RuntimeError("Could not fetch appdetails for the picked ids.")
+
+    name = payload.get("name", f"App {chosen}")
+    header = payload.get("header_image") or ""
+    header_f = _spawn(_header_markup, chosen, name, header)
+    snips = _get(snippets[chosen], []) if use_ai else []
+    ai_f = {key: _spawn(_ai_section, key, payload, snips) for key in AI_SECTIONS} if use_ai else {}
+
+    sections = {key: _get(f, "") for key, f in ai_f.items()}
+    markup = _get(header_f) or (header, "", f"![{name}]({header})")
+    late = [key for key, f in ai_f.items() if not f.done()] + ([] if header_f.done() else ["image"])
+    print(
+        f"[daily] pipeline ready in {time.monotonic() - t0:.2f}s (deadline {deadline_s:.0f}s)"
+        + (f"; fell back for: {', '.join(late)}" if late else "")
+    )
+    post = _write_post_from_appdetails(chosen, payload, sections=sections, header_markup=markup)
+    return chosen, payload, post
+
+
+_POOL_NAMES: dict = {}
+
+
+def _pool_names(mtime: float | None) -> dict[int, str]:
+    """appid -> name for the pool on disk (re-read only when its mtime changes)."""
+    if _POOL_NAMES.get("mtime") != mtime or "names" not in _POOL_NAMES:
+        items = (storage.load_candidate_pool(default={}) or {}).get("items") or []
+        _POOL_NAMES.update(mtime=mtime, names={int(it["appid"]): it.get("name") or f"App {it['appid']}" for it in items})
+    return _POOL_NAMES["names"]
+
+
+def _related_markup(appid: int) -> str:
+    """'More like this' list: the closest posted or pooled games by description/genres."""
+    from app import similarity
+
+    index = similarity.current()
+    if appid not in index:
+        return ""
+    posts = manifest.current()
+    try:
+        mtime = storage.POOL_PATH.stat().st_mtime
+    except OSError:
+        mtime = None
+    names = _pool_names(mtime)
+    hits = index.neighbours(
+        appid,
+        config.SIMILAR_RELATED_K,
+        among=posts.posted_ids() | set(names),
+        min_score=config.SIMILAR_RELATED_MIN,
+    )
+    lines = []
+    for other, _ in hits:
+        post = next(iter(posts.posts_for(other)[::-1]), None)
+        if post:
+            lines.append(f"- [{post.get('title') or names.get(other) or f'App {other}'}]({{filename}}/posts/{post['file']})")
+        else:
+            lines.append(f"- [{names.get(other, f'App {other}')}](https://store.steampowered.com/app/{other}/)")
+    return "\n".join(lines)
+
+
+def _write_post_from_appdetails(
+    appid: int,
+    data: dict,
+    *,
+    now_utc: dt.datetime | None = None,
+    slug_ts: str | None = None,
+    post_path: Path | None = None,
+    sections: dict | None = None,
+    header_markup: tuple[str, str, str] | None = None,
+    related: str | None = None,
+) -> Path:
     """
     Render a Pelican post from a single appdetails payload.
     Uses optional AI summaries if app/ai.py is available; otherwise, falls back.
+    slug_ts / post_path pin the slug and file when re-rendering an existing post.
+    sections / header_markup take results computed ahead of time (daily pipeline).
+    related overrides the "More like this" list (default: from app/similarity.py).
     """
     # --- timestamps & slugs
     LOCAL_TZ = getattr(storage, "LOCAL_TZ", ZoneInfo("Europe/Berlin"))
     now_utc = now_utc or dt.datetime.now(dt.timezone.utc)
     now_local = now_utc.astimezone(LOCAL_TZ)
-    slug_ts = now_local.strftime("%Y-%m-%d-%H%M%S")
+    slug_ts = slug_ts or now_local.strftime("%Y-%m-%d-%H%M%S")
 
     # --- core fields
     name = data.get("name", f"App {appid}")
@@ -60,41 +285,26 @@ def _write_post_from_appdetails(appid: int, data: dict, *, now_utc: dt.datetime
     price_str = "Free to play" if is_free else (price or "Price varies")
 
     review_line = _mk_review_line(data)
+    cover, cover_meta, header_img = header_markup or _header_markup(appid, name, header)
 
-    # --- optional AI bits
-    overview_text = ""
-    gem_reason = ""
-    likes_text = ""
-    dislikes_text = ""
-
-    if ai:
-        try:
-            overview_text = ai.summarize_overview(data) or ""
-        except Exception:
-            overview_text = ""
-        try:
-            gem_reason = ai.summarize_gem_reason(data) or ""
-        except Exception:
-            gem_reason = ""
-        try:
-            likes_text = ai.summarize_likes(data) or ""
-        except Exception:
-            likes_text = ""
-        try:
-            dislikes_text = ai.summarize_dislikes(data) or ""
-        except Exception:
-            dislikes_text = ""
+    # --- optional AI bits (precomputed by the daily pipeline, else in series)
+    if sections is None:
+        sections = _ai_sections(data)
+    overview_text = sections.get("overview") or ""
+    gem_reason = sections.get("gem_reason") or ""
+    likes_text = sections.get("likes") or ""
+    dislikes_text = sections.get("dislikes") or ""
 
     # --- fallbacks if AI is off/failed
     if not overview_text:
-        overview_text = short or "No overview available."
+        overview_text = short or NO_OVERVIEW
     if not gem_reason:
-        gem_reason = (
-            "Overlooked by the mainstream, but it stands out for its mechanics, style, or niche appeal."
-        )
+        gem_reason = DEFAULT_GEM_REASON
 
     likes_block = f"\n\n### What players like\n\n{likes_text}\n" if likes_text else ""
     dislikes_block = f"\n\n### What players don’t like\n\n{dislikes_text}\n" if dislikes_text else ""
+    related = _related_markup(appid) if related is None else related
+    related_block = f"\n\n### More like this\n\n{related}\n" if related else ""
 
     # --- build markdown
     md = f"""Title: {name}
@@ -102,11 +312,11 @@ Date: {now_local.strftime('%Y-%m-%d %H:%M')}
 Category: Games
 Tags: auto, steam
 Slug: game-{slug_ts}
-Cover: {header}
-
+Cover: {cover}
+{cover_meta}
 # {name}
 
-![{name}]({header})
+{header_img}
 
 {overview_text}
 
@@ -118,16 +328,16 @@ Cover: {header}
 
 ### Why it’s a hidden gem
 
-{gem_reason}{likes_block}{dislikes_block}
+{gem_reason}{likes_block}{dislikes_block}{related_block}
 
 *Auto-generated; daily pick from a cached candidate pool refreshed weekly.*
 """
 
-    # --- write
-    storage.POST_DIR.mkdir(parents=True, exist_ok=True)
-    post_path = storage.POST_DIR / f"{slug_ts}-auto.md"
-    post_path.write_text(md, encoding="utf-8")
+    # --- write (atomically: batch renders may run in parallel)
+    post_path = post_path or storage.POST_DIR / f"{slug_ts}-auto.md"
+    storage.write_text(post_path, md)
     print(f"[ok] wrote {post_path} for {appid} — {name!r}")
+    return post_path
 
 
 # -----------------------------
@@ -141,19 +351,50 @@ def run_harvest(
     max_apps_to_check: int | None,
     batch_size: int,
     wait_s: float,
-) -> None:
+    adaptive: bool = True,
+    apps: list | None = None,
+    shard: tuple[int, int] | None = None,
+) -> dict:
     """
-    Refresh the cached candidate pool by sampling appids and building a high-signal set.
-    This function delegates rate-limiting and request pacing to app.steam.
+    Top up the cached candidate pool by sampling appids and merging the survivors
+    into the existing pool (see storage.merge_candidate_pool). This function delegates rate-limiting and request pacing to app.steam.
+    shard=(i, N) harvests only shard i of the applist into its own state dir;
+    --merge-shards folds the results in (see app/shards.py).
+    Returns the merge stats (just {"harvested": n} for a shard run).
     """
     print(
         f"[harvest] start | min_reviews={min_reviews} block_nsfw={block_nsfw} "
-        f"max_apps_to_check={max_apps_to_check} batch_size={batch_size} wait_s={wait_s}"
+        f"max_apps_to_check={max_apps_to_check} batch_size={batch_size} wait_s={wait_s} "
+        f"adaptive={adaptive}" + (f" shard={shard[0]}/{shard[1]}" if shard else "")
     )
-    apps = steam.get_applist()
+    apps = apps if apps is not None else steam.get_applist()
     if not apps:
         raise RuntimeError("Could not fetch the Steam applist.")
 
+    if shard is not None:
+        t0 = time.perf_counter()
+        started = time.time() - 1  # export_records: cache records written by this run
+        requests_before = steam.REQUEST_COUNT
+        state_dir = shards.shard_dir(*shard)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        pool = steam.build_candidate_pool(
+            shards.select(apps, *shard),
+            min_reviews=min_reviews,
+            block_nsfw=block_nsfw,
+            sample_size=max_apps_to_check,
+            batch_size=batch_size,
+            wait_s=wait_s,
+            adaptive=adaptive,
+            state_dir=state_dir,
+        )
+        shards.save_pool(state_dir, pool, {
+            "exported": shards.export_records(state_dir, since=started),
+            "requests": steam.REQUEST_COUNT - requests_before,
+            "seconds": round(time.perf_counter() - t0, 1),
+        })
+        print(f"[harvest] shard {shard[0]}/{shard[1]}: harvested={len(pool)} -> {state_dir} (run --merge-shards)")
+        return {"harvested": len(pool)}
+
     pool = steam.build_candidate_pool(
         apps,
         min_reviews=min_reviews,
@@ -161,67 +402,304 @@ def run_harvest(
         sample_size=max_apps_to_check,
         batch_size=batch_size,
         wait_s=wait_s,
+        adaptive=adaptive,
+    )
+    from app import scoring
+
+    merged, stats = storage.merge_candidate_pool(storage.load_candidate_pool(default={}), pool)
+    stats.update(scoring.score_pool(merged))
+    storage.save_candidate_pool(merged, stats=stats)
+    print(
+        f"[harvest] harvested={len(pool)} added={stats['added']} refreshed={stats['refreshed']} "
+        f"evicted={stats['evicted_stale'] + stats['evicted_size']} | candidate pool size={stats['size']} "
+        f"(scored={stats['scored']} gated={stats['gated']} unscored={stats['unscored']}) "
+        f"saved to {storage.CANDIDATE_POOL_PATH}"
     )
-    storage.save_candidate_pool(pool)
-    print(f"[harvest] candidate pool size={len(pool)} saved to {storage.CANDIDATE_POOL_PATH}")
+    _update_similarity()
+    return {"harvested": len(pool), **stats}
+
+
+def _update_similarity() -> None:
+    from app import similarity
 
+    sim = similarity.update()
+    print(
+        f"[similar] indexed={sim['indexed']} added={sim['added']} updated={sim['updated']} "
+        f"removed={sim['removed']} projected={sim['projected']}"
+    )
 
-def run_daily() -> None:
+
+def run_daily(*, pool: dict | None = None, fetch_details=None, deadline_s: float | None = None) -> Path:
     """
-    Daily: pick ONE id from the cached pool, fetch details once, write the post.
+    Daily: pick ONE id (plus a backup) from the cached pool and render it through
+    the concurrent pipeline (_render_daily) within deadline_s seconds.
     Keeps Steam traffic extremely low.
+    pool / fetch_details let a long-running worker pass in its warm state.
     """
     # Try to load the candidate pool
-    pool = storage.load_candidate_pool(default={})
+    pool = pool if pool is not None else storage.load_candidate_pool(default={})
 
-    # Self-heal: if missing (fresh runner / previous job failed), run a quick harvest first
-    if not pool:
-        print("[daily] No candidate pool found — running a quick harvest…")
-        run_harvest(
-            min_reviews=80,
-            block_nsfw=True,
-            max_apps_to_check=1500,
-            batch_size=20,
-            wait_s=2.0,
-        )
+    # Self-heal: if missing (fresh runner / previous job failed), run a cold harvest first.
+    # The pool health manager tops the pool up long before that (see app/poolhealth.py).
+    if not steam.pickable_ids(pool):
+        print("[daily] No usable candidate pool found — running a cold harvest…")
+        poolhealth.refill()
         pool = storage.load_candidate_pool(default={})
-        if not pool:
-            raise RuntimeError("No candidate pool found after quick harvest.")
+        if not steam.pickable_ids(pool):
+            raise RuntimeError("No usable candidate pool found after cold harvest.")
+
+    # Avoid repeats, strictest first: never posted before + outside the NO_REPEAT_*
+    # genre/publisher windows (incl. near-duplicates of posts in the genre window),
+    # then just the windows, then only recent picks
+    from app import similarity
+
+    seen = history.load()
+    items = pool.get("items") or []
+    windows = seen.exclusions(items) | similarity.current().near_any(
+        (it["appid"] for it in items),
+        seen.appids_within(config.NO_REPEAT_GENRE_DAYS),
+        config.SIMILAR_REPEAT_MAX,
+    )
+    pickable = steam.pickable_ids(pool)
+    for exclude in (windows | manifest.current().posted_ids(), windows, seen.recent_ids()):
+        if pickable - exclude:
+            break
+
+    # primary + backup pick; both are fetched concurrently, the backup only used on failure
+    appid = steam.pick_from_pool(pool, exclude=exclude, use_weights=True)
+    backup = steam.pick_from_pool(pool, exclude=exclude | {appid}, use_weights=True)
+    backup = None if backup == appid else backup
+
+    appid, payload, post_path = _render_daily(
+        appid, backup, fetch_details or steam.get_appdetails,
+        deadline_s=config.DAILY_DEADLINE_S if deadline_s is None else deadline_s,
+    )
+    seen.add_payload(appid, payload, date=config.now_local().date())
+    history.save(seen)
 
-    # Avoid short-term repeats (keep a small sliding window of recently used ids)
-    seen_path = storage.DATA_DIR / "seen_daily.json"
+    # low/stale pool: a bounded top-up harvest, only once the post is written
+    # (it shares steam's per-minute gate and would eat the render's deadline);
+    # the post is done either way, so a failing top-up is only logged
     try:
-        seen_json = json.loads(seen_path.read_text(encoding="utf-8"))
-        seen = set(seen_json.get("ids", []))
-    except Exception:
-        seen = set()
+        poolhealth.refill_if_due()
+    except Exception as e:
+        print(f"[daily] pool top-up failed: {e}")
+    return post_path
+
+
+
+def _render_many(jobs: list[dict], workers: int) -> int:
+    """Render jobs ({appid, data, now_utc, slug_ts?, post_path?, sections?, header_markup?}) and report throughput."""
+    def _one(job: dict) -> bool:
+        try:
+            _write_post_from_appdetails(
+                job["appid"], job["data"], now_utc=job["now_utc"],
+                slug_ts=job.get("slug_ts"), post_path=job.get("post_path"),
+                sections=job.get("sections"), header_markup=job.get("header_markup"),
+            )
+            return True
+        except Exception as e:
+            print(f"[batch] render failed for {job['appid']}: {e}")
+            return False
+
+    t0 = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            done = sum(ex.map(_one, jobs))
+    else:
+        done = sum(_one(job) for job in jobs)
+    elapsed = time.perf_counter() - t0
+    rate = done / elapsed if elapsed > 0 else float(done)
+    print(f"[batch] rendered {done}/{len(jobs)} posts in {elapsed:.2f}s ({rate:.1f} posts/s, workers={workers})")
+    return done
 
-    # pick an id (use exclude=… now)
-    appid = steam.pick_from_pool(pool, exclude=seen, use_weights=True)
 
-    # fetch details exactly once (retry with one backup pick on failure)
-    data = steam.get_appdetails(appid)
-    if not data:
-        print(f"[daily] first pick failed to fetch details (appid={appid}), trying a backup…")
-        appid2 = steam.pick_from_pool(pool, exclude=seen | {appid}, use_weights=True)
-        data = steam.get_appdetails(appid2)
+def run_backfill(n: int, *, workers: int = 1) -> None:
+    """
+    Fill the last n days (ending yesterday) that have no post yet, in one process:
+    the pool and weights are loaded once, picks are distinct and respect the
+    seen-history, and each post gets its historical date. Like --daily, this
+    fetches details and header images and generates AI sections (network).
+    """
+    pool = storage.load_candidate_pool(default={})
+    if not pool.get("items"):
+        raise RuntimeError("No candidate pool found; run --harvest first.")
+
+    LOCAL_TZ = getattr(storage, "LOCAL_TZ", ZoneInfo("Europe/Berlin"))
+    today = dt.datetime.now(LOCAL_TZ).date()
+    have = {p.name[:10] for p in storage.POST_DIR.glob("*.md")}
+    days = [today - dt.timedelta(days=i) for i in range(n, 0, -1)]
+    days = [d for d in days if d.isoformat() not in have]
+    if not days:
+        print(f"[backfill] every one of the last {n} days already has a post")
+        return
+
+    seen = history.load()
+    exclude = seen.recent_ids()
+    posted = exclude | manifest.current().posted_ids()
+    if len(steam.pickable_ids(pool) - posted) >= len(days):
+        exclude = posted   # enough never-posted games left: prefer those
+    picks = steam.pick_many_from_pool(pool, len(days) * 2, exclude=exclude, use_weights=True)
+    jobs: list[dict] = []
+    for appid in picks:
+        if len(jobs) == len(days):
+            break
+        data = _details_payload(steam.get_appdetails(appid))
         if not data:
-            raise RuntimeError("Could not fetch appdetails for the picked ids.")
-        appid = appid2
+            continue
+        day = days[len(jobs)]
+        when = dt.datetime.combine(day, dt.time(9, 0), tzinfo=LOCAL_TZ).astimezone(dt.timezone.utc)
+        jobs.append({"appid": appid, "data": data, "now_utc": when, "day": day})
+    if len(jobs) < len(days):
+        print(f"[backfill] only {len(jobs)} usable picks for {len(days)} missing days")
 
-    _write_post_from_appdetails(appid, data)
+    _render_many(jobs, workers)
+
+    for job in jobs:
+        seen.add_payload(job["appid"], job["data"], date=job["day"])
+    history.save(seen)
+
+
+def run_rerender(*, workers: int = 1, regenerate_ai: bool = False) -> None:
+    """
+    Re-render every existing post (same file, slug and date) from cached details.
+    Offline by default: the prose sections are taken from the existing post and
+    header images come from the local image index only (else hotlinked).
+    regenerate_ai=True asks the AI backend for fresh sections instead.
+    """
+    LOCAL_TZ = getattr(storage, "LOCAL_TZ", ZoneInfo("Europe/Berlin"))
+    jobs: list[dict] = []
+    skipped = 0
+    for name, entry in sorted(manifest.current().entries.items()):
+        slug, date = entry.get("slug") or "", entry.get("date") or ""
+        if entry.get("appid") is None or not slug.startswith("game-"):
+            skipped += 1
+            continue
+        try:
+            when = dt.datetime.strptime(date[:16], "%Y-%m-%d %H:%M").replace(tzinfo=LOCAL_TZ)
+        except ValueError:
+            skipped += 1
+            continue
+        appid = int(entry["appid"])
+        data = _details_payload(steam.get_appdetails_cached(appid))
+        if not data:
+            skipped += 1
+            continue
+        post_path = storage.POST_DIR / name
+        title = data.get("name", f"App {appid}")
+        jobs.append({
+            "appid": appid, "data": data, "now_utc": when.astimezone(dt.timezone.utc),
+            "slug_ts": slug[len("game-"):], "post_path": post_path,
+            "sections": None if regenerate_ai else _post_sections(post_path.read_text(encoding="utf-8")),
+            "header_markup": _header_markup(appid, title, data.get("header_image") or "", offline=True),
+        })
+    print(f"[rerender] {len(jobs)} posts to render, {skipped} skipped (not auto posts / no details)")
+    _render_many(jobs, workers)
+
+
+def run_rebuild_outcomes(*, min_reviews: int) -> None:
+    """Rebuild the known-outcome sets from the on-disk caches (no network)."""
+    known = outcomes.rebuild_from_caches(min_reviews=min_reviews)
+    outcomes.save(known)
+    counts = " ".join(f"{k}={v}" for k, v in known.counts().items())
+    print(f"[outcomes] rebuilt from caches | {counts} -> {outcomes.cfg.OUTCOMES_PATH}")
+
+
+def run_rescore(*, min_reviews: int, block_nsfw: bool, workers: int | None = None) -> None:
+    """Re-apply the current filters to every cached record; rebuild pool + outcomes (no network)."""
+    from app import rescore
+
+    result = rescore.rescore_caches(min_reviews=min_reviews, block_nsfw=block_nsfw, workers=workers)
+    stats = result["stats"]
+    if not stats["records"]:
+        # nothing cached (fresh checkout, wrong HGG_CACHE_DIR): keep pool + outcomes as they are
+        print(f"[rescore] no cached appdetails under {steam.APPSTATS_DIR}; pool and outcomes left untouched")
+        return
+    storage.save_candidate_pool(result["pool"], stats={"rescore": stats})
+    outcomes.save(result["outcomes"])
+    print(
+        f"[rescore] done | records={stats['records']} workers={stats['workers']} in {stats['seconds']}s "
+        f"pool={stats['size']} (scored={stats['scored']} gated={stats['gated']}) accepted={stats.get('n_accepted', 0)} below={stats.get('n_below', 0)} "
+        f"rejected={stats.get('n_rejected', 0)} nsfw={stats.get('n_nsfw', 0)} "
+        f"failed={stats.get('n_failed', 0)} unknown={stats.get('n_unknown', 0)} carried={stats['carried']}"
+    )
 
-    # update short-term seen window (retain only the most recent 50)
-    try:
-        recent = list(seen)
-        recent.append(appid)
-        recent = recent[-50:]
-        seen_path.write_text(json.dumps({"ids": recent}, indent=2), encoding="utf-8")
-    except Exception:
-        pass
 
+def run_refill(*, min_reviews: int, dry_run: bool = False) -> None:
+    """Pool health check; one bounded top-up harvest when the pool is low or stale."""
+    poolhealth.refill(min_reviews=min_reviews, dry_run=dry_run)
 
 
+def run_merge_shards(roots: list[str]) -> None:
+    """Merge shard harvests (local CACHE_DIR or downloaded cache roots) into the shared state."""
+    report = shards.merge([Path(r) for r in roots] or None)
+    if not report["shards"]:
+        print("[shards] nothing to merge")
+        return
+    print(
+        f"[shards] merged {report['shards']} shards | records={report['records']} "
+        f"cache records imported={report['imported']} requests={report['requests']} "
+        f"added={report['added']} refreshed={report['refreshed']} pool size={report['size']}"
+    )
+    _update_similarity()
+
+
+def run_similar(appid: int, *, k: int = 10) -> None:
+    """Sync the similarity index, then print the games closest to appid."""
+    from app import similarity
+
+    _update_similarity()
+    index = similarity.current()
+    if appid not in index:
+        print(f"[similar] {appid} is not indexed (no cached appdetails, or filtered out)")
+        return
+    t0 = time.perf_counter()
+    hits = index.neighbours(appid, k)
+    ms = (time.perf_counter() - t0) * 1000
+
+    def name(a: int) -> str:
+        return (_details_payload(steam.get_appdetails_cached(a)) or {}).get("name", f"App {a}")
+
+    print(f"[similar] {appid} {name(appid)!r} — top {len(hits)} of {len(index)} in {ms:.2f}ms")
+    for other, score in hits:
+        print(f"  {score:.3f}  {other:>8}  {name(other)}")
+
+
+def run_search_index(output: str) -> None:
+    """Write the static search index for the built site into <output>/search."""
+    r = search.write_index(Path(output))
+    print(
+        f"[search] docs={r['docs']} terms={r['terms']} files={r['files']} written={r['written']} "
+        f"removed={r['removed']} size={r['bytes'] / 1e3:.1f}KB in {r['ms']:.0f}ms -> {output}/search"
+    )
+
+
+def run_cache_maintenance(*, dry_run: bool = False) -> None:
+    """Evict (TTL + LRU size cap) and compact every cache."""
+    report = cache.maintain(dry_run=dry_run)
+    print(f"[cache] dir={cache.cfg.CACHE_DIR}" + (" (dry run)" if dry_run else ""))
+    for name in cache.CACHE_DIRS:
+        r = report[name]
+        print(
+            f"[cache] {name}: files={r['files']} size={r['bytes'] / 1e6:.1f}MB expired={r['expired']} "
+            f"evicted={r['evicted']} tmp={r['tmp']} compacted={r['rewritten']} "
+            f"freed={(r['freed'] + r['saved']) / 1e6:.1f}MB"
+        )
+
+
+def run_cache_compress() -> None:
+    """Train the zstd dictionary (when available) and re-encode every cache record."""
+    kind = cache.codec()
+    dict_id = cache.train_dictionary("appstats") if kind == "zstd" else None
+    print(f"[cache] codec={kind}" + (f" dictionary={dict_id}" if dict_id else ""))
+    for name in cache.CACHE_DIRS:
+        r = cache.compress_all(name, kind=kind)
+        ratio = (r["before"] / r["after"]) if r["after"] else 1.0
+        print(
+            f"[cache] {name}: converted={r['converted']} {r['before'] / 1e6:.2f}MB -> "
+            f"{r['after'] / 1e6:.2f}MB ({ratio:.1f}x)"
+        )
+
 
 # -----------------------------
 # CLI
@@ -233,8 +711,74 @@ def main(argv: list[str] | None = None) -> None:
         description="Hidden Gem Games – harvest candidate pool and generate daily post.",
     )
     g = parser.add_mutually_exclusive_group(required=True)
-    g.add_argument("--harvest", action="store_true", help="Refresh the weekly candidate pool.")
+    g.add_argument("--harvest", action="store_true", help="Harvest and merge into the candidate pool.")
     g.add_argument("--daily", action="store_true", help="Generate today’s post from cached pool.")
+    g.add_argument(
+        "--backfill",
+        type=int,
+        metavar="N",
+        help="Render posts for the last N days that have none, in one process.",
+    )
+    g.add_argument(
+        "--rerender",
+        action="store_true",
+        help="Re-render all existing auto posts (same slug/date) from cached details, offline: "
+        "existing prose and indexed images are reused (see --regenerate-ai).",
+    )
+    g.add_argument(
+        "--worker",
+        action="store_true",
+        help="Run a long-lived JSON-RPC worker (stdin/stdout, or --socket) with warm caches.",
+    )
+    g.add_argument(
+        "--refill",
+        action="store_true",
+        help="Check pool health; run one bounded top-up harvest (HARVEST_MAX_PROBE) when low or stale.",
+    )
+    g.add_argument(
+        "--merge-shards",
+        nargs="*",
+        metavar="ROOT",
+        help="Merge sharded harvests found under these cache roots or shard-dir folders (default: the local cache dir).",
+    )
+    g.add_argument(
+        "--similar",
+        type=int,
+        metavar="APPID",
+        help="Update the similarity index and list the cached games most like APPID.",
+    )
+    g.add_argument(
+        "--rescore",
+        action="store_true",
+        help="Re-apply the current filters to all cached data; rebuild the pool and outcomes offline.",
+    )
+    g.add_argument(
+        "--rebuild-outcomes",
+        action="store_true",
+        help="Rebuild the known-outcome sets (accepted/rejected/failed) from the caches.",
+    )
+    g.add_argument(
+        "--search-index",
+        nargs="?",
+        const="output",
+        metavar="OUTPUT",
+        help="Write the static search index into OUTPUT/search (default: output) after a site build.",
+    )
+    g.add_argument(
+        "--cache-gc",
+        action="store_true",
+        help="Cache maintenance: TTL/LRU eviction, size caps, compaction.",
+    )
+    g.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Report where the time goes when importing the CLI (-X importtime, slowest first).",
+    )
+    g.add_argument(
+        "--cache-compress",
+        action="store_true",
+        help="Convert cache records to compressed form (zstd + trained dictionary, or gzip).",
+    )
 
     parser.add_argument("--min-reviews", type=int, default=80, help="Minimum reviews to consider.")
     parser.add_argument(
@@ -255,6 +799,41 @@ def main(argv: list[str] | None = None) -> None:
         default=2.0,
         help="Seconds to wait between batches (helps avoid 429s).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="With --backfill/--rerender: parallel render threads (default 1). "
+        "With --rescore: processes (default: all cores).",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help=f"With --daily: overall time budget in seconds (default {config.DAILY_DEADLINE_S:.0f}).",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        type=shards.parse_shard,
+        help="With --harvest: only probe shard I of N (0-based, by appid hash).",
+    )
+    parser.add_argument(
+        "--socket", metavar="PATH", help="With --worker: serve on this Unix socket instead of stdin."
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="With --cache-gc / --refill: report only, change nothing."
+    )
+    parser.add_argument(
+        "--regenerate-ai",
+        action="store_true",
+        help="With --rerender: ask the AI backend for fresh sections instead of keeping the existing prose.",
+    )
+    parser.add_argument(
+        "--uniform",
+        action="store_true",
+        help="Sample the applist uniformly instead of the adaptive, yield-driven sampler.",
+    )
 
     args = parser.parse_args(argv)
 
@@ -265,12 +844,50 @@ def main(argv: list[str] | None = None) -> None:
             max_apps_to_check=args.max_apps,
             batch_size=args.batch_size,
             wait_s=args.wait_s,
+            adaptive=not args.uniform,
+            shard=args.shard,
         )
     elif args.daily:
-        run_daily()
+        run_daily(deadline_s=args.deadline)
+    elif args.backfill is not None:
+        run_backfill(args.backfill, workers=args.workers or 1)
+    elif args.rerender:
+        run_rerender(workers=args.workers or 1, regenerate_ai=args.regenerate_ai)
+    elif args.worker:
+        from app import worker
+
+        worker.run_worker(args.socket)
+    elif args.refill:
+        run_refill(min_reviews=args.min_reviews, dry_run=args.dry_run)
+    elif args.merge_shards is not None:
+        run_merge_shards(args.merge_shards)
+    elif args.similar is not None:
+        run_similar(args.similar)
+    elif args.rescore:
+        run_rescore(min_reviews=args.min_reviews, block_nsfw=not args.allow_nsfw, workers=args.workers)
+    elif args.rebuild_outcomes:
+        run_rebuild_outcomes(min_reviews=args.min_reviews)
+    elif args.search_index is not None:
+        run_search_index(args.search_index)
+    elif args.cache_gc:
+        run_cache_maintenance(dry_run=args.dry_run)
+    elif args.cache_compress:
+        run_cache_compress()
+    elif args.startup_profile:
+        from app import startup
+
+        startup.report()
     else:
         parser.error("Choose either --harvest or --daily")
 
+    memo = cache.MEMO.stats()
+    if memo["hits"] or memo["misses"]:
+        print(
+            f"[cache] memo hits={memo['hits']} misses={memo['misses']} (hit rate {memo['hit_rate']:.0%}) "
+            f"evictions={memo['evictions']} invalidations={memo['invalidations']} "
+            f"held={memo['entries']} records / {memo['bytes'] / 1e6:.1f} MB"
+        )
+
 
 if __name__ == "__main__":
     try:
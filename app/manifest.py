@@ -0,0 +1,139 @@
+# app/manifest.py
+"""
+Incremental manifest of the published posts.
+
+Parses each Markdown file in content/posts once (front matter + the
+"Steam AppID" and "Genres" lines) and keeps the result in the cache dir,
+keyed by file name with (mtime, size) and a content hash:
+
+- unchanged (mtime, size)      -> reused without opening the file
+- touched but same content     -> only the stat is refreshed
+- new / edited                 -> re-parsed
+- gone                         -> dropped
+
+The in-memory index maps appid -> its posts ({"slug", "date", "title", "genre_names", "file"},
+oldest first), so "was this ever posted?" and "when?" are dict lookups.
+
+genre_names are the display names printed in the post ("Action, Indie"), not
+Steam genre ids: the seen-history (app/history.py) and the pool store ids from
+appdetails, and the two are not interchangeable. Use the history for genre
+windows; the names are for display and search only.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import config as cfg
+from .storage import load_json, save_json
+
+MANIFEST_VERSION = 2               # 2: genres -> genre_names
+
+_APPID = re.compile(r"Steam AppID:\s*`?(\d+)`?")
+_GENRES = re.compile(r"^- Genres:\s*\*\*(.*?)\*\*", re.M)
+
+
+def parse_post(text: str) -> Dict[str, Any]:
+    """Front-matter fields + appid/genre display names of one post (appid None when it has none)."""
+    meta: Dict[str, str] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            break
+        key, sep, value = line.partition(":")
+        if sep:
+            meta[key.strip().lower()] = value.strip()
+    m_id = _APPID.search(text)
+    m_genres = _GENRES.search(text)
+    genres = [g.strip() for g in m_genres.group(1).split(",")] if m_genres else []
+    return {
+        "appid": int(m_id.group(1)) if m_id else None,
+        "slug": meta.get("slug"),
+        "date": meta.get("date"),
+        "title": meta.get("title"),
+        "genre_names": [g for g in genres if g and g != "—"],
+    }
+
+
+class PostManifest:
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.by_appid: Dict[int, List[Dict[str, Any]]] = {}
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self.by_appid = {}
+        for name in sorted(self.entries):
+            e = self.entries[name]
+            if e.get("appid") is not None:
+                post = {
+                    "slug": e.get("slug"), "date": e.get("date"), "title": e.get("title"),
+                    "genre_names": e.get("genre_names") or [], "file": name,
+                }
+                self.by_appid.setdefault(int(e["appid"]), []).append(post)
+        for posts in self.by_appid.values():
+            posts.sort(key=lambda p: p.get("date") or "")
+
+    def update(self, post_dir: Path | None = None) -> Dict[str, int]:
+        """Sync with the posts on disk. Returns {"files", "parsed", "touched", "removed"}."""
+        post_dir = post_dir or cfg.POST_DIR
+        parsed = touched = 0
+        present = set()
+        for path in post_dir.glob("*.md"):
+            name = path.name
+            present.add(name)
+            st = path.stat()
+            entry = self.entries.get(name)
+            if entry and entry.get("mtime") == st.st_mtime and entry.get("size") == st.st_size:
+                continue
+            raw = path.read_bytes()
+            digest = hashlib.sha1(raw).hexdigest()
+            if entry and entry.get("sha1") == digest:
+                entry.update(mtime=st.st_mtime, size=st.st_size)
+                touched += 1
+                continue
+            self.entries[name] = {
+                "mtime": st.st_mtime, "size": st.st_size, "sha1": digest,
+                **parse_post(raw.decode("utf-8", errors="replace")),
+            }
+            parsed += 1
+        removed = [name for name in self.entries if name not in present]
+        for name in removed:
+            del self.entries[name]
+        if parsed or removed:
+            self._reindex()
+        return {"files": len(present), "parsed": parsed, "touched": touched, "removed": len(removed)}
+
+    # ----- queries
+    def was_posted(self, appid: int) -> bool:
+        return int(appid) in self.by_appid
+
+    def posts_for(self, appid: int) -> List[Dict[str, Any]]:
+        return self.by_appid.get(int(appid), [])
+
+    def posted_ids(self) -> set[int]:
+        return set(self.by_appid)
+
+    def to_dict(self) -> dict:
+        return {"version": MANIFEST_VERSION, "posts": self.entries}
+
+
+def load(path: Path | None = None) -> PostManifest:
+    data = load_json(path or cfg.POST_MANIFEST_PATH, default={}) or {}
+    if data.get("version") != MANIFEST_VERSION:
+        return PostManifest()
+    return PostManifest(data.get("posts") or {})
+
+
+def save(manifest: PostManifest, path: Path | None = None) -> None:
+    save_json(path or cfg.POST_MANIFEST_PATH, manifest.to_dict())
+
+
+def current() -> PostManifest:
+    """Load, sync with content/posts and persist when anything changed."""
+    m = load()
+    stats = m.update()
+    if stats["parsed"] or stats["touched"] or stats["removed"]:
+        save(m)
+    return m
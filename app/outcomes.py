@@ -0,0 +1,290 @@
+# app/outcomes.py
+"""
+Compact record of harvest outcomes shared across runs.
+
+Every appid a harvest has already judged lands in one of these sets:
+- accepted   passed every filter and the review threshold (exact id set)
+- rejected   not a viable game (tools, videos, soundtracks, ...)
+- nsfw       viable, but flagged by the NSFW filter (skipped only when blocking)
+- below      viable, but under the review threshold used at the time
+- failed     Steam answered appdetails with success=false (delisted, region-locked)
+
+The large negative sets are Bloom filters sized for the whole Steam catalogue
+(a few hundred KB in total); the small accepted set is stored exactly so a false
+positive can never smuggle an unchecked app into the pool. Lookups are constant
+time and touch no files, so the sampler can skip known apps before any I/O.
+
+The file is versioned; filters whose version does not match are dropped and can
+be rebuilt from the on-disk caches with `rebuild_from_caches()`. It also records
+the fingerprint of the filter rules (app/rules.py): after a rules change the
+rule-dependent sets (accepted, rejected, nsfw) are dropped, failed/below stay.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+import zlib
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from . import config as cfg
+from . import rules
+from .storage import load_json, save_json
+
+FORMAT_VERSION = 1
+FILTER_VERSION = 1
+
+BLOOM_OUTCOMES = ("rejected", "nsfw", "below", "failed")
+RULE_OUTCOMES = ("accepted", "rejected", "nsfw")   # only valid under the rules that produced them
+OUTCOMES = ("accepted",) + BLOOM_OUTCOMES
+
+
+# -----------------
+# Bloom filter
+# -----------------
+class BloomFilter:
+    """Fixed-size Bloom filter over integer appids (double hashing on blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float, *, m: int | None = None, k: int | None = None):
+        self.capacity = int(capacity)
+        self.error_rate = float(error_rate)
+        if m is None:
+            m = int(math.ceil(-self.capacity * math.log(self.error_rate) / (math.log(2) ** 2)))
+        if k is None:
+            k = max(1, int(round((m / self.capacity) * math.log(2))))
+        self.m = int(m)
+        self.k = int(k)
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+        self.version = FILTER_VERSION
+
+    def _positions(self, appid: int):
+        digest = hashlib.blake2b(int(appid).to_bytes(8, "little", signed=False), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def add(self, appid: int) -> None:
+        new = False
+        for pos in self._positions(appid):
+            byte, bit = divmod(pos, 8)
+            mask = 1 << bit
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+
+    def __contains__(self, appid: int) -> bool:
+        bits = self.bits
+        for pos in self._positions(appid):
+            byte, bit = divmod(pos, 8)
+            if not bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def union(self, other: "BloomFilter") -> None:
+        """OR another filter of the same geometry into this one."""
+        if (other.m, other.k) != (self.m, self.k):
+            raise ValueError("Bloom filter geometry mismatch")
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(other.bits, "little")
+        self.bits = bytearray(merged.to_bytes(len(self.bits), "little"))
+        # item count is no longer exact; estimate it from the fill ratio
+        ones = merged.bit_count()
+        if ones < self.m:
+            self.count = int(round(-self.m / self.k * math.log(1.0 - ones / self.m)))
+        else:
+            self.count = max(self.count, other.count)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "m": self.m,
+            "k": self.k,
+            "count": self.count,
+            "bits": base64.b64encode(zlib.compress(bytes(self.bits), 9)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BloomFilter":
+        bf = cls(int(data["capacity"]), float(data["error_rate"]), m=int(data["m"]), k=int(data["k"]))
+        bits = zlib.decompress(base64.b64decode(data["bits"]))
+        if len(bits) != len(bf.bits):
+            raise ValueError("Bloom filter size mismatch")
+        bf.bits = bytearray(bits)
+        bf.count = int(data.get("count", 0))
+        bf.version = int(data.get("version", 0))
+        return bf
+
+
+def _encode_ids(ids: Iterable[int]) -> str:
+    """Sorted, delta-encoded, zlib-compressed id list (base64)."""
+    prev = 0
+    deltas = array("I")
+    for aid in sorted(set(int(x) for x in ids)):
+        deltas.append(aid - prev)
+        prev = aid
+    return base64.b64encode(zlib.compress(deltas.tobytes(), 9)).decode("ascii")
+
+
+def _decode_ids(blob: str) -> set[int]:
+    deltas = array("I")
+    deltas.frombytes(zlib.decompress(base64.b64decode(blob)))
+    out, acc = set(), 0
+    for d in deltas:
+        acc += d
+        out.add(acc)
+    return out
+
+
+# -----------------
+# Outcome set
+# -----------------
+class KnownOutcomes:
+    """All harvest outcomes, plus the review thresholds they were recorded under."""
+
+    def __init__(self):
+        self.accepted: set[int] = set()
+        self.filters: Dict[str, BloomFilter] = {
+            name: BloomFilter(cfg.OUTCOME_CAPACITY[name], cfg.OUTCOME_ERROR_RATE) for name in BLOOM_OUTCOMES
+        }
+        # accepted ids are valid for runs at or below this threshold,
+        # below-threshold ids for runs at or above this one
+        self.accepted_min_reviews: Optional[int] = None
+        self.below_min_reviews: Optional[int] = None
+        self.dirty = False
+
+    # ----- recording
+    def record(self, appid: int, outcome: str, *, min_reviews: int | None = None) -> None:
+        appid = int(appid)
+        if outcome == "accepted":
+            self.accepted.add(appid)
+            if min_reviews is not None:
+                cur = self.accepted_min_reviews
+                self.accepted_min_reviews = min_reviews if cur is None else min(cur, min_reviews)
+        elif outcome in self.filters:
+            self.filters[outcome].add(appid)
+            if outcome == "below" and min_reviews is not None:
+                cur = self.below_min_reviews
+                self.below_min_reviews = min_reviews if cur is None else max(cur, min_reviews)
+        else:
+            raise ValueError(f"Unknown outcome: {outcome!r}")
+        self.dirty = True
+
+    # ----- lookup
+    def classify(self, appid: int, *, min_reviews: int, block_nsfw: bool = True) -> Optional[str]:
+        """
+        Return the known outcome that still applies under the given harvest settings,
+        or None when the app has to be checked for real.
+        """
+        appid = int(appid)
+        if appid in self.filters["failed"]:
+            return "failed"
+        if appid in self.filters["rejected"]:
+            return "rejected"
+        if block_nsfw and appid in self.filters["nsfw"]:
+            return "nsfw"
+        if appid in self.accepted and (
+            self.accepted_min_reviews is None or min_reviews <= self.accepted_min_reviews
+        ):
+            return "accepted"
+        if appid in self.filters["below"] and (
+            self.below_min_reviews is not None and min_reviews >= self.below_min_reviews
+        ):
+            return "below"
+        return None
+
+    def merge(self, other: "KnownOutcomes") -> None:
+        """Union another outcome set into this one (shard merge); thresholds stay conservative."""
+        self.accepted |= other.accepted
+        for name, bf in other.filters.items():
+            self.filters[name].union(bf)
+        if other.accepted_min_reviews is not None:
+            cur = self.accepted_min_reviews
+            self.accepted_min_reviews = other.accepted_min_reviews if cur is None else min(cur, other.accepted_min_reviews)
+        if other.below_min_reviews is not None:
+            cur = self.below_min_reviews
+            self.below_min_reviews = other.below_min_reviews if cur is None else max(cur, other.below_min_reviews)
+        self.dirty = True
+
+    def counts(self) -> Dict[str, int]:
+        out = {"accepted": len(self.accepted)}
+        out.update({name: bf.count for name, bf in self.filters.items()})
+        return out
+
+    # ----- persistence
+    def to_dict(self) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "updated": datetime.now(timezone.utc).isoformat(),
+            "accepted_min_reviews": self.accepted_min_reviews,
+            "below_min_reviews": self.below_min_reviews,
+            "rules": rules.fingerprint(),
+            "accepted": {"version": FILTER_VERSION, "ids": _encode_ids(self.accepted)},
+            "filters": {name: bf.to_dict() for name, bf in self.filters.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KnownOutcomes":
+        ko = cls()
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            return ko
+        same_rules = data.get("rules") == rules.fingerprint()
+        ko.accepted_min_reviews = data.get("accepted_min_reviews") if same_rules else None
+        ko.below_min_reviews = data.get("below_min_reviews")
+        acc = data.get("accepted") or {}
+        if same_rules and acc.get("version") == FILTER_VERSION and acc.get("ids"):
+            try:
+                ko.accepted = _decode_ids(acc["ids"])
+            except Exception:
+                ko.accepted = set()
+        for name, raw in (data.get("filters") or {}).items():
+            if name not in ko.filters or (name in RULE_OUTCOMES and not same_rules):
+                continue
+            try:
+                bf = BloomFilter.from_dict(raw)
+            except Exception:
+                continue
+            if bf.version == FILTER_VERSION:
+                ko.filters[name] = bf
+        return ko
+
+
+def load(path: Path | None = None) -> KnownOutcomes:
+    return KnownOutcomes.from_dict(load_json(path or cfg.OUTCOMES_PATH, default={}))
+
+
+def save(ko: KnownOutcomes, path: Path | None = None) -> None:
+    save_json(path or cfg.OUTCOMES_PATH, ko.to_dict())
+    ko.dirty = False
+
+
+# -----------------
+# Rebuild from caches
+# -----------------
+def rebuild_from_caches(*, min_reviews: int) -> KnownOutcomes:
+    """
+    Reconstruct the outcome sets from cached appdetails + review summaries.
+    Never touches the network: apps without a cached summary are left unknown.
+    NSFW apps are always recorded; whether they are skipped is decided per run.
+    """
+    from . import cache, steam  # local import: steam imports this module
+    from .rescore import evaluate
+
+    ko = KnownOutcomes()
+    for key, path in sorted(cache.iter_records(steam.APPSTATS_DIR)):
+        try:
+            appid = int(key)
+        except ValueError:
+            continue
+        summary = steam._read_json(steam._reviewsum_path(appid))
+        outcome, _ = evaluate(appid, steam._read_json(path), summary, min_reviews=min_reviews)
+        if outcome:
+            ko.record(appid, outcome, min_reviews=min_reviews)
+    return ko
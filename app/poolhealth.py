@@ -0,0 +1,182 @@
+# app/poolhealth.py
+"""
+Candidate-pool health: keep the pool above a low watermark so a daily run never
+starts from an empty pool (and never pays for a cold harvest).
+
+assess() looks at the committed pool and its metadata:
+
+- usable    scored records that passed the gates (score > 0)
+- runway    usable records never posted before = days of fresh picks left
+- age       seconds since the last harvest merged into the pool
+
+and sets status to "empty" (nothing the daily could pick, steam.pickable_ids),
+"low" (usable < POOL_MIN_SIZE, incl. a pool of cold-start fallbacks only), "stale"
+(age > POOL_TTL_SECS) or "ok". refill() then runs ONE bounded top-up harvest of
+HARVEST_MAX_PROBE probes when the status is not ok (or HARVEST_FORCE=1), so
+a shrinking pool is topped up a little every day instead of all at once. Only an
+empty pool gets the larger COLD_HARVEST_PROBE budget.
+
+Every assessment and top-up is appended to config.POOL_HEALTH_PATH (last
+HISTORY_SIZE entries); the observed accepted-per-probe yield there estimates
+how many top-ups the current deficit needs.
+"""
+from __future__ import annotations
+
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from . import config as cfg
+from . import storage
+
+HISTORY_SIZE = 120
+COLD_HARVEST_PROBE = 1500      # only when there is nothing to post at all
+DEFAULT_YIELD = 0.02           # accepted per probe until the history says otherwise
+TOPUP_COOLDOWN_SECS = 12 * 3600  # post-daily top-ups skip when one ran this recently
+
+
+def _age_secs(meta: dict, now: float) -> Optional[float]:
+    stamp = (meta or {}).get("last_refreshed")
+    if not stamp:
+        return None
+    try:
+        return now - datetime.fromisoformat(stamp).timestamp()
+    except ValueError:
+        return None
+
+
+def _history() -> List[Dict[str, Any]]:
+    return (storage.load_json(cfg.POOL_HEALTH_PATH, default={}) or {}).get("history") or []
+
+
+def _yield_per_probe(history: List[Dict[str, Any]]) -> float:
+    done = [h for h in history if "added" in h]     # completed top-ups only
+    probed = sum(h.get("probed") or 0 for h in done)
+    added = sum(h.get("added") or 0 for h in done)
+    return added / probed if probed >= 100 and added else DEFAULT_YIELD
+
+
+def assess(pool: Optional[dict] = None, meta: Optional[dict] = None, *, now: Optional[float] = None) -> Dict[str, Any]:
+    """Health snapshot of the pool (see module docstring)."""
+    from . import manifest, steam
+
+    now = float(now if now is not None else time.time())
+    pool = pool if pool is not None else storage.load_candidate_pool(default={}) or {}
+    meta = meta if meta is not None else storage.load_json(storage.POOL_META_PATH, default={}) or {}
+    items = pool.get("items") or []
+    # unscored records (score None: bare known-accepted ids) never went through the
+    # gates and are never picked (steam.pickable_ids), so they do not count
+    usable = [it for it in items if it.get("passed") is not False and (it.get("score") or 0) > 0]
+    posted = manifest.current().posted_ids()
+    runway = sum(1 for it in usable if int(it["appid"]) not in posted)
+    age = _age_secs(meta, now)
+
+    if not usable and not steam.pickable_ids(pool):
+        status = "empty"
+    elif len(usable) < cfg.POOL_MIN_SIZE:
+        status = "low"
+    elif age is None or age > cfg.POOL_TTL_SECS:
+        status = "stale"
+    else:
+        status = "ok"
+
+    deficit = max(0, cfg.POOL_MIN_SIZE - len(usable))
+    per_probe = _yield_per_probe(_history())
+    return {
+        "at": datetime.fromtimestamp(now, timezone.utc).isoformat(timespec="seconds"),
+        "size": len(items),
+        "usable": len(usable),
+        "runway": runway,
+        "age_days": None if age is None else round(age / 86400, 1),
+        "status": status,
+        "min_size": cfg.POOL_MIN_SIZE,
+        "deficit": deficit,
+        "yield_per_probe": round(per_probe, 4),
+        "topups_needed": math.ceil(deficit / (per_probe * cfg.HARVEST_MAX_PROBE)) if deficit else 0,
+    }
+
+
+def needs_refill(health: Dict[str, Any]) -> bool:
+    return cfg.HARVEST_FORCE or health["status"] != "ok"
+
+
+def record(entry: Dict[str, Any]) -> None:
+    history = (_history() + [entry])[-HISTORY_SIZE:]
+    storage.save_json(cfg.POOL_HEALTH_PATH, {"history": history})
+
+
+def refill(*, min_reviews: int = 80, dry_run: bool = False, health: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Assess the pool and, when it is empty/low/stale (or HARVEST_FORCE=1), run one
+    bounded top-up harvest. Returns the health entry that was recorded.
+    """
+    from .main import run_harvest
+
+    health = dict(health or assess())
+    probes = 0
+    if needs_refill(health):
+        probes = COLD_HARVEST_PROBE if health["status"] == "empty" else cfg.HARVEST_MAX_PROBE
+    health["probed"] = probes
+    print(
+        f"[pool] status={health['status']} usable={health['usable']}/{health['min_size']} "
+        f"runway={health['runway']}d age={health['age_days']}d"
+        + (f" -> top-up of {probes} probes" if probes else " -> no top-up needed")
+        + (f" (~{health['topups_needed']} top-ups to the watermark)" if health["topups_needed"] > 1 else "")
+        + (" (dry run)" if dry_run and probes else "")
+    )
+    if not probes or dry_run:
+        if not dry_run:
+            record(health)
+        return health
+
+    t0 = time.perf_counter()
+    try:
+        stats = run_harvest(
+            min_reviews=min_reviews,
+            block_nsfw=True,
+            max_apps_to_check=probes,
+            batch_size=20,
+            wait_s=2.0,
+        ) or {}
+    except Exception as e:  # a failed top-up must not take the daily post down with it
+        health.update(error=str(e), seconds=round(time.perf_counter() - t0, 1))
+        record(health)
+        print(f"[pool] top-up failed: {e}")
+        return health
+    after = assess()
+    health.update(
+        added=stats.get("added", 0),
+        seconds=round(time.perf_counter() - t0, 1),
+        usable_after=after["usable"],
+        status_after=after["status"],
+    )
+    record(health)
+    print(f"[pool] top-up added={health['added']} usable={after['usable']} status={after['status']}")
+    return health
+
+
+def _last_topup_age(now: float) -> Optional[float]:
+    for h in reversed(_history()):
+        if h.get("probed"):
+            try:
+                return now - datetime.fromisoformat(h["at"]).timestamp()
+            except (KeyError, ValueError):
+                return None
+    return None
+
+
+def refill_if_due(*, min_reviews: int = 80) -> Optional[Dict[str, Any]]:
+    """
+    refill() when the pool needs it and no top-up ran within TOPUP_COOLDOWN_SECS
+    (e.g. a --refill step earlier in the same job). Called by --daily after the
+    post is written, so the harvest never competes with the render for steam's
+    rate gate. Returns the recorded health entry, or None when skipped.
+    """
+    health = assess()
+    if not needs_refill(health) or health["status"] == "empty":
+        return None
+    age = _last_topup_age(time.time())
+    if age is not None and age < TOPUP_COOLDOWN_SECS:
+        return None
+    return refill(min_reviews=min_reviews, health=health)
@@ -0,0 +1,160 @@
+# app/rescore.py
+"""
+Offline re-scoring of the whole cached catalogue.
+
+After a change to the filters (_is_viable_game, _is_nsfw) or the review threshold,
+this re-evaluates every cached appdetails record (plus its cached review summary)
+and rebuilds the candidate pool (re-scored, see scoring.py) and the known-outcome
+sets from scratch, without a single network request. Work is split into chunks of cache paths and spread
+over a process pool; the parent only merges results and reports progress.
+
+Apps without a cached review summary cannot be judged against the threshold and
+stay unknown, exactly as in outcomes.rebuild_from_caches(). The review cache
+expires sooner than the pool's staleness window (60 vs 90 days), so pool entries
+of such apps (and of apps whose appdetails expired too) are carried over as they
+are; only a definite verdict from the current filters removes an entry.
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+CHUNK = 256   # cache records per task
+
+
+def evaluate(
+    appid: int,
+    details: Optional[dict],
+    summary: Optional[dict],
+    *,
+    min_reviews: int,
+    block_nsfw: bool = True,
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Judge one cached app with the current filters.
+    Returns (outcome, candidate record); outcome is None when it cannot be decided
+    offline. NSFW apps are always reported as "nsfw" but still get a record when
+    not blocking. The record is set for every eligible app with a summary
+    (passed=False below the threshold, usable as a cold-start fallback).
+    """
+    from . import steam  # local import: outcomes.rebuild_from_caches uses this
+
+    if details is None:
+        return None, None
+    ok, payload = steam._unwrap_details(details)
+    if not ok:
+        return ("failed" if steam._is_failed_details(details) else None), None
+    if not steam._is_viable_game(payload):
+        return "rejected", None
+    nsfw = steam._is_nsfw(payload)
+    if nsfw and block_nsfw:
+        return "nsfw", None
+    if summary is None:
+        return ("nsfw" if nsfw else None), None
+    passed = steam._total_reviews(summary) >= min_reviews
+    record = steam._candidate_record(appid, payload, summary, passed=passed)
+    return ("nsfw" if nsfw else "accepted" if passed else "below"), record
+
+
+def _score_chunk(paths: List[Tuple[int, str]], min_reviews: int, block_nsfw: bool) -> List[tuple]:
+    """
+    Worker: evaluate a chunk of (appid, appdetails path); cache reads only.
+    Returns (appid, outcome, record, undecided) tuples; undecided = no verdict
+    (mostly no cached review summary), so an existing pool entry stays.
+    """
+    from . import steam
+
+    out = []
+    for appid, path in paths:
+        details = steam._read_json(Path(path))
+        summary = steam._read_json(steam._reviewsum_path(appid))
+        outcome, record = evaluate(appid, details, summary, min_reviews=min_reviews, block_nsfw=block_nsfw)
+        if record is not None:
+            # last_verified = when the data was fetched, not when it was rescored
+            try:
+                record["last_verified"] = int(Path(path).stat().st_mtime)
+            except OSError:
+                pass
+        undecided = record is None and (
+            outcome is None or (outcome == "nsfw" and not block_nsfw and summary is None)
+        )
+        out.append((appid, outcome, record, undecided))
+    return out
+
+
+def rescore_caches(
+    *, min_reviews: int, block_nsfw: bool = True, workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Rebuild the outcome sets and the candidate pool from the on-disk caches.
+    Returns {"outcomes": KnownOutcomes, "pool": {...}, "stats": {...}}; saving is
+    left to the caller.
+    """
+    from . import cache, outcomes, scoring, steam, storage
+
+    jobs: List[Tuple[int, str]] = []
+    for key, path in cache.iter_records(steam.APPSTATS_DIR):
+        try:
+            jobs.append((int(key), str(path)))
+        except ValueError:
+            continue
+    jobs.sort()
+    chunks = [jobs[i:i + CHUNK] for i in range(0, len(jobs), CHUNK)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks) or 1))
+
+    # first_seen survives a rescore; everything else comes from the caches
+    previous = {it["appid"]: it for it in (storage.load_candidate_pool(default={}) or {}).get("items") or []}
+    decided: set = set()
+
+    known = outcomes.KnownOutcomes()
+    records: List[Dict[str, Any]] = []
+    counts: Dict[str, int] = {}
+    t0 = time.perf_counter()
+    done = 0
+
+    def _collect(results: List[tuple]) -> None:
+        nonlocal done
+        for appid, outcome, record, undecided in results:
+            counts[outcome or "unknown"] = counts.get(outcome or "unknown", 0) + 1
+            if not undecided:
+                decided.add(appid)
+            if outcome:
+                known.record(appid, outcome, min_reviews=min_reviews)
+            if record is not None:
+                record["first_seen"] = (previous.get(appid) or {}).get("first_seen") or record["last_verified"]
+                records.append(record)
+        done += len(results)
+        elapsed = time.perf_counter() - t0
+        print(f"[rescore] {done}/{len(jobs)} records ({done / elapsed if elapsed else 0:.0f}/s)")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(_score_chunk, chunk, min_reviews, block_nsfw) for chunk in chunks]
+            for fut in as_completed(futures):
+                _collect(fut.result())
+    else:
+        for chunk in chunks:
+            _collect(_score_chunk(chunk, min_reviews, block_nsfw))
+
+    # entries without a verdict (review data expired, or no cached details at all)
+    # are kept as they are; the harvest re-verifies or ages them out
+    carried = [it for appid, it in previous.items() if appid not in decided]
+
+    # a rescore never ages records out (refreshing is the harvest's job), so the
+    # staleness window is the whole epoch; the size cap still applies
+    now = time.time()
+    pool, merge_stats = storage.merge_candidate_pool(carried, records, now=now, stale_secs=int(now))
+    merge_stats.update(scoring.score_pool(pool, now=now))
+    stats = {
+        "records": len(jobs),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - t0, 2),
+        "min_reviews": min_reviews,
+        "carried": len(carried),
+        **{f"n_{k}": v for k, v in sorted(counts.items())},
+        **merge_stats,
+    }
+    return {"outcomes": known, "pool": pool, "stats": stats}
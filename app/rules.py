@@ -0,0 +1,139 @@
+# app/rules.py
+"""
+Declarative harvest filters (viability + NSFW), compiled once from config.
+
+Rules live in config.FILTER_RULES (optionally replaced per section by the JSON
+file in HGG_FILTER_RULES). Each section compiles into a RuleSet: id criteria
+become frozenset lookups, and all free-text patterns of the section are joined
+into one precompiled regex with a named group per rule, so a check costs a few
+set intersections plus at most one regex scan. match() returns the name of the
+rule that fired, which the harvest reports per rejected app.
+
+fingerprint() identifies the active rules; stored outcomes judged under other
+rules are dropped on load (see outcomes.py).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from . import config as cfg
+from .storage import load_json
+
+
+def _ids(items: Any) -> FrozenSet[int]:
+    """Integer ids from Steam's [{"id": "23", ...}] lists or bare id lists."""
+    if isinstance(items, (int, str)):
+        items = [items]
+    out = set()
+    for it in items or ():
+        raw = it.get("id") if isinstance(it, dict) else it
+        try:
+            out.add(int(raw))
+        except (TypeError, ValueError):
+            continue
+    return frozenset(out)
+
+
+class _Rule:
+    __slots__ = ("name", "types_allowed", "genres", "categories", "descriptors")
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = str(spec["name"])
+        types = spec.get("types_allowed")
+        self.types_allowed = frozenset(t.lower() for t in types) if types else None
+        self.genres = _ids(spec.get("genres"))
+        self.categories = _ids(spec.get("categories"))
+        self.descriptors = _ids(spec.get("descriptors"))
+
+
+class RuleSet:
+    """One compiled section of FILTER_RULES."""
+
+    def __init__(self, specs: List[Dict[str, Any]]):
+        self.rules = [_Rule(s) for s in specs]
+        self.rules = [r for r in self.rules if r.types_allowed or r.genres or r.categories or r.descriptors]
+        self._groups: Dict[str, str] = {}
+        parts = []
+        for i, spec in enumerate(specs):
+            if spec.get("pattern"):
+                group = f"r{i}"
+                self._groups[group] = str(spec["name"])
+                parts.append(f"(?P<{group}>{spec['pattern']})")
+        self.pattern = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        self._needs_categories = any(r.categories for r in self.rules)
+        self._needs_descriptors = any(r.descriptors for r in self.rules)
+
+    def match(self, payload: dict) -> Optional[str]:
+        """Name of the first rule the app trips, or None."""
+        genres = _ids(payload.get("genres"))
+        categories = _ids(payload.get("categories")) if self._needs_categories else frozenset()
+        descriptors = (
+            _ids((payload.get("content_descriptors") or {}).get("ids"))
+            if self._needs_descriptors else frozenset()
+        )
+        app_type = (payload.get("type") or "").lower()
+        for rule in self.rules:
+            if rule.types_allowed is not None and app_type not in rule.types_allowed:
+                return rule.name
+            if (
+                not rule.genres.isdisjoint(genres)
+                or not rule.categories.isdisjoint(categories)
+                or not rule.descriptors.isdisjoint(descriptors)
+            ):
+                return rule.name
+        if self.pattern is not None:
+            text = " ".join(
+                x.get("description") or ""
+                for key in ("genres", "categories")
+                for x in payload.get(key) or ()
+                if isinstance(x, dict)
+            )
+            m = self.pattern.search(text)
+            if m:
+                return self._groups[m.lastgroup]
+        return None
+
+
+# -----------------
+# Active rules
+# -----------------
+_ACTIVE: Optional[Dict[str, RuleSet]] = None
+_FINGERPRINT: Optional[str] = None
+
+
+def _specs() -> Dict[str, List[Dict[str, Any]]]:
+    specs = {k: list(v) for k, v in cfg.FILTER_RULES.items()}
+    if cfg.FILTER_RULES_PATH:
+        override = load_json(cfg.FILTER_RULES_PATH, default={}) or {}
+        specs.update({k: v for k, v in override.items() if isinstance(v, list)})
+    return specs
+
+
+def active() -> Dict[str, RuleSet]:
+    global _ACTIVE, _FINGERPRINT
+    if _ACTIVE is None:
+        specs = _specs()
+        _ACTIVE = {name: RuleSet(section) for name, section in specs.items()}
+        blob = json.dumps(specs, sort_keys=True).encode("utf-8")
+        _FINGERPRINT = hashlib.sha1(blob).hexdigest()[:12]
+    return _ACTIVE
+
+
+def fingerprint() -> str:
+    active()
+    return _FINGERPRINT or ""
+
+
+def reject_reason(payload: dict) -> Optional[str]:
+    """Why the app is not a viable game (rule name), or None."""
+    rs = active().get("reject")
+    return rs.match(payload) if rs else None
+
+
+def nsfw_reason(payload: dict) -> Optional[str]:
+    """Which NSFW rule the app trips, or None."""
+    rs = active().get("nsfw")
+    return rs.match(payload) if rs else None
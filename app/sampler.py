@@ -0,0 +1,179 @@
+# app/sampler.py
+"""
+Adaptive, yield-driven sampling of the Steam applist.
+
+Pool yield (viable, non-NSFW, >= min_reviews) is very uneven across the catalogue,
+so instead of sampling uniformly we split the applist into strata and learn the
+acceptance rate and request cost of each one:
+
+- appid bucket     appid // APPID_BUCKET
+- age              "new" for the most recent slice of the applist, else "old"
+- prefilter band   "low" when the name looks like a soundtrack/demo/tool, else "ok"
+
+Each run's budget is allocated with Thompson sampling on accepted-per-request
+(Beta posterior for the acceptance rate, smoothed mean for the cost), with a fixed
+exploration share spread over all strata by population so the pool never
+collapses onto one region. Stats persist across runs in SAMPLER_STATS_PATH.
+"""
+from __future__ import annotations
+
+import random
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from . import config as cfg
+from .storage import load_json, save_json
+
+STATS_VERSION = 1
+
+APPID_BUCKET   = 500_000
+NEW_FRACTION   = 0.10     # top slice of appids treated as "new"
+EXPLORE_SHARE  = 0.20     # share of every budget spread uniformly by population
+PRIOR_COST     = 2.0      # requests per probe before we have data (details + summary)
+
+_LOW_NAME = re.compile(
+    r"\b(soundtrack|ost|dlc|demo|playtest|server|sdk|editor|wallpaper|artbook|"
+    r"season pass|pack|beta|test|trailer|video|benchmark|tool|expansion)\b",
+    re.IGNORECASE,
+)
+
+
+def prefilter_band(name: str) -> str:
+    return "low" if (not name or _LOW_NAME.search(name)) else "ok"
+
+
+class AdaptiveSampler:
+    """Per-stratum acceptance stats + bandit allocation over the applist."""
+
+    def __init__(self, stats: Dict[str, Dict[str, float]] | None = None, *, seed: int | None = None):
+        self.stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"trials": 0, "accepted": 0, "requests": 0})
+        self.absorb(stats or {})
+        self._base = {key: dict(val) for key, val in self.stats.items()}   # for delta()
+        self.rng = random.Random(seed)
+        self._new_floor = 0
+
+    # ----- strata
+    def stratum(self, app: Dict[str, Any]) -> str:
+        appid = int(app.get("appid") or 0)
+        age = "new" if appid >= self._new_floor else "old"
+        return f"b{appid // APPID_BUCKET}|{age}|{prefilter_band(app.get('name') or '')}"
+
+    def group(self, apps: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        ids = sorted(int(a.get("appid") or 0) for a in apps)
+        self._new_floor = ids[int(len(ids) * (1.0 - NEW_FRACTION))] if ids else 0
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for app in apps:
+            if app.get("appid"):
+                groups[self.stratum(app)].append(app)
+        return groups
+
+    # ----- posterior helpers
+    def _rate(self, key: str) -> float:
+        s = self.stats.get(key) or {}
+        return (1.0 + s.get("accepted", 0)) / (2.0 + s.get("trials", 0))
+
+    def _cost(self, key: str) -> float:
+        s = self.stats.get(key) or {}
+        return (PRIOR_COST + s.get("requests", 0)) / (1.0 + s.get("trials", 0))
+
+    def _draw(self, key: str) -> float:
+        s = self.stats.get(key) or {}
+        acc = s.get("accepted", 0)
+        fail = max(0, s.get("trials", 0) - acc)
+        cost = max(0.05, self._cost(key))
+        return self.rng.betavariate(1.0 + acc, 1.0 + fail) / cost
+
+    def expected_yield(self, alloc: Dict[str, int]) -> float:
+        """Expected accepted candidates per request for a given allocation."""
+        acc = sum(n * self._rate(k) for k, n in alloc.items())
+        req = sum(n * self._cost(k) for k, n in alloc.items())
+        return acc / req if req else 0.0
+
+    # ----- allocation
+    def allocate(self, groups: Dict[str, List[Dict[str, Any]]], budget: int) -> Dict[str, int]:
+        sizes = {k: len(v) for k, v in groups.items() if v}
+        total = sum(sizes.values())
+        budget = min(int(budget), total)
+        alloc: Dict[str, int] = {k: 0 for k in sizes}
+        if not budget:
+            return alloc
+
+        # exploration floor: proportional to population
+        explore = int(round(budget * EXPLORE_SHARE))
+        for k, n in sizes.items():
+            alloc[k] = min(n, int(explore * n / total))
+
+        # exploitation: Thompson draws, each handing out a small slice of the budget
+        remaining = budget - sum(alloc.values())
+        step = max(1, remaining // 200)
+        while remaining > 0:
+            open_keys = [k for k in sizes if alloc[k] < sizes[k]]
+            if not open_keys:
+                break
+            best = max(open_keys, key=self._draw)
+            take = min(step, remaining, sizes[best] - alloc[best])
+            alloc[best] += take
+            remaining -= take
+        return alloc
+
+    def sample(self, apps: List[Dict[str, Any]], k: int) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """
+        Draw k apps according to the bandit allocation.
+        Returns (apps in random order, report with expected yield before/after).
+        """
+        groups = self.group(apps)
+        alloc = self.allocate(groups, k)
+        out: List[Dict[str, Any]] = []
+        for key, n in alloc.items():
+            if n:
+                out.extend(self.rng.sample(groups[key], n))
+        self.rng.shuffle(out)
+
+        total = sum(len(v) for v in groups.values()) or 1
+        uniform = {key: len(v) * len(out) / total for key, v in groups.items()}
+        report = {
+            "strata": len(groups),
+            "yield_uniform": self.expected_yield(uniform),
+            "yield_adaptive": self.expected_yield(alloc),
+        }
+        return out, report
+
+    # ----- learning
+    def observe(self, app: Dict[str, Any], *, accepted: bool, requests: int) -> None:
+        s = self.stats[self.stratum(app)]
+        s["trials"] += 1
+        s["accepted"] += int(bool(accepted))
+        s["requests"] += int(requests)
+
+    def absorb(self, stats: Dict[str, Dict[str, float]]) -> None:
+        """Add per-stratum counts (e.g. a shard's delta) to these stats."""
+        for key, val in stats.items():
+            s = self.stats[key]
+            for k in ("trials", "accepted", "requests"):
+                s[k] += val.get(k, 0)
+
+    def delta(self) -> Dict[str, Dict[str, float]]:
+        """Counts observed since this sampler was loaded."""
+        out = {}
+        for key, val in self.stats.items():
+            base = self._base.get(key) or {}
+            d = {k: val[k] - base.get(k, 0) for k in ("trials", "accepted", "requests")}
+            if any(d.values()):
+                out[key] = d
+        return out
+
+    def to_dict(self, *, delta: bool = False) -> dict:
+        return {"version": STATS_VERSION, "delta": delta, "strata": self.delta() if delta else dict(self.stats)}
+
+
+def load(path: Path | None = None, *, seed: int | None = None) -> AdaptiveSampler:
+    data = load_json(path or cfg.SAMPLER_STATS_PATH, default={}) or {}
+    stats = data.get("strata") if data.get("version") == STATS_VERSION else None
+    return AdaptiveSampler(stats, seed=seed)
+
+
+def save(sampler: AdaptiveSampler, path: Path | None = None, *, delta: bool = False) -> None:
+    """Persist the stats; delta=True writes only this run's counts (shard runs, see shards.py)."""
+    save_json(path or cfg.SAMPLER_STATS_PATH, sampler.to_dict(delta=delta))
@@ -0,0 +1,123 @@
+# app/scoring.py
+"""
+Hidden-gem scoring over the whole candidate pool in one NumPy pass.
+
+score = wilson * band * recency * price, from the slim features already stored
+in the pool (review counts from query_summary, release date, price):
+
+- wilson   lower bound of the 95% Wilson interval on the positive share, so
+           90% of 60 reviews ranks below 90% of 600
+- band     1.0 at MIN_REVIEWS falling to 0.5 at MAX_REVIEWS (log scale): the
+           fewer reviews, the more hidden the gem
+- recency  0.6 .. 1.0, halving its bonus every ~3 years since release
+- price    1.0 up to $20, gently lower above that, 0.9 for free-to-play
+
+Hard gates from config (MIN_REVIEWS <= total <= MAX_REVIEWS and
+positive share >= MIN_POS_RATIO) set the score to 0. Records without review
+counts get no score (None) and are not picked (see weights()), except the
+cold-start fallbacks of a pool in which nothing has a score above 0.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import config as cfg
+
+Z = 1.96                    # 95% interval
+RECENCY_HALF_LIFE = 3.0     # years
+PRICE_PIVOT_CENTS = 2000    # no penalty up to $20
+FREE_FACTOR = 0.9
+FALLBACK_WEIGHT = 1e-3      # cold-start fallbacks, only while nothing scored exists
+
+_DATE_FORMATS = ("%b %d, %Y", "%d %b, %Y", "%B %d, %Y", "%d %B, %Y", "%b %Y", "%B %Y", "%Y")
+
+
+@lru_cache(maxsize=8192)
+def _release_ts(text: Optional[str]) -> float:
+    """Steam release_date.date string -> unix seconds (NaN when unknown / "Coming soon")."""
+    if not text:
+        return float("nan")
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    return float("nan")
+
+
+def _column(items: List[Dict[str, Any]], field: str) -> np.ndarray:
+    return np.array([np.nan if it.get(field) is None else float(it[field]) for it in items], dtype=np.float64)
+
+
+def score_items(items: List[Dict[str, Any]], *, now: Optional[float] = None) -> np.ndarray:
+    """Scores for a list of pool records (NaN = not enough data)."""
+    if not items:
+        return np.zeros(0)
+    now = float(now if now is not None else datetime.now(timezone.utc).timestamp())
+    total = _column(items, "total_reviews")
+    positive = _column(items, "total_positive")
+    price = _column(items, "price_cents")
+    free = np.array([bool(it.get("is_free")) for it in items])
+    released = np.array([_release_ts(it.get("release_date")) for it in items], dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.where(total > 0, total, np.nan)
+        p = np.clip(positive / n, 0.0, 1.0)
+        z2 = Z * Z
+        wilson = (p + z2 / (2 * n) - Z * np.sqrt(p * (1 - p) / n + z2 / (4 * n * n))) / (1 + z2 / n)
+
+        lo, hi = float(cfg.MIN_REVIEWS), float(cfg.MAX_REVIEWS)
+        span = np.log(hi / lo) if hi > lo else 1.0
+        band = 1.0 - 0.5 * np.clip(np.log(n / lo) / span, 0.0, 1.0)
+
+        age_years = np.maximum(0.0, (now - released) / (365.25 * 86400))
+        recency = np.where(np.isnan(age_years), 0.8, 0.6 + 0.4 * np.exp2(-age_years / RECENCY_HALF_LIFE))
+
+        over = np.log2(np.maximum(price, PRICE_PIVOT_CENTS) / PRICE_PIVOT_CENTS)
+        price_f = np.where(np.isnan(price), 1.0, np.clip(1.0 - 0.15 * over, 0.6, 1.0))
+        price_f = np.where(free, FREE_FACTOR, price_f)
+
+        score = wilson * band * recency * price_f
+        gated = (n < lo) | (n > hi) | (p < cfg.MIN_POS_RATIO)
+    return np.where(np.isnan(score), np.nan, np.where(gated, 0.0, score))
+
+
+def score_pool(pool: Dict[str, Any], *, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Write "score" into every pool record and rank the records best-first.
+    Returns counts {"scored", "gated", "unscored"}.
+    """
+    items = pool.get("items") or []
+    scores = score_items(items, now=now)
+    for it, s in zip(items, scores):
+        it["score"] = None if np.isnan(s) else round(float(s), 5)
+    items.sort(key=lambda it: -1.0 if it.get("score") is None else it["score"], reverse=True)
+    unscored = int(np.isnan(scores).sum())
+    gated = int((scores == 0).sum())
+    return {"scored": len(items) - unscored - gated, "gated": gated, "unscored": unscored}
+
+
+def weights(items: List[Dict[str, Any]]) -> Dict[int, float]:
+    """
+    appid -> sampling weight from stored scores (no file reads), for the records
+    that passed the gates only. Gated records (score 0) and unscored ones (None:
+    never went through the gates, e.g. bare known-accepted ids) are left out.
+    When nothing has a score above 0, the cold-start fallbacks (passed=False,
+    no review summary yet; see steam.build_candidate_pool) get FALLBACK_WEIGHT each
+    so a fresh pool can still be picked from.
+    """
+    out: Dict[int, float] = {}
+    fallbacks: Dict[int, float] = {}
+    for it in items:
+        if not isinstance(it, dict) or it.get("appid") is None:
+            continue
+        s = it.get("score")
+        if s is not None and s > 0:
+            out[int(it["appid"])] = float(s)
+        elif s is None and it.get("passed") is False:
+            fallbacks[int(it["appid"])] = FALLBACK_WEIGHT
+    return out or fallbacks
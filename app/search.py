@@ -0,0 +1,238 @@
+# app/search.py
+"""
+Static search index for the built site (served next to the pages, no backend).
+
+Build step: every post in content/posts is reduced to {title, url, date, genres,
+price} plus its overview text, and an inverted index over title, genres, price
+and overview is written to <output>/search/:
+
+- meta.json           version, doc and id counts, doc chunk size, prefix length,
+                      shard prefixes, doc record fields, term count
+- t/<prefix>.json     {term: postings} for all terms starting with that 2-char prefix
+- d/<n>.json          doc records n*DOC_CHUNK .. (n+1)*DOC_CHUNK-1
+
+Doc ids are append-only: a post keeps the id it got when it was first indexed
+(config.SEARCH_IDS_PATH) and new posts take the next ids, oldest first, so a new
+post never renumbers the others. Removed posts leave a null hole in their chunk;
+once holes pass MAX_HOLES of the id space everything is renumbered once. Higher
+ids are newer posts (backfilled ones excepted), which the browser uses as the
+tie-break. Postings are (doc-id delta, weight) pairs in ascending doc order, each
+number written as a base64 VLQ (5 data bits per character, 6th bit =
+continuation), so a term that appears in thousands of posts stays a short
+string. FIELD_WEIGHTS are applied at build time (a posting's weight sums the
+fields the term occurs in), so the browser never needs them. The browser (themes/hgg/static/search.js) loads meta.json on first
+focus, then only the term shards and doc chunks a query touches.
+
+Files are only rewritten when their bytes change and stale shards are removed,
+so a new post rewrites meta.json, the last doc chunk and the shards of its own
+terms.
+"""
+from __future__ import annotations
+
+import html
+import json
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from . import config as cfg
+from .manifest import parse_post
+from .storage import load_json, save_json
+
+INDEX_VERSION = 2                # 2: append-only doc ids, null holes, higher id = newer
+DOC_CHUNK = 128
+PREFIX_LEN = 2
+FIELD_WEIGHTS = {"title": 8, "genres": 4, "price": 2, "overview": 1}
+MAX_WEIGHT = 63                  # weights are capped so most pairs stay 2 characters
+MAX_HOLES = 0.25                 # renumber when removed posts leave this share of ids unused
+
+_B64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+_TOKEN = re.compile(r"[a-z0-9]+")
+_PRICE = re.compile(r"^- Price:\s*\*\*(.*?)\*\*", re.M)
+_MARKUP = re.compile(r"<[^>]+>|!\[[^\]]*\]\([^)]*\)|\[([^\]]*)\]\([^)]*\)")
+STOPWORDS = frozenset("a an and are as at be by for from in is it its of on or that the this to with".split())
+
+
+# -----------------
+# Encoding
+# -----------------
+def vlq(values: Iterable[int]) -> str:
+    """Non-negative ints -> base64 VLQ string."""
+    out = []
+    for v in values:
+        while True:
+            digit = v & 31
+            v >>= 5
+            out.append(_B64[digit | (32 if v else 0)])
+            if not v:
+                break
+    return "".join(out)
+
+
+def unvlq(text: str) -> List[int]:
+    out, value, shift = [], 0, 0
+    for ch in text:
+        digit = _B64.index(ch)
+        value |= (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            out.append(value)
+            value, shift = 0, 0
+    return out
+
+
+def encode_postings(postings: List[Tuple[int, int]]) -> str:
+    """[(doc, weight), ...] in ascending doc order -> VLQ of (delta, weight) pairs."""
+    flat, prev = [], 0
+    for doc, weight in postings:
+        flat += [doc - prev, weight]
+        prev = doc
+    return vlq(flat)
+
+
+# -----------------
+# Documents
+# -----------------
+def tokens(text: str) -> List[str]:
+    """Lowercase, accent-folded word tokens (the browser applies the same folding)."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return [t for t in _TOKEN.findall(folded) if len(t) >= 2 and t not in STOPWORDS]
+
+
+def _overview(body: str) -> str:
+    """The overview paragraph: the "### Overview" section, else the first prose paragraph."""
+    m = re.search(r"^### Overview\s*\n+(.+?)(?:\n\n|\Z)", body, re.M | re.S)
+    if m:
+        return m.group(1).strip()
+    for para in re.split(r"\n\s*\n", body):
+        para = para.strip()
+        if para and not para.startswith(("#", "!", "<", "-", "*", "{")):
+            return para
+    return ""
+
+
+def read_post(path: Path) -> Dict[str, Any]:
+    """Search record of one post (title, url, date, genres, price, overview)."""
+    text = path.read_text(encoding="utf-8", errors="replace")
+    meta = parse_post(text)
+    _, _, body = text.partition("\n\n")
+    price = _PRICE.search(text)
+    overview = _MARKUP.sub(lambda m: m.group(1) or " ", _overview(body))
+    return {
+        "title": meta.get("title") or path.stem,
+        "url": f"{meta.get('slug') or path.stem}.html",
+        "date": (meta.get("date") or "")[:10],
+        "genres": meta.get("genre_names") or [],
+        "price": price.group(1).strip() if price else "",
+        "overview": html.unescape(overview),
+    }
+
+
+def assign_ids(docs: List[Dict[str, Any]], known: Dict[str, int]) -> Dict[str, int]:
+    """
+    url -> doc id: known urls keep their id, new ones get the next ids in
+    (date, url) order. Renumbers from scratch when holes exceed MAX_HOLES.
+    """
+    live = {d["url"] for d in docs}
+    ids = {url: i for url, i in known.items() if url in live}
+    span = max(ids.values(), default=-1) + 1
+    if span and (span - len(ids)) / span > MAX_HOLES:
+        ids, span = {}, 0
+    for d in sorted(docs, key=lambda d: (d["date"], d["url"])):
+        if d["url"] not in ids:
+            ids[d["url"]] = span
+            span += 1
+    return ids
+
+
+def build(docs: List[Dict[str, Any]], ids: Dict[str, int] | None = None) -> Dict[str, Any]:
+    """
+    Index docs under ids (url -> doc id; default: assign_ids from scratch).
+    Returns {"meta", "shards": {prefix: {term: postings}}, "chunks": [[doc or None]]}.
+    """
+    ids = ids if ids is not None else assign_ids(docs, {})
+    index: Dict[str, Dict[int, int]] = {}
+    for doc in docs:
+        doc_id = ids[doc["url"]]
+        fields = {
+            "title": doc["title"],
+            "genres": " ".join(doc["genres"]),
+            "price": doc["price"],
+            "overview": doc["overview"],
+        }
+        for field, text in fields.items():
+            for term in tokens(text):
+                postings = index.setdefault(term, {})
+                postings[doc_id] = min(MAX_WEIGHT, postings.get(doc_id, 0) + FIELD_WEIGHTS[field])
+
+    shards: Dict[str, Dict[str, str]] = {}
+    for term in sorted(index):
+        shards.setdefault(term[:PREFIX_LEN], {})[term] = encode_postings(sorted(index[term].items()))
+    records: List[Any] = [None] * (max(ids.values(), default=-1) + 1)
+    for d in docs:
+        records[ids[d["url"]]] = [d["title"], d["url"], d["date"], ", ".join(d["genres"]), d["price"]]
+    chunks = [records[i:i + DOC_CHUNK] for i in range(0, len(records), DOC_CHUNK)]
+    meta = {
+        "version": INDEX_VERSION,
+        "docs": len(docs),
+        "ids": len(records),
+        "chunk": DOC_CHUNK,
+        "prefix": PREFIX_LEN,
+        "shards": sorted(shards),
+        "fields": ["title", "url", "date", "genres", "price"],
+        "terms": len(index),
+    }
+    return {"meta": meta, "shards": shards, "chunks": chunks}
+
+
+# -----------------
+# Output
+# -----------------
+def _write_if_changed(path: Path, obj: Any) -> bool:
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return True
+
+
+def write_index(output: Path, post_dir: Path | None = None) -> Dict[str, int]:
+    """Build the index for content/posts into <output>/search. Returns counts and bytes."""
+    t0 = time.perf_counter()
+    post_dir = post_dir or cfg.POST_DIR
+    docs = [read_post(p) for p in post_dir.glob("*.md")]
+    ids = assign_ids(docs, load_json(cfg.SEARCH_IDS_PATH, default={}) or {})
+    built = build(docs, ids)
+
+    root = output / "search"
+    wanted = {root / "meta.json": built["meta"]}
+    wanted.update({root / "t" / f"{prefix}.json": terms for prefix, terms in built["shards"].items()})
+    wanted.update({root / "d" / f"{n}.json": chunk for n, chunk in enumerate(built["chunks"])})
+
+    written = sum(_write_if_changed(path, obj) for path, obj in wanted.items())
+    save_json(cfg.SEARCH_IDS_PATH, ids)
+    removed = 0
+    for sub in ("t", "d"):
+        for path in (root / sub).glob("*.json") if (root / sub).is_dir() else ():
+            if path not in wanted:
+                path.unlink()
+                removed += 1
+    return {
+        "docs": len(docs),
+        "terms": built["meta"]["terms"],
+        "files": len(wanted),
+        "written": written,
+        "removed": removed,
+        "bytes": sum(p.stat().st_size for p in wanted),
+        "ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
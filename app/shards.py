@@ -0,0 +1,182 @@
+# app/shards.py
+"""
+Sharded harvests and the merge step that folds them back together.
+
+`--harvest --shard i/N` (0 <= i < N) only probes apps whose appid hashes into
+shard i, so N runners (e.g. a CI matrix, each behind its own IP and rate limit)
+never touch the same appid. A shard run leaves the shared pool, outcome and
+sampler files alone and writes its results to CACHE_DIR/shards/<i>-of-<N>/:
+
+- pool.json            harvested records (not yet merged)
+- outcomes.json        the shard's known-outcome sets (Bloom filters, OR-able)
+- sampler_stats.json   this run's sampler counts only (a delta)
+- metrics.json         probed / accepted / requests / seconds
+- records/<cache>/     copies of the cache records this run wrote (appstats,
+                       reviewsum), listed with their fetch times in records.json
+
+Cache records go to the normal cache dirs as well: shards write disjoint appids
+and every write uses a unique temp file. Only the records a shard wrote travel
+with it, so a CI shard uploads its own work, not the whole restored cache.
+
+`--merge-shards [ROOT ...]` merges every shard found under the given roots (cache
+roots with a shards/ dir, or directories of shard dirs such as downloaded
+artifacts; default: the local CACHE_DIR) in a fixed order: cache records are
+imported when fetched after the local copy (and stamped with their fetch time,
+which cache.gc's TTLs go by), outcomes are unioned, sampler deltas added, pools
+merged and re-scored. Merged shard directories under the local CACHE_DIR are
+removed so a delta is never counted twice.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from . import config as cfg
+from .storage import load_json, save_json
+
+SHARDS_DIR = cfg.CACHE_DIR / "shards"
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'2/4' -> (2, 4); shards are numbered from 0."""
+    try:
+        i, n = (int(x) for x in spec.split("/", 1))
+    except ValueError:
+        raise ValueError(f"--shard expects i/N, got {spec!r}") from None
+    if n < 1 or not 0 <= i < n:
+        raise ValueError(f"--shard {spec}: need N >= 1 and 0 <= i < N")
+    return i, n
+
+
+def shard_of(appid: int, n: int) -> int:
+    """Stable shard index of an appid (independent of PYTHONHASHSEED)."""
+    digest = hashlib.blake2b(int(appid).to_bytes(8, "little"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % n
+
+
+def select(apps: List[Dict[str, Any]], i: int, n: int) -> List[Dict[str, Any]]:
+    return [a for a in apps if a.get("appid") and shard_of(a["appid"], n) == i]
+
+
+def shard_dir(i: int, n: int, root: Path | None = None) -> Path:
+    return (root / "shards" if root else SHARDS_DIR) / f"{i}-of-{n}"
+
+
+def save_pool(state_dir: Path, records: List[Dict[str, Any]], metrics: Dict[str, Any]) -> None:
+    save_json(state_dir / "pool.json", {"records": records})
+    merged = load_json(state_dir / "metrics.json", default={}) or {}
+    merged.update(metrics)
+    save_json(state_dir / "metrics.json", merged)
+
+
+def export_records(state_dir: Path, *, since: float) -> int:
+    """
+    Copy the cache records written since `since` (this run, on this machine's
+    clock) into state_dir/records/ and list their fetch times in records.json.
+    Returns the number of records exported.
+    """
+    from . import cache
+
+    listing: Dict[str, Dict[str, int]] = {}
+    for name, src_dir in cache.CACHE_DIRS.items():
+        for key, src in sorted(cache.iter_records(src_dir)):
+            fetched = src.stat().st_mtime
+            if fetched < since:
+                continue
+            dest = state_dir / "records" / name / src.name
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(src, dest)
+            listing.setdefault(name, {})[key] = int(fetched)
+    save_json(state_dir / "records.json", {"version": 1, "records": listing})
+    return sum(len(keys) for keys in listing.values())
+
+
+# -----------------
+# Merge
+# -----------------
+def _import_records(state_dir: Path) -> int:
+    """
+    Copy a shard's exported records into the local caches when missing here or
+    fetched after the local copy; the copy's mtime is set to the fetch time.
+    """
+    from . import cache
+
+    listing = (load_json(state_dir / "records.json", default={}) or {}).get("records") or {}
+    copied = 0
+    for name, keys in sorted(listing.items()):
+        dest_dir = cache.CACHE_DIRS.get(name)
+        if dest_dir is None:
+            continue
+        for key, fetched in sorted(keys.items()):
+            src = cache.find_record(state_dir / "records" / name / f"{key}.json")
+            if src is None:
+                continue
+            dest = cache.find_record(dest_dir / f"{key}.json")
+            if dest is not None and dest.stat().st_mtime >= fetched:
+                continue
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            target = dest_dir / src.name
+            tmp = target.with_name(f".{target.name}.merge.tmp")
+            shutil.copyfile(src, tmp)
+            os.utime(tmp, (fetched, fetched))
+            tmp.replace(target)
+            if dest is not None and dest != target:
+                dest.unlink(missing_ok=True)
+            cache.forget(target)
+            copied += 1
+    return copied
+
+
+def _find(roots: Sequence[Path]) -> List[Path]:
+    """Shard dirs under the given roots, in a deterministic order."""
+    out = []
+    for root in roots:
+        base = root / "shards" if (root / "shards").is_dir() else root
+        if base.is_dir():
+            out.extend(d for d in sorted(base.iterdir()) if (d / "pool.json").exists())
+    return out
+
+
+def merge(roots: Optional[Sequence[Path]] = None) -> Dict[str, Any]:
+    """Fold shard results into the shared pool / outcomes / sampler stats."""
+    from . import outcomes, sampler, scoring, storage
+
+    roots = [Path(r) for r in (roots or [cfg.CACHE_DIR])]
+    found = _find(roots)
+    if not found:
+        return {"shards": 0}
+
+    imported = sum(_import_records(d) for d in found)
+    known = outcomes.load()
+    strat = sampler.load()
+    records: List[Dict[str, Any]] = []
+    per_shard = []
+    for d in found:
+        known.merge(outcomes.load(d / "outcomes.json"))
+        delta = load_json(d / "sampler_stats.json", default={}) or {}
+        if delta.get("version") == sampler.STATS_VERSION and delta.get("delta"):
+            strat.absorb(delta.get("strata") or {})
+        records.extend((load_json(d / "pool.json", default={}) or {}).get("records") or [])
+        per_shard.append({"shard": d.name, **(load_json(d / "metrics.json", default={}) or {})})
+
+    records.sort(key=lambda r: int(r["appid"]))
+    pool, stats = storage.merge_candidate_pool(storage.load_candidate_pool(default={}), records)
+    stats.update(scoring.score_pool(pool))
+    stats["shards"] = per_shard
+    storage.save_candidate_pool(pool, stats=stats)
+    outcomes.save(known)
+    sampler.save(strat)
+
+    for d in found:
+        if d.resolve().is_relative_to(SHARDS_DIR.resolve()):
+            shutil.rmtree(d, ignore_errors=True)
+    return {
+        "shards": len(found),
+        "records": len(records),
+        "imported": imported,
+        "requests": sum(int(m.get("requests") or 0) for m in per_shard),
+        **{k: v for k, v in stats.items() if k != "shards"},
+    }
@@ -0,0 +1,343 @@
+# app/similarity.py
+"""
+"More like this": a local similarity index over the cached appdetails.
+
+Each viable, non-NSFW game in the appstats cache becomes a sparse TF-IDF vector
+over its short_description words plus its genre and category ids. Terms are
+hashed into N_FEATURES buckets (no vocabulary to grow or persist), the sparse
+rows are kept CSR-style (indptr / indices / data), and every row is projected
+through a fixed random ±1 matrix into a dense, L2-normalised PROJ_DIM vector.
+A top-k query is then one (N x PROJ_DIM) mat-vec plus an argpartition.
+
+The index lives in config.SIMILARITY_INDEX_PATH (.npz) and is updated
+incrementally: update() only reads records that are new or rewritten since the
+last run (by mtime), projects them with the current IDF and drops rows whose
+record is gone. Rows are re-projected in bulk once the document count has
+drifted by REPROJECT_DRIFT since the IDF the stored vectors were built with.
+"""
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from . import cache, rules
+from . import config as cfg
+
+INDEX_VERSION = 1
+N_FEATURES = 1 << 16        # hashed term buckets
+PROJ_DIM = 128              # dense vector size
+SEED = 20240611             # projection matrix seed (changing it invalidates the index)
+REPROJECT_DRIFT = 0.25      # re-project all rows when N moved by 25% since the last IDF
+GENRE_WEIGHT = 3.0          # a shared genre counts like three shared words
+CATEGORY_WEIGHT = 1.0
+CHUNK = 512                 # rows per projection batch
+
+_WORD = re.compile(r"[a-z][a-z0-9']{2,}")
+_TAG = re.compile(r"<[^>]+>")
+STOPWORDS = frozenset("""
+and the for with you your are from that this its into their they them will can
+has have all our out who what when where which while than then there these
+those not but more most over each every also just only very one two new way
+game games play player players steam world
+""".split())
+
+
+# -----------------
+# Features
+# -----------------
+def _bucket(term: str) -> int:
+    digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % N_FEATURES
+
+
+def terms(payload: dict) -> Dict[str, float]:
+    """Weighted terms of one appdetails payload: description words, genre and category ids."""
+    out: Dict[str, float] = {}
+    text = html.unescape(_TAG.sub(" ", payload.get("short_description") or "")).lower()
+    for word in _WORD.findall(text):
+        if word not in STOPWORDS:
+            out[word] = out.get(word, 0.0) + 1.0
+    for key, prefix, weight in (("genres", "genre", GENRE_WEIGHT), ("categories", "cat", CATEGORY_WEIGHT)):
+        for item in payload.get(key) or []:
+            ident = item.get("id") if isinstance(item, dict) else item
+            if ident is not None:
+                out[f"{prefix}:{ident}"] = weight
+    return out
+
+
+def features(payload: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """(bucket indices, sublinear tf weights) of one payload, indices sorted and unique."""
+    acc: Dict[int, float] = {}
+    for term, count in terms(payload).items():
+        b = _bucket(term)
+        acc[b] = acc.get(b, 0.0) + count
+    if not acc:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    idx = np.fromiter(sorted(acc), dtype=np.int32, count=len(acc))
+    tf = np.array([acc[int(i)] for i in idx], dtype=np.float32)
+    return idx, (1.0 + np.log(tf)).astype(np.float32)
+
+
+_PROJECTION: Optional[np.ndarray] = None
+
+
+def _projection() -> np.ndarray:
+    """Fixed random ±1 matrix (N_FEATURES x PROJ_DIM), int8 to keep it at 8 MB."""
+    global _PROJECTION
+    if _PROJECTION is None:
+        rng = np.random.default_rng(SEED)
+        _PROJECTION = (rng.integers(0, 2, size=(N_FEATURES, PROJ_DIM), dtype=np.int8) * 2 - 1).astype(np.int8)
+    return _PROJECTION
+
+
+def _indexable(data: Any) -> Optional[dict]:
+    """The appdetails payload when it is a viable, non-NSFW game; else None."""
+    from .steam import _unwrap_details
+
+    ok, payload = _unwrap_details(data or {})
+    if not ok or rules.reject_reason(payload) or rules.nsfw_reason(payload):
+        return None
+    return payload
+
+
+# -----------------
+# Index
+# -----------------
+class SimilarityIndex:
+    def __init__(self):
+        self.appids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, PROJ_DIM), dtype=np.float32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.df = np.zeros(N_FEATURES, dtype=np.int32)
+        self.idf_docs = 0                  # document count the stored vectors' IDF used
+        self.scanned: Dict[int, float] = {}  # appid -> record mtime, indexed or not
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.appids)
+
+    def __contains__(self, appid: int) -> bool:
+        return int(appid) in self._rows
+
+    def _reindex(self) -> None:
+        self._rows = {int(a): i for i, a in enumerate(self.appids)}
+
+    # ----- projection
+    def _idf(self) -> np.ndarray:
+        n = len(self.appids)
+        return (np.log((1.0 + n) / (1.0 + self.df)) + 1.0).astype(np.float32)
+
+    def _project(self, lo: int, hi: int, idf: np.ndarray) -> np.ndarray:
+        """Dense, normalised vectors of CSR rows [lo, hi)."""
+        start, end = int(self.indptr[lo]), int(self.indptr[hi])
+        cols = self.indices[start:end]
+        weights = self.data[start:end] * idf[cols]
+        dense = _projection()[cols].astype(np.float32) * weights[:, None]
+        # rows are never empty (update() skips payloads without terms)
+        sums = np.add.reduceat(dense, self.indptr[lo:hi] - start, axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        return sums / np.where(norms > 0, norms, 1.0)
+
+    def reproject(self, start: int = 0) -> int:
+        """Recompute vectors of rows >= start with the current IDF. Returns rows projected."""
+        n = len(self.appids)
+        idf = self._idf()
+        vectors = self.vectors[:start]
+        parts = [vectors] + [self._project(lo, min(lo + CHUNK, n), idf) for lo in range(start, n, CHUNK)]
+        self.vectors = np.concatenate(parts) if parts else vectors
+        if start == 0:
+            self.idf_docs = n
+        return n - start
+
+    # ----- maintenance
+    def _drop(self, appids: Set[int]) -> None:
+        if not appids:
+            return
+        keep = ~np.isin(self.appids, np.fromiter(appids, dtype=np.int64, count=len(appids)))
+        lengths = np.diff(self.indptr)
+        nnz_keep = np.repeat(keep, lengths)
+        np.subtract.at(self.df, self.indices[~nnz_keep], 1)
+        self.appids = self.appids[keep]
+        self.vectors = self.vectors[keep]
+        self.indices = self.indices[nnz_keep]
+        self.data = self.data[nnz_keep]
+        self.indptr = np.concatenate([[0], np.cumsum(lengths[keep])]).astype(np.int64)
+
+    def _append(self, rows: List[Tuple[int, np.ndarray, np.ndarray]]) -> None:
+        if not rows:
+            return
+        self.appids = np.concatenate([self.appids, np.array([a for a, _, _ in rows], dtype=np.int64)])
+        self.indices = np.concatenate([self.indices] + [idx for _, idx, _ in rows])
+        self.data = np.concatenate([self.data] + [tf for _, _, tf in rows])
+        lengths = np.array([len(idx) for _, idx, _ in rows], dtype=np.int64)
+        self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(lengths)])
+        for _, idx, _ in rows:
+            self.df[idx] += 1
+
+    def update(self, directory: Optional[Path] = None) -> Dict[str, int]:
+        """
+        Sync with the appstats cache: index new/rewritten records, drop removed or
+        no-longer-viable ones. Returns {"indexed", "added", "updated", "removed", "projected"}.
+        """
+        directory = directory or cfg.APPSTATS_DIR
+        on_disk: Dict[int, Path] = {}
+        for key, path in cache.iter_records(directory):
+            if key.isdigit():
+                on_disk[int(key)] = path
+
+        gone = {a for a in self.scanned if a not in on_disk}
+        changed: List[Tuple[int, float, Path]] = []
+        for appid, path in on_disk.items():
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if self.scanned.get(appid) != mtime:
+                changed.append((appid, mtime, path))
+
+        drop = {a for a in gone | {a for a, _, _ in changed} if a in self._rows}
+        rows = []
+        for appid, mtime, path in sorted(changed):
+            self.scanned[appid] = mtime
+            payload = _indexable(cache.read_record(path))
+            if payload is None:
+                continue
+            idx, tf = features(payload)
+            if len(idx):
+                rows.append((appid, idx, tf))
+        for appid in gone:
+            self.scanned.pop(appid, None)
+
+        before = len(self.appids)
+        added = sum(1 for a, _, _ in rows if a not in self._rows)
+        self._drop(drop)
+        kept = len(self.appids)
+        self._append(rows)
+        self._reindex()
+
+        n = len(self.appids)
+        if not self.idf_docs or abs(n - self.idf_docs) > REPROJECT_DRIFT * self.idf_docs:
+            projected = self.reproject()
+        else:
+            projected = self.reproject(start=kept)
+        return {
+            "indexed": n,
+            "added": added,
+            "updated": len(rows) - added,
+            "removed": before - kept - (len(rows) - added),
+            "projected": projected,
+        }
+
+    # ----- queries
+    def vector(self, appid: int) -> Optional[np.ndarray]:
+        row = self._rows.get(int(appid))
+        return None if row is None else self.vectors[row]
+
+    def neighbours(
+        self,
+        appid: int,
+        k: int = 5,
+        *,
+        among: Optional[Iterable[int]] = None,
+        min_score: float = -1.0,
+    ) -> List[Tuple[int, float]]:
+        """Top-k (appid, cosine) most similar to appid, best first, optionally within `among`."""
+        vec = self.vector(appid)
+        if vec is None or not len(self.appids):
+            return []
+        scores = self.vectors @ vec
+        mask = self.appids != int(appid)
+        if among is not None:
+            wanted = np.fromiter((int(a) for a in among), dtype=np.int64)
+            mask &= np.isin(self.appids, wanted)
+        mask &= scores >= min_score
+        cand = np.flatnonzero(mask)
+        if not len(cand):
+            return []
+        if len(cand) > k:
+            cand = cand[np.argpartition(-scores[cand], k - 1)[:k]]
+        cand = cand[np.argsort(-scores[cand], kind="stable")]
+        return [(int(self.appids[i]), float(scores[i])) for i in cand]
+
+    def near_any(self, candidates: Iterable[int], refs: Iterable[int], threshold: float) -> Set[int]:
+        """Candidates whose cosine to any of refs is >= threshold."""
+        ref_rows = [self._rows[int(a)] for a in refs if int(a) in self._rows]
+        cand = [int(a) for a in candidates if int(a) in self._rows]
+        if not ref_rows or not cand:
+            return set()
+        sims = self.vectors[[self._rows[a] for a in cand]] @ self.vectors[ref_rows].T
+        hit = sims.max(axis=1) >= threshold
+        return {a for a, h in zip(cand, hit) if h}
+
+    # ----- persistence
+    def save(self, path: Optional[Path] = None) -> None:
+        path = path or cfg.SIMILARITY_INDEX_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        scanned = sorted(self.scanned.items())
+        tmp = path.with_name(f".{path.name}.tmp.npz")
+        np.savez(
+            tmp,
+            params=np.array([INDEX_VERSION, N_FEATURES, PROJ_DIM, SEED, self.idf_docs], dtype=np.int64),
+            appids=self.appids, vectors=self.vectors,
+            indptr=self.indptr, indices=self.indices, data=self.data, df=self.df,
+            scanned_ids=np.array([a for a, _ in scanned], dtype=np.int64),
+            scanned_mtimes=np.array([m for _, m in scanned], dtype=np.float64),
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "SimilarityIndex":
+        """The stored index; an empty one when missing, unreadable or built with other parameters."""
+        path = path or cfg.SIMILARITY_INDEX_PATH
+        idx = cls()
+        try:
+            with np.load(path) as z:
+                params = z["params"].tolist()
+                if params[:4] != [INDEX_VERSION, N_FEATURES, PROJ_DIM, SEED]:
+                    return idx
+                idx.idf_docs = int(params[4])
+                idx.appids, idx.vectors = z["appids"], z["vectors"]
+                idx.indptr, idx.indices, idx.data, idx.df = z["indptr"], z["indices"], z["data"], z["df"]
+                idx.scanned = dict(zip(z["scanned_ids"].tolist(), z["scanned_mtimes"].tolist()))
+        except (OSError, KeyError, ValueError):
+            return cls()
+        idx._reindex()
+        return idx
+
+
+# -----------------
+# Module-level helpers
+# -----------------
+_CURRENT: Dict[str, Any] = {"index": None, "mtime": None}
+
+
+def update() -> Dict[str, int]:
+    """Load, sync with the appstats cache and save. Returns SimilarityIndex.update() stats."""
+    idx = SimilarityIndex.load()
+    stats = idx.update()
+    if stats["added"] or stats["updated"] or stats["removed"] or stats["projected"]:
+        idx.save()
+    _CURRENT.update(index=idx, mtime=_mtime())
+    return stats
+
+
+def _mtime() -> Optional[float]:
+    try:
+        return cfg.SIMILARITY_INDEX_PATH.stat().st_mtime
+    except OSError:
+        return None
+
+
+def current() -> SimilarityIndex:
+    """The stored index, loaded once per process and reloaded when the file changes (no sync)."""
+    mtime = _mtime()
+    if _CURRENT["index"] is None or mtime != _CURRENT["mtime"]:
+        _CURRENT.update(index=SimilarityIndex.load(), mtime=mtime)
+    return _CURRENT["index"]
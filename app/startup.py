@@ -0,0 +1,74 @@
+# app/startup.py
+"""
+Import-time profile of the CLI (python -m app.main --startup-profile).
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter (same
+cwd and environment) and condenses the per-module report into:
+
+- total     cumulative microseconds of the `app.main` import itself
+- modules   the slowest imports by self time
+- packages  self time summed per top-level package (stdlib modules included)
+
+Nothing heavy (requests, numpy, PIL, llama_cpp) should appear here: those are
+imported by the first call that needs them. scripts/check_startup.py keeps the
+wall time of --help and a cached --daily under a budget.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+TARGET = "app.main"
+
+
+def importtime(target: str = TARGET) -> List[Dict[str, Any]]:
+    """[{module, self_us, cumulative_us, depth}] in import order, from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {target} failed:\n{proc.stderr.strip()[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]                        # nesting is two spaces per level after "| "
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cum_us),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return rows
+
+
+def profile(target: str = TARGET, *, top: int = 15) -> Dict[str, Any]:
+    rows = importtime(target)
+    total = next((r["cumulative_us"] for r in rows if r["module"] == target), 0)
+    packages: Dict[str, int] = {}
+    for r in rows:
+        pkg = r["module"].split(".")[0]
+        packages[pkg] = packages.get(pkg, 0) + r["self_us"]
+    return {
+        "target": target,
+        "total_us": total,
+        "imported": len(rows),
+        "modules": sorted(rows, key=lambda r: r["self_us"], reverse=True)[:top],
+        "packages": sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top],
+    }
+
+
+def report(target: str = TARGET, *, top: int = 15) -> Dict[str, Any]:
+    p = profile(target, top=top)
+    print(f"[startup] import {p['target']}: {p['total_us'] / 1000:.1f}ms, {p['imported']} modules")
+    print("[startup] slowest modules (self):")
+    for r in p["modules"]:
+        print(f"  {r['self_us'] / 1000:7.2f}ms  {r['module']}  (cumulative {r['cumulative_us'] / 1000:.2f}ms)")
+    print("[startup] by top-level package (self, summed):")
+    for pkg, us in p["packages"]:
+        print(f"  {us / 1000:7.2f}ms  {pkg}")
+    return p
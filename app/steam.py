@@ -5,38 +5,42 @@ Steam helpers for Hidden Gem Games with caching and careful rate limiting.
 Public API (used by app/main.py):
 - get_applist()
 - get_appdetails(appid)                 # cached
+- get_appdetails_cached(appid)          # cache only, no network
 - get_review_summary_safe(appid)        # cached
 - get_review_snippets_safe(appid, max_items=20)
 - build_candidate_pool(apps, min_reviews=30, block_nsfw=True, cap=None, sample_size=None, batch_size=None, wait_s=None)
-- pick_from_pool(pool)
+                                        # -> candidate records for storage.merge_candidate_pool
+- pick_from_pool(pool)                   # weighted by the pool's stored scores (app/scoring.py)
+- pick_many_from_pool(pool, n, exclude=None)   # distinct picks, same weights
 
 Strategy:
-- Two-phase harvest: details -> quick filters -> review summary
-- On-disk caching to avoid repeat hits (content/data/appstats, content/data/reviewsum)
+- Two-phase harvest: details -> quick filters (app/rules.py, from config) -> review summary
+- Known outcomes (app/outcomes.py) let the sampler skip already-judged apps before any I/O
+- Adaptive sampling (app/sampler.py) steers the budget toward high-yield applist strata
+- On-disk caching to avoid repeat hits (<cache>/appstats, <cache>/reviewsum; see config.CACHE_DIR)
 - Strict per-minute rate gate + small per-run chunks to avoid 429s
 """
 import os
-import json
 import time
 import random
+import threading
 from random import SystemRandom
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 from collections import deque
 
-import requests
+from . import cache, outcomes, rules, sampler, storage
+from . import config as cfg
 
 # ---------- Config / knobs ----------
 
-SESSION = requests.Session()
-SESSION.headers.update({"User-Agent": "HiddenGemGames/1.0 (+https://example.com)"})
+USER_AGENT = "HiddenGemGames/1.0 (+https://example.com)"
+_SESSION = None                    # requests.Session, created by the first request (see session())
+_SESSION_LOCK = threading.Lock()
 
-DATA_DIR = Path("content/data")
-APPSTATS_DIR = DATA_DIR / "appstats"
-REVIEWSUM_DIR = DATA_DIR / "reviewsum"
-
-APPSTATS_DIR.mkdir(parents=True, exist_ok=True)
-REVIEWSUM_DIR.mkdir(parents=True, exist_ok=True)
+DATA_DIR = cfg.CACHE_DIR
+APPSTATS_DIR = cfg.APPSTATS_DIR    # created by cache.write_record on first write
+REVIEWSUM_DIR = cfg.REVIEWSUM_DIR
 
 # Sample sizes / pacing
 POOL_SAMPLE_CAP = 10_000           # max apps to sample from applist before phase filters
@@ -46,37 +50,55 @@ PAUSE           = 0.15             # tiny pause after individual requests
 
 # Rate limiting (per-minute gate for steam endpoints we hit frequently)
 REQS_PER_MIN = 60
-_REQ_TIMES: deque[float] = deque(maxlen=REQS_PER_MIN)
+_REQ_TIMES: deque[float] = deque(maxlen=REQS_PER_MIN)   # start times of the last N requests
+REQUEST_COUNT = 0                  # network requests issued by this process
+_GATE_LOCK = threading.Lock()      # daily pipeline / background harvest threads share both
 
 rng = SystemRandom()
 
 
+def session():
+    """The shared HTTP session; `requests` is only imported once something goes to the network."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                import requests
+
+                s = requests.Session()
+                s.headers.update({"User-Agent": USER_AGENT})
+                _SESSION = s
+    return _SESSION
+
+
 def _rate_gate():
-    """Very simple per-minute request gate."""
-    now = time.time()
-    _REQ_TIMES.append(now)
-    if len(_REQ_TIMES) == _REQ_TIMES.maxlen:
-        # enforce that the first of the last N requests was >= 60s ago
-        earliest = _REQ_TIMES[0]
-        delta = now - earliest
-        if delta < 60.0:
-            sleep_for = 60.0 - delta
+    """
+    Very simple per-minute request gate, safe across threads: each caller
+    reserves its start time under the lock (no earlier than 60s after the
+    request N places back), then sleeps outside it.
+    """
+    global REQUEST_COUNT
+    with _GATE_LOCK:
+        now = time.time()
+        start = now
+        if len(_REQ_TIMES) == _REQ_TIMES.maxlen:
             # nudge a bit to avoid nudging right into boundary
-            sleep_for = max(0.0, sleep_for) + 0.05
-            time.sleep(sleep_for)
+            start = max(now, _REQ_TIMES[0] + 60.0 + 0.05)
+        _REQ_TIMES.append(start)
+        REQUEST_COUNT += 1
 
     # also a tiny random pause to de-sync with other runs
-    time.sleep(PAUSE)
+    time.sleep(start - now + PAUSE)
 
 
 def _get(url: str, params: Optional[dict] = None, retries: int = 3, backoff: float = 0.7) -> Optional[dict]:
-    """HTTP GET with small retry and our gate."""
+    """HTTP GET with small retry and our gate (which also counts the request)."""
     attempt = 0
     exc: Optional[Exception] = None
     while attempt <= retries:
         try:
             _rate_gate()
-            res = SESSION.get(url, params=params, timeout=30)
+            res = session().get(url, params=params, timeout=30)
             if res.status_code == 200:
                 try:
                     return res.json()
@@ -101,26 +123,22 @@ def _get(url: str, params: Optional[dict] = None, retries: int = 3, backoff: flo
 
 # ---------- Caching helpers ----------
 
-def _read_json(path: Path) -> Optional[dict]:
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
+# Records may be plain JSON or compressed (.json.zst / .json.gz); app/cache.py
+# picks the codec on write and decodes whatever variant is on disk on read.
+
+def _read_json(path: Path, *, touch_hit: bool = False) -> Optional[dict]:
+    return cache.read_record(path, touch_hit=touch_hit)
 
 
 def _write_json(path: Path, obj: dict) -> None:
-    tmp = path.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, separators=(",", ":"), ensure_ascii=False)
-    tmp.replace(path)
+    cache.write_record(path, obj)
 
 
 # ---------- Public: applist ----------
 
 def get_applist() -> List[Dict[str, Any]]:
     """Fetch the full Steam applist (id + name). Cached on disk."""
-    path = DATA_DIR / "applist.json"
+    path = cfg.APPLIST_CACHE
     cached = _read_json(path)
     if isinstance(cached, list) and cached:
         return cached  # already a list of dicts
@@ -142,7 +160,7 @@ def _appstats_path(appid: int) -> Path:
 def get_appdetails(appid: int) -> Optional[dict]:
     """Steam appdetails with aggressive on-disk caching."""
     path = _appstats_path(appid)
-    cached = _read_json(path)
+    cached = _read_json(path, touch_hit=True)
     if cached is not None:
         return cached
 
@@ -154,6 +172,11 @@ def get_appdetails(appid: int) -> Optional[dict]:
     return data
 
 
+def get_appdetails_cached(appid: int) -> Optional[dict]:
+    """Cached appdetails only; never touches the network."""
+    return _read_json(_appstats_path(appid))
+
+
 # ---------- Public: review summary + snippets (cached) ----------
 
 def _reviewsum_path(appid: int) -> Path:
@@ -166,7 +189,7 @@ def get_review_summary_safe(appid: int) -> Optional[dict]:
     Cached to disk.
     """
     path = _reviewsum_path(appid)
-    cached = _read_json(path)
+    cached = _read_json(path, touch_hit=True)
     if cached is not None:
         return cached
 
@@ -214,8 +237,11 @@ def get_review_snippets_safe(appid: int, max_items: int = 20) -> List[str]:
 def _unwrap_details(data: dict) -> Tuple[bool, dict]:
     """
     appdetails returns {"<appid>": {"success": true, "data": {...}}}
+    Older caches hold the bare payload; accept that too.
     Return (ok, payload)
     """
+    if isinstance(data, dict) and "type" in data and "steam_appid" in data:
+        return True, data
     try:
         key = next(iter(data.keys()))
         entry = data[key]
@@ -224,64 +250,81 @@ def _unwrap_details(data: dict) -> Tuple[bool, dict]:
         return False, {}
 
 
-def _is_viable_game(payload: dict) -> bool:
-    """Rough filters to avoid tools, videos, DLC-only, etc."""
-    t = (payload.get("type") or "").lower()
-    genres = [g.get("description", "").lower() for g in payload.get("genres", []) if isinstance(g, dict)]
-    categories = [c.get("description", "").lower() for c in payload.get("categories", []) if isinstance(c, dict)]
-
-    if t not in ("game", "dlc"):
-        return False
-    bad_genres = {"accounting", "video production", "tutorial", "software"}
-    if any(g in bad_genres for g in genres):
-        return False
-    bad_cats = {"video", "trailer", "software training"}
-    if any(c in bad_cats for c in categories):
+def _is_failed_details(data: dict) -> bool:
+    """True when Steam answered but marked the app unavailable (success=false)."""
+    try:
+        entry = next(iter(data.values()))
+        return isinstance(entry, dict) and entry.get("success") is False
+    except Exception:
         return False
-    return True
 
 
-def _is_nsfw(payload: dict) -> bool:
-    """Basic NSFW detection based on Steam flags/genres/categories."""
-    # Normalize content descriptor IDs to lowercase strings
-    ids_raw = (payload.get("content_descriptors") or {}).get("ids", [])
-    if isinstance(ids_raw, (int, str)):
-        ids_raw = [ids_raw]
-    flags = {str(x).strip().lower() for x in ids_raw if x is not None}
-
-    # Also look at genres/categories text
-    genres_txt = " ".join(
-        g.get("description", "") for g in (payload.get("genres") or []) if isinstance(g, dict)
-    )
-    cats_txt = " ".join(
-        c.get("description", "") for c in (payload.get("categories") or []) if isinstance(c, dict)
-    )
-    text = f"{genres_txt} {cats_txt}".lower()
+def _is_viable_game(payload: dict) -> bool:
+    """Not a tool, video, soundtrack etc. (config.FILTER_RULES["reject"], see app/rules.py)."""
+    return rules.reject_reason(payload) is None
 
-    nsfw_words = ("adult", "sexual", "sex", "nudity", "nsfw", "hentai", "porn")
-    if any(w in text for w in nsfw_words):
-        return True
 
-    # Some stores use small integer codes for mature content
-    if "2" in flags:
-        return True
+def _is_nsfw(payload: dict) -> bool:
+    """Adult content by descriptor/genre ids or text (config.FILTER_RULES["nsfw"])."""
+    return rules.nsfw_reason(payload) is not None
 
-    return False
 
+def _total_reviews(summary: Optional[dict]) -> int:
+    try:
+        return int((summary or {}).get("query_summary", {}).get("total_reviews", 0))
+    except Exception:
+        return 0
 
 
 def _passes_review_threshold_cached(appid: int, min_reviews: int) -> Tuple[bool, Optional[dict]]:
     """Return (passes, payload) for the summary threshold."""
     data = get_review_summary_safe(appid)
-    try:
-        total = int((data or {}).get("query_summary", {}).get("total_reviews", 0))
-    except Exception:
-        total = 0
-    return (total >= min_reviews), data
+    return (_total_reviews(data) >= min_reviews), data
 
 
 # ---------- Candidate pool (weekly) ----------
 
+def _candidate_record(appid: int, payload: dict, summary: Optional[dict], *, passed: bool) -> Dict[str, Any]:
+    """Slim per-candidate features stored in the pool (see storage.POOL_FIELDS)."""
+    qs = (summary or {}).get("query_summary") or {}
+    price = payload.get("price_overview") or {}
+    now = int(time.time())
+    return {
+        "appid": int(appid),
+        "name": payload.get("name"),
+        "type": payload.get("type"),
+        "genres": [int(g["id"]) for g in payload.get("genres") or [] if str(g.get("id", "")).isdigit()],
+        "categories": [int(c["id"]) for c in payload.get("categories") or [] if str(c.get("id", "")).isdigit()],
+        "publisher": next(iter(payload.get("publishers") or []), None),
+        "release_date": (payload.get("release_date") or {}).get("date"),
+        "is_free": bool(payload.get("is_free", False)),
+        "price_cents": price.get("final"),
+        "total_reviews": qs.get("total_reviews"),
+        "total_positive": qs.get("total_positive"),
+        "review_score": qs.get("review_score"),
+        "passed": bool(passed),
+        "first_seen": now,
+        "last_verified": now,
+    }
+
+
+def _known_record(appid: int) -> Dict[str, Any]:
+    """
+    Pool record for an app already known to be accepted, built from the caches
+    (no network) so it can be scored; bare {"appid"} when they are gone.
+    last_verified is the age of the older cache entry, not now.
+    """
+    ok, payload = _unwrap_details(get_appdetails_cached(appid) or {})
+    summary = _read_json(_reviewsum_path(appid))
+    found = [cache.find_record(_appstats_path(appid)), cache.find_record(_reviewsum_path(appid))]
+    if not ok or summary is None or None in found:
+        return {"appid": appid}
+    rec = _candidate_record(appid, payload, summary, passed=True)
+    rec["last_verified"] = int(min(f.stat().st_mtime for f in found))
+    del rec["first_seen"]
+    return rec
+
+
 def build_candidate_pool(
     apps: List[Dict[str, Any]],
     *,
@@ -291,7 +334,17 @@ def build_candidate_pool(
     sample_size: Optional[int] = None,
     batch_size: Optional[int] = None,
     wait_s: Optional[float] = None,
-) -> List[int]:
+    adaptive: bool = True,
+    state_dir: Optional[Path] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Harvest candidate records (appid + slim features, see _candidate_record).
+    Apps already known to be accepted come back rebuilt from the caches (see
+    _known_record), or as bare {"appid": ...} records (unscored, never picked);
+    merging into the stored pool is the caller's job (storage.merge_candidate_pool).
+    With state_dir (shard runs) outcomes, sampler deltas and run metrics are
+    written there instead of the shared files; see app/shards.py.
+    """
     if not apps:
         return []
 
@@ -299,19 +352,33 @@ def build_candidate_pool(
     effective_cap = sample_size if (sample_size is not None) else cap
     cap_val = int(effective_cap or POOL_SAMPLE_CAP)
 
-    # Random sample, then limit to a small chunk per run
-    sample = random.sample(apps, k=min(cap_val, len(apps)))
+    # Sample (bandit-allocated across strata, or uniform); known outcomes are
+    # skipped for free, and only apps that actually need I/O count against the chunk.
     chunk = int(batch_size or HARVEST_CHUNK)
-    sample = sample[:min(chunk, len(sample))]
+    strat = sampler.load()
+    if adaptive:
+        sample, report = strat.sample(apps, min(cap_val, len(apps)))
+        print(
+            f"[harvest] adaptive sampling over {report['strata']} strata | expected yield/request "
+            f"uniform={report['yield_uniform']:.4f} adaptive={report['yield_adaptive']:.4f}"
+        )
+    else:
+        sample = random.sample(apps, k=min(cap_val, len(apps)))
+        strat.group(apps)
 
-    pool: List[int] = []
-    viable_ids: List[int] = []        # <- keep viable survivors for fallback
+    known = outcomes.load()
+    pool: List[Dict[str, Any]] = []
+    viable: List[Dict[str, Any]] = []  # <- keep viable survivors for fallback
     checked_summaries = 0
+    probed = 0
+    skipped = 0
+    accepted_new = 0
+    rejected_by: Dict[str, int] = {}
+    requests_start = REQUEST_COUNT
 
-    for idx, app in enumerate(sample, 1):
-        appid = app.get("appid")
-        if not appid:
-            continue
+    def _probe(appid: int) -> Optional[Dict[str, Any]]:
+        """Details -> quick filters -> review summary. Returns the record when the app joins the pool."""
+        nonlocal checked_summaries
 
         # Details (cached)
         details = get_appdetails(appid)
@@ -319,32 +386,90 @@ def build_candidate_pool(
         # UNWRAP the appdetails response before applying filters
         ok, payload = _unwrap_details(details or {})
         if not ok:
+            if details is not None and _is_failed_details(details):
+                known.record(appid, "failed")
+            return None
+
+        # Quick filters (the rule that fired is tallied for the run summary)
+        reason = rules.reject_reason(payload)
+        if reason is None:
+            nsfw = rules.nsfw_reason(payload)
+            if nsfw is not None:
+                known.record(appid, "nsfw")
+                reason = nsfw if block_nsfw else None
+        else:
+            known.record(appid, "rejected")
+        if reason is not None:
+            rejected_by[reason] = rejected_by.get(reason, 0) + 1
+            return None
+
+        # Keep track of viable survivors regardless of review threshold
+        viable.append(_candidate_record(appid, payload, None, passed=False))
+
+        # Only fetch summary for survivors, capped
+        if checked_summaries >= POOL_SUMMARY_CAP:
+            return None
+        passed, summary = _passes_review_threshold_cached(appid, min_reviews)
+        checked_summaries += 1
+        if summary is not None:
+            known.record(appid, "accepted" if passed else "below", min_reviews=min_reviews)
+        return _candidate_record(appid, payload, summary, passed=True) if passed else None
+
+    for app in sample:
+        if probed >= chunk:
+            break
+        appid = app.get("appid")
+        if not appid:
             continue
 
-        # Quick filters
-        if not _is_viable_game(payload):
+        # Constant-time check before touching disk or network
+        outcome = known.classify(appid, min_reviews=min_reviews, block_nsfw=block_nsfw)
+        if outcome == "accepted":
+            pool.append(_known_record(int(appid)))
             continue
-        if block_nsfw and _is_nsfw(payload):
+        if outcome is not None:
+            skipped += 1
             continue
 
-        # Keep track of viable survivors regardless of review threshold
-        viable_ids.append(int(appid))
-
-        # Only fetch summary for survivors, capped
-        if checked_summaries < POOL_SUMMARY_CAP:
-            passed, _summary = _passes_review_threshold_cached(appid, min_reviews)
-            checked_summaries += 1
-            if passed:
-                pool.append(int(appid))
+        probed += 1
+        requests_before = REQUEST_COUNT
+        record = None
+        try:
+            record = _probe(int(appid))
+        finally:
+            strat.observe(app, accepted=record is not None, requests=REQUEST_COUNT - requests_before)
+        if record is not None:
+            pool.append(record)
+            accepted_new += 1
 
         # Gentle pacing every N items
-        if idx % 40 == 0:
+        if probed % 40 == 0:
             time.sleep(float(wait_s) if (wait_s is not None) else 0.8)
 
+    spent = REQUEST_COUNT - requests_start
+    if state_dir is not None:
+        outcomes.save(known, state_dir / "outcomes.json")
+        sampler.save(strat, state_dir / "sampler_stats.json", delta=True)
+        storage.save_json(state_dir / "metrics.json", {
+            "probed": probed, "skipped_known": skipped, "accepted": len(pool),
+            "accepted_new": accepted_new, "requests": spent, "rejected_by": rejected_by,
+        })
+    else:
+        if known.dirty:
+            outcomes.save(known)
+        sampler.save(strat)
+    observed = (accepted_new / spent) if spent else 0.0
+    print(
+        f"[harvest] probed={probed} skipped_known={skipped} accepted={len(pool)} "
+        f"requests={spent} observed yield/request={observed:.4f}"
+    )
+    if rejected_by:
+        print("[harvest] rejected by rule: " + " ".join(f"{k}={v}" for k, v in sorted(rejected_by.items())))
+
     # Cold-start fallback: if nothing passed the review threshold in this small batch,
     # return the viable survivors so the pool is not empty.
-    if not pool and viable_ids:
-        pool = viable_ids[: min(100, len(viable_ids))]
+    if not pool and viable:
+        pool = viable[: min(100, len(viable))]
 
     random.shuffle(pool)
     return pool
@@ -385,20 +510,25 @@ def _normalize_pool_to_appids(pool) -> List[int]:
     return appids
 
 
-def _weight_for_app(appid: int) -> float:
+def _pool_weights(pool) -> Optional[Dict[int, float]]:
     """
-    Optionally derive a weight from cached review stats (more reviews => slightly lower weight
-    to bias toward smaller-but-viable titles). If we don't have data, return a small default.
+    Sampling weights from the scores stored in the pool (app/scoring.py); no cache reads.
+    Only records that passed the gates are in the map (or, while none has, the
+    cold-start fallbacks at a floor weight). None when the pool carries no scores
+    at all (a bare list of appids): then every id is equally likely.
     """
-    data = get_review_summary_safe(appid) or {}
-    try:
-        total = int((data.get("query_summary") or {}).get("total_reviews", 0))
-    except Exception:
-        total = 0
-    if total <= 0:
-        return 1.0
-    # simple inverse square root scaling
-    return max(0.01, 1.0 / (total ** 0.5))
+    from . import scoring  # local import: numpy is only needed when picking
+
+    items = (pool.get("items") or []) if isinstance(pool, dict) else (pool if isinstance(pool, list) else [])
+    if not any(isinstance(it, dict) and "score" in it for it in items):
+        return None
+    return scoring.weights(items)
+
+
+def pickable_ids(pool) -> set:
+    """Appids the pickers may return: scored above 0 (else the cold-start fallbacks), or every id of an unscored pool."""
+    weight_map = _pool_weights(pool)
+    return set(_normalize_pool_to_appids(pool)) if weight_map is None else set(weight_map)
 
 
 def pick_from_pool(
@@ -411,31 +541,58 @@ def pick_from_pool(
     Pick an appid from a harvested pool (daily choice).
     - pool can be a list[int], list[dict], or a dict with items:[]
     - exclude: appids to avoid this run (best effort; if it empties the pool we ignore it)
+    Gated and unscored records are never picked (cold-start fallbacks only while
+    nothing scored exists); ValueError when nothing else is left.
     """
     # Normalize the pool into a list of appids
     normalized = _normalize_pool_to_appids(pool)
     if not normalized:
         raise ValueError("Candidate pool empty after normalization.")
 
+    weight_map = _pool_weights(pool)
+    if weight_map is not None:
+        normalized = [aid for aid in normalized if aid in weight_map]
+        if not normalized:
+            raise ValueError("No candidate in the pool passed the gates (all gated or unscored).")
+
     # Apply exclusion but don't let it empty the pool
     exclude_set = set(exclude or [])
     candidates = [aid for aid in normalized if aid not in exclude_set]
     if not candidates:
-        # All candidates were excluded; fall back to using the full pool
+        # All candidates were excluded; fall back to using the full (gated) pool
         # so the daily job still produces a post instead of failing.
         candidates = normalized
 
-    # Optionally compute weights (cheap: only for the first 500 candidates)
-    weight_map = {}
-    if use_weights:
-        for aid in candidates[:500]:
-            weight_map[aid] = _weight_for_app(aid)
+    # Weighted by the precomputed hidden-gem score
+    if use_weights and weight_map is not None:
+        return random.choices(candidates, weights=[weight_map[aid] for aid in candidates], k=1)[0]
 
-    if use_weights and weight_map:
-        weights = [weight_map.get(aid, 0.01) for aid in candidates]
-        import random
-        return random.choices(candidates, weights=weights, k=1)[0]
-
-    # Fallback: uniform pick
+    # Unscored pool / unweighted: uniform pick
     return rng.choice(candidates)
 
+
+
+def pick_many_from_pool(
+    pool,
+    n: int,
+    *,
+    use_weights: bool = True,
+    exclude: Optional[List[int]] = None,
+) -> List[int]:
+    """
+    Pick up to n distinct appids in one pass (weighted sampling without replacement).
+    Unlike pick_from_pool, excluded ids are never used as a fallback. Gated and
+    unscored records are never picked, so fewer than n ids may come back.
+    """
+    exclude_set = set(exclude or [])
+    weight_map = _pool_weights(pool)
+    candidates = [
+        aid for aid in _normalize_pool_to_appids(pool)
+        if aid not in exclude_set and (weight_map is None or aid in weight_map)
+    ]
+    if not use_weights or weight_map is None:
+        rng.shuffle(candidates)
+        return candidates[: max(0, int(n))]
+    # Efraimidis–Spirakis: top-n of u^(1/w) is a weighted sample without replacement
+    keyed = sorted(candidates, key=lambda aid: rng.random() ** (1.0 / weight_map[aid]), reverse=True)
+    return keyed[: max(0, int(n))]
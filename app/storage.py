@@ -7,6 +7,7 @@ import tempfile
 from pathlib import Path
 from typing import Any, Optional
 from datetime import datetime, timezone
+from . import cache
 from . import config as cfg
 
 # Base data dir used by the project
@@ -21,15 +22,15 @@ CANDIDATE_POOL_META_PATH = POOL_META_PATH
 # Expose the posts directory so main.py can write posts via storage
 POST_DIR = cfg.POST_DIR  # e.g., content/posts
 
-# Default file locations
+# Default file locations (caches live outside the committed tree, see config.CACHE_DIR)
 POOL_PATH       = DATA_DIR / "candidate_pool.json"
 POOL_META_PATH  = DATA_DIR / "pool_meta.json"
-APPLIST_PATH    = DATA_DIR / "applist.json"
-APPSTATS_DIR    = DATA_DIR / "appstats"
-SUMMARIES_DIR   = DATA_DIR / "summaries"
+APPLIST_PATH    = cfg.APPLIST_CACHE
+APPSTATS_DIR    = cfg.APPSTATS_DIR
+SUMMARIES_DIR   = cfg.SUM_CACHE_DIR
 
-APPSTATS_DIR.mkdir(parents=True, exist_ok=True)
-SUMMARIES_DIR.mkdir(parents=True, exist_ok=True)
+# Nothing is created at import time: every writer below (and cache.write_record)
+# creates the parent directory of the file it writes.
 
 
 # --------------------
@@ -43,6 +44,11 @@ def _atomic_write(path: Path, text: str) -> None:
     tmp.replace(path)
 
 
+def write_text(path: Path, text: str) -> None:
+    """Atomically replace a text file (readers never see a half-written post)."""
+    _atomic_write(path, text)
+
+
 def save_json(path: Path, obj: Any) -> None:
     _atomic_write(path, json.dumps(obj, ensure_ascii=False, indent=2))
 
@@ -59,35 +65,135 @@ def load_json(path: Path, default: Any = None) -> Any:
 # -------------
 # Pool handling
 # -------------
-def save_candidate_pool(pool: dict) -> None:
+# On disk the pool is columnar JSON (one list per field) so it stays small and loads
+# with a single parse; in memory it is {"version": 2, "items": [record, ...]}.
+POOL_VERSION = 2
+POOL_FIELDS = (
+    "appid", "name", "type", "genres", "categories", "publisher", "release_date",
+    "is_free", "price_cents", "total_reviews", "total_positive", "review_score",
+    "passed", "first_seen", "last_verified", "score",
+)
+
+
+def _pool_items(pool: Any) -> list[dict]:
+    """Accept the in-memory dict, a columnar dict, or a legacy bare list."""
+    if isinstance(pool, dict):
+        if "columns" in pool:
+            cols = pool.get("columns") or {}
+            appids = cols.get("appid") or []
+            return [
+                {f: (cols.get(f) or [None] * len(appids))[i] for f in POOL_FIELDS}
+                for i in range(len(appids))
+            ]
+        raw = pool.get("items") or pool.get("candidates") or []
+    elif isinstance(pool, list):
+        raw = pool
+    else:
+        raw = []
+    items: list[dict] = []
+    for it in raw:
+        rec = dict(it) if isinstance(it, dict) else {"appid": it}
+        try:
+            rec["appid"] = int(rec.get("appid", rec.get("id")))
+        except (TypeError, ValueError):
+            continue
+        rec.pop("id", None)
+        items.append(rec)
+    return items
+
+
+def save_candidate_pool(pool: Any, *, stats: Optional[dict] = None) -> None:
     """
-    Persist the candidate pool and lightweight metadata.
+    Persist the candidate pool (columnar, versioned) and lightweight metadata.
     """
     now = datetime.now(timezone.utc).isoformat()
-    # store pool
-    save_json(POOL_PATH, pool)
+    items = _pool_items(pool)
+    columns = {f: [it.get(f) for it in items] for f in POOL_FIELDS}
+    doc = {"version": POOL_VERSION, "updated": now, "size": len(items), "columns": columns}
+    _atomic_write(POOL_PATH, json.dumps(doc, ensure_ascii=False, separators=(",", ":")))
     # store metadata (last refresh timestamp + counts)
-    meta = {
-        "last_refreshed": now,
-        "size": len(pool.get("candidates", [])) if isinstance(pool, dict) else None,
-    }
+    meta = {"last_refreshed": now, "size": len(items), "version": POOL_VERSION}
+    meta.update(stats or {})
     save_json(POOL_META_PATH, meta)
 
 
 def load_candidate_pool(default: Optional[dict] = None) -> Optional[dict]:
-    return load_json(POOL_PATH, default=default)
+    data = load_json(POOL_PATH, default=None)
+    if data is None:
+        return default
+    return {"version": POOL_VERSION, "items": _pool_items(data)}
+
+
+def merge_candidate_pool(
+    existing: Any,
+    fresh: list[dict],
+    *,
+    now: Optional[float] = None,
+    target_size: Optional[int] = None,
+    stale_secs: Optional[int] = None,
+) -> tuple[dict, dict]:
+    """
+    Merge freshly harvested records into the existing pool.
+    - known appids keep first_seen and take the newer features + last_verified
+    - records older than stale_secs (by last_verified) are evicted
+    - above target_size the least recently verified records go first
+    - cold-start fallbacks (passed=False) only survive while nothing has passed
+    Returns (pool, stats).
+    """
+    now = float(now if now is not None else datetime.now(timezone.utc).timestamp())
+    target_size = int(target_size if target_size is not None else cfg.POOL_TARGET_SIZE)
+    stale_secs = int(stale_secs if stale_secs is not None else cfg.POOL_STALE_SECS)
+
+    by_id: dict[int, dict] = {it["appid"]: it for it in _pool_items(existing)}
+    before = len(by_id)
+    added = refreshed = 0
+    for rec in _pool_items(fresh):
+        old = by_id.get(rec["appid"])
+        if old is None:
+            rec.setdefault("first_seen", int(now))
+            rec.setdefault("last_verified", int(now))
+            by_id[rec["appid"]] = rec
+            added += 1
+        elif rec.get("last_verified") is not None:
+            merged = {**old, **{k: v for k, v in rec.items() if v is not None}}
+            merged["first_seen"] = old.get("first_seen") or rec.get("first_seen")
+            by_id[rec["appid"]] = merged
+            refreshed += 1
+
+    items = list(by_id.values())
+    if any(it.get("passed") is not False for it in items):
+        items = [it for it in items if it.get("passed") is not False]
+
+    fresh_enough = [it for it in items if now - (it.get("last_verified") or now) <= stale_secs]
+    evicted_stale = len(items) - len(fresh_enough)
+    fresh_enough.sort(key=lambda it: it.get("last_verified") or 0, reverse=True)
+    kept = fresh_enough[:target_size]
+
+    stats = {
+        "before": before,
+        "added": added,
+        "refreshed": refreshed,
+        "evicted_stale": evicted_stale,
+        "evicted_size": len(fresh_enough) - len(kept),
+        "size": len(kept),
+    }
+    return {"version": POOL_VERSION, "items": kept}, stats
 
 
 # -----------------
 # App list / stats
 # -----------------
+# Cache records go through app/cache.py (any codec, memoised in-process);
+# the returned objects are shared, so callers must not mutate them.
 def save_applist(applist: list[dict]) -> None:
-    save_json(APPLIST_PATH, {"apps": applist})
+    cache.write_record(APPLIST_PATH, applist)
 
 
 def load_applist() -> list[dict]:
-    data = load_json(APPLIST_PATH, default={"apps": []})
-    return data.get("apps", [])
+    data = cache.read_record(APPLIST_PATH)
+    if isinstance(data, dict):  # legacy {"apps": [...]}
+        data = data.get("apps")
+    return data if isinstance(data, list) else []
 
 
 def appstats_path(appid: int | str) -> Path:
@@ -95,11 +201,12 @@ def appstats_path(appid: int | str) -> Path:
 
 
 def load_appstats(appid: int | str, default: Any = None) -> Any:
-    return load_json(appstats_path(appid), default=default)
+    data = cache.read_record(appstats_path(appid))
+    return default if data is None else data
 
 
 def save_appstats(appid: int | str, stats: Any) -> None:
-    save_json(appstats_path(appid), stats)
+    cache.write_record(appstats_path(appid), stats)
 
 
 # -----------------
@@ -110,11 +217,12 @@ def summaries_path(appid: int | str) -> Path:
 
 
 def load_summary(appid: int | str, default: Any = None) -> Any:
-    return load_json(summaries_path(appid), default=default)
+    data = cache.read_record(summaries_path(appid))
+    return default if data is None else data
 
 
 def save_summary(appid: int | str, data: Any) -> None:
-    save_json(summaries_path(appid), data)
+    cache.write_record(summaries_path(appid), data)
 
 
 # -----------------
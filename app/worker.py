@@ -0,0 +1,190 @@
+# app/worker.py
+"""
+Long-running worker: keeps the applist, the pool, the cache memo (cache.MEMO,
+which holds recent appdetails) and the HTTP session warm, and serves commands over line-delimited JSON-RPC.
+
+Transports:
+- stdin/stdout (default): one JSON request per line, one JSON response per line
+- Unix socket (--socket PATH): same protocol, one or more requests per connection
+
+Request:  {"id": 1, "method": "daily", "params": {}}
+Response: {"id": 1, "result": {...}, "ms": 12.3}  or  {"id": 1, "error": "...", "ms": ...}
+
+Methods: ping, stats, harvest, daily, render, refresh, shutdown.
+Command output (the usual [harvest]/[daily] log lines) goes to stderr so stdout
+stays a clean response stream. Commands are serialised with a lock; state is
+reloaded when the underlying files change on disk.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from . import config as cfg
+from . import cache, steam, storage
+
+class _Watched:
+    """A value loaded from a file and reloaded when the file's mtime changes."""
+
+    def __init__(self, path: Path, loader: Callable[[], Any]):
+        self.path = path
+        self.loader = loader
+        self.value: Any = None
+        self.mtime: Optional[float] = None
+        self.loads = 0
+
+    def get(self) -> Any:
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            mtime = None
+        if self.value is None or mtime != self.mtime:
+            self.value = self.loader()
+            self.mtime = mtime
+            self.loads += 1
+        return self.value
+
+    def invalidate(self) -> None:
+        self.value = None
+
+
+class WorkerState:
+    def __init__(self):
+        self.applist = _Watched(cfg.APPLIST_CACHE, steam.get_applist)
+        self.pool = _Watched(storage.POOL_PATH, lambda: storage.load_candidate_pool(default={}))
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.commands = 0
+        self.running = True
+
+    def appdetails(self, appid: int) -> Optional[dict]:
+        """steam.get_appdetails; repeat reads are served (and invalidated on write) by cache.MEMO."""
+        return steam.get_appdetails(appid)
+
+    # ----- methods
+    def ping(self) -> dict:
+        return {"ok": True}
+
+    def stats(self) -> dict:
+        pool = self.pool.value or {}
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "commands": self.commands,
+            "applist_loaded": self.applist.value is not None,
+            "applist_loads": self.applist.loads,
+            "pool_size": len(pool.get("items") or []),
+            "pool_loads": self.pool.loads,
+            "memo": cache.MEMO.stats(),
+            "steam_requests": steam.REQUEST_COUNT,
+        }
+
+    def harvest(self, **params) -> dict:
+        from . import main
+
+        main.run_harvest(
+            min_reviews=int(params.get("min_reviews", 80)),
+            block_nsfw=not params.get("allow_nsfw", False),
+            max_apps_to_check=params.get("max_apps", 1500),
+            batch_size=int(params.get("batch_size", 20)),
+            wait_s=float(params.get("wait_s", 2.0)),
+            adaptive=not params.get("uniform", False),
+            apps=self.applist.get(),
+        )
+        self.pool.invalidate()
+        return {"pool_size": len(self.pool.get().get("items") or [])}
+
+    def daily(self) -> dict:
+        from . import main
+
+        path = main.run_daily(pool=self.pool.get(), fetch_details=self.appdetails)
+        return {"post": str(path) if path else None}
+
+    def render(self, appid: int) -> dict:
+        from . import main
+
+        data = main._details_payload(self.appdetails(int(appid)))
+        if not data:
+            raise RuntimeError(f"no appdetails for {appid}")
+        return {"post": str(main._write_post_from_appdetails(int(appid), data))}
+
+    def refresh(self) -> dict:
+        self.applist.invalidate()
+        self.pool.invalidate()
+        cache.MEMO.clear()
+        return {"ok": True}
+
+    def shutdown(self) -> dict:
+        self.running = False
+        return {"ok": True}
+
+    METHODS = ("ping", "stats", "harvest", "daily", "render", "refresh", "shutdown")
+
+    def handle(self, line: str) -> str:
+        t0 = time.perf_counter()
+        req_id = None
+        try:
+            req = json.loads(line)
+            req_id = req.get("id")
+            method = req.get("method")
+            if method not in self.METHODS:
+                raise ValueError(f"unknown method: {method!r}")
+            params: Dict[str, Any] = req.get("params") or {}
+            with self.lock, contextlib.redirect_stdout(sys.stderr):
+                result = getattr(self, method)(**params)
+                self.commands += 1
+            resp = {"id": req_id, "result": result}
+        except Exception as e:
+            resp = {"id": req_id, "error": f"{type(e).__name__}: {e}"}
+        resp["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return json.dumps(resp, ensure_ascii=False)
+
+
+def serve_stdio(state: WorkerState) -> None:
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        sys.stdout.write(state.handle(line) + "\n")
+        sys.stdout.flush()
+        if not state.running:
+            break
+
+
+def serve_socket(state: WorkerState, path: str) -> None:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8").strip()
+                if not line:
+                    continue
+                self.wfile.write((state.handle(line) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                if not state.running:
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    return
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    print(f"[worker] listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+
+
+def run_worker(socket_path: Optional[str] = None) -> None:
+    state = WorkerState()
+    if socket_path:
+        serve_socket(state, socket_path)
+    else:
+        serve_stdio(state)
@@ -10,6 +10,18 @@ SITEURL = ""                 # set only in publishconf.py
 PATH = "content"
 ARTICLE_PATHS = ["", "posts"]
 
+# content/data holds the candidate pool + seen-history; never scan it
+ARTICLE_EXCLUDES = ["pages", "data"]
+PAGE_EXCLUDES = ["data"]
+STATIC_EXCLUDES = ["data"]
+
+# Reuse parsed articles between builds (keyed on the source file's md5)
+CACHE_CONTENT = True
+LOAD_CONTENT_CACHE = True
+CONTENT_CACHING_LAYER = "reader"
+CHECK_MODIFIED_METHOD = "md5"
+CACHE_PATH = ".cache/pelican"
+
 MENUITEMS = [
     ("About", "/pages/about.html"),   # adjust path if your About page differs
     ("Past Games", "/archives.html"), # Pelican’s built-in archive page
@@ -1,3 +1,5 @@
+import os
+
 from pelicanconf import *
 
 from datetime import datetime
@@ -6,4 +8,5 @@ CURRENTYEAR = datetime.now().year
 # replace <USER> and <REPO> below
 SITEURL = "https://Bttlbmb.github.io/hiddengemgames"
 RELATIVE_URLS = False
-DELETE_OUTPUT_DIRECTORY = True
+# scripts/build_site.py sets HGG_INCREMENTAL=1 to keep the previous output around
+DELETE_OUTPUT_DIRECTORY = os.getenv("HGG_INCREMENTAL") != "1"
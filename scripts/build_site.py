@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Incremental Pelican build.
+
+Pelican re-renders every page on every run. This wrapper keeps a manifest of
+source hashes (posts, pages, theme, settings) next to Pelican's content cache and:
+
+- does a full build when there is no previous output, or when the theme, the
+  settings or any deleted/unslugged source changed;
+- otherwise passes --write-selected with only the changed posts plus the
+  listing pages they affect (index + pagination, archives, their category/tag
+  pages and feeds), so Pelican parses from its md5-keyed cache and writes a
+  handful of files instead of the whole site.
+
+After a successful build the static search index (app/search.py) is refreshed
+in <output>/search; only the shards that changed are rewritten. Then
+scripts/optimize_output.py fingerprints theme assets, minifies HTML/CSS and
+writes .gz/.br siblings.
+
+Usage: python scripts/build_site.py [--settings publishconf.py] [--output output] [--full]
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CONTENT = ROOT / "content"
+THEME = ROOT / "themes" / "hgg"
+MANIFEST = ROOT / ".cache" / "pelican" / "build_manifest.json"
+EXCLUDED = {"data"}
+PAGINATION = 10  # keep in sync with DEFAULT_PAGINATION in pelicanconf.py
+
+
+def _default_author() -> str:
+    m = re.search(r'^AUTHOR\s*=\s*["\'](.+?)["\']', (ROOT / "pelicanconf.py").read_text(encoding="utf-8"), re.M)
+    return m.group(1) if m else ""
+
+
+def _sha(path: Path) -> str:
+    return hashlib.md5(path.read_bytes()).hexdigest()
+
+
+def _sources() -> dict:
+    out = {}
+    for p in sorted(CONTENT.rglob("*.md")):
+        rel = p.relative_to(CONTENT)
+        if rel.parts[0] in EXCLUDED:
+            continue
+        out[str(rel)] = _sha(p)
+    return out
+
+
+def _global_inputs(settings: str) -> str:
+    h = hashlib.md5()
+    for p in sorted(THEME.rglob("*")) + [ROOT / "pelicanconf.py", ROOT / settings]:
+        if p.is_file():
+            h.update(str(p.relative_to(ROOT)).encode())
+            h.update(p.read_bytes())
+    return h.hexdigest()
+
+
+def _front_matter(path: Path) -> dict:
+    meta = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            break
+        m = re.match(r"^([A-Za-z_]+):\s*(.*)$", line)
+        if m:
+            meta[m.group(1).lower()] = m.group(2).strip()
+    return meta
+
+
+def _slugify(value: str) -> str:
+    return re.sub(r"[-\s]+", "-", re.sub(r"[^\w\s-]", "", value).strip().lower())
+
+
+def _paged(base: str, total: int) -> list:
+    """'index.html' -> ['index.html', 'index2.html', ...] for the given item count."""
+    stem, ext = os.path.splitext(base)
+    pages = max(1, math.ceil(total / PAGINATION))
+    return [base] + [f"{stem}{n}{ext}" for n in range(2, pages + 1)]
+
+
+def selected_outputs(changed: list, n_articles: int, output: Path) -> list:
+    """Output files touched by a set of changed posts; None if a full build is needed."""
+    sel = set(_paged("index.html", n_articles + 1))
+    sel.update({"archives.html", "categories.html", "tags.html", "authors.html"})
+    sel.update({"feeds/all.atom.xml"})
+    for rel in changed:
+        meta = _front_matter(CONTENT / rel)
+        slug = meta.get("slug")
+        if not slug or rel.startswith("pages/"):
+            return None
+        sel.add(f"{slug}.html")
+        cat = _slugify(meta.get("category", ""))
+        if cat:
+            sel.update(f"category/{p}" for p in _paged(f"{cat}.html", n_articles + 1))
+            sel.add(f"feeds/{cat}.atom.xml")
+        for tag in filter(None, (t.strip() for t in meta.get("tags", "").split(","))):
+            sel.update(f"tag/{p}" for p in _paged(f"{_slugify(tag)}.html", n_articles + 1))
+        author = meta.get("author") or _default_author()
+        if author:
+            sel.update(f"author/{p}" for p in _paged(f"{_slugify(author)}.html", n_articles + 1))
+    return sorted(str(output / s) for s in sel)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--settings", default="publishconf.py")
+    ap.add_argument("--output", default="output")
+    ap.add_argument("--full", action="store_true", help="Force a full rebuild.")
+    args = ap.parse_args(argv)
+
+    output = ROOT / args.output
+    prev = {}
+    if MANIFEST.exists():
+        try:
+            prev = json.loads(MANIFEST.read_text(encoding="utf-8"))
+        except Exception:
+            prev = {}
+
+    sources = _sources()
+    inputs = _global_inputs(args.settings)
+    old_sources = prev.get("sources", {})
+    changed = [rel for rel, h in sources.items() if old_sources.get(rel) != h]
+    removed = [rel for rel in old_sources if rel not in sources]
+
+    selected = None
+    if not args.full and output.is_dir() and prev.get("inputs") == inputs and not removed:
+        if not changed:
+            print("[build] nothing changed — output is up to date")
+            return 0
+        n_articles = sum(1 for rel in sources if not rel.startswith("pages/"))   # pages are not paginated
+        selected = selected_outputs(changed, n_articles, output)
+
+    cmd = [sys.executable, "-m", "pelican", str(CONTENT), "-s", args.settings, "-o", str(output)]
+    env = dict(os.environ)
+    if selected is not None:
+        env["HGG_INCREMENTAL"] = "1"
+        cmd += ["--write-selected", ",".join(selected)]
+        print(f"[build] incremental: {len(changed)} changed source(s), writing {len(selected)} file(s)")
+    else:
+        print(f"[build] full build ({len(sources)} sources)")
+
+    t0 = time.perf_counter()
+    rc = subprocess.call(cmd, cwd=str(ROOT), env=env)
+    if rc == 0:
+        rc = subprocess.call([sys.executable, "-m", "app.main", "--search-index", str(output)], cwd=str(ROOT))
+    if rc == 0:
+        rc = subprocess.call([sys.executable, str(ROOT / "scripts" / "optimize_output.py"), "--output", str(output)])
+    if rc == 0:
+        MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+        MANIFEST.write_text(json.dumps({"inputs": inputs, "sources": sources}, indent=2), encoding="utf-8")
+    print(f"[build] done in {time.perf_counter() - t0:.1f}s (rc={rc})")
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
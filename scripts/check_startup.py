@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Startup regression check for the CLI.
+
+- `python -m app.main --help` must finish within --help-budget seconds (best of
+  --runs), and importing app.main must not import any of the heavy modules
+  (requests, numpy, PIL, llama_cpp): those belong to the first call that needs them.
+- A cached `--daily` must finish within --daily-budget seconds. It runs in a
+  scratch copy of content/ and the cache dir, with AI credentials removed and
+  local images off, so it renders from cached data and touches nothing in the tree.
+
+Exits 1 when a budget is exceeded, so CI can run it next to the build.
+
+Usage: python scripts/check_startup.py [--help-budget 0.5] [--daily-budget 8] [--runs 5] [--skip-daily]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("requests", "numpy", "PIL", "llama_cpp")
+SCRUB_ENV = ("CF_ACCOUNT_ID", "CF_API_TOKEN", "HF_API_TOKEN", "HGG_AI_LOCAL_MODEL", "HARVEST_FORCE")
+
+
+def _run(args, *, cwd: Path, env: dict) -> float:
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed ({proc.returncode}):\n{proc.stderr.strip()[-2000:]}")
+    return elapsed
+
+
+def _env(**extra) -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in SCRUB_ENV}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.update(extra)
+    return env
+
+
+def heavy_imports() -> list:
+    code = f"import sys, app.main; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip()[-2000:])
+    return proc.stdout.split()
+
+
+def check_help(runs: int) -> float:
+    return min(_run(["-m", "app.main", "--help"], cwd=ROOT, env=_env()) for _ in range(runs))
+
+
+def check_daily(cache_dir: Path) -> float:
+    with tempfile.TemporaryDirectory(prefix="hgg-startup-") as tmp:
+        work = Path(tmp)
+        for sub in ("content/data", "content/posts"):
+            if (ROOT / sub).is_dir():
+                shutil.copytree(ROOT / sub, work / sub)
+        cache = work / "cache"
+        if cache_dir.is_dir():
+            shutil.copytree(cache_dir, cache)
+        # a top-up "just ran": the daily must not follow up with a harvest
+        cache.mkdir(parents=True, exist_ok=True)
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        (cache / "pool_health.json").write_text(json.dumps({"history": [{"at": now, "probed": 1, "added": 0}]}))
+        env = _env(HGG_CACHE_DIR=str(cache), HGG_LOCAL_IMAGES="0")
+        return _run(["-m", "app.main", "--daily"], cwd=work, env=env)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--help-budget", type=float, default=0.5, help="seconds for --help (best of --runs)")
+    ap.add_argument("--daily-budget", type=float, default=8.0, help="seconds for a cached --daily")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--cache-dir", default=os.getenv("HGG_CACHE_DIR", ".cache/hgg"))
+    ap.add_argument("--skip-daily", action="store_true")
+    args = ap.parse_args(argv)
+
+    failed = False
+    heavy = heavy_imports()
+    print(f"[startup] heavy modules imported by app.main: {', '.join(heavy) or 'none'}")
+    failed |= bool(heavy)
+
+    t = check_help(args.runs)
+    print(f"[startup] --help: {t:.3f}s (budget {args.help_budget:.3f}s)")
+    failed |= t > args.help_budget
+
+    if not args.skip_daily:
+        cache_dir = Path(args.cache_dir)
+        t = check_daily(cache_dir if cache_dir.is_absolute() else ROOT / cache_dir)
+        print(f"[startup] cached --daily: {t:.3f}s (budget {args.daily_budget:.3f}s)")
+        failed |= t > args.daily_budget
+
+    print("[startup] " + ("over budget" if failed else "ok"))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
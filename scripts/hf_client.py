@@ -1,45 +1,23 @@
 #!/usr/bin/env python3
-import os, time, json, requests
+import json, sys
 from pathlib import Path
-from random import uniform
 
-HF_TOKEN = os.environ.get("HF_API_TOKEN")  # injected by GitHub Actions
-HF_API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-small"
-# You can swap to a bigger free model later:
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app import ai  # noqa: E402
+
+# The Inference API call lives in app/ai.py (HuggingFaceBackend, HF_API_TOKEN);
+# the model is HGG_AI_HF_MODEL (default google/flan-t5-small). You can swap to a
+# bigger free model later:
 #   - "facebook/bart-large-cnn" (summarization)
 #   - "mistralai/Mistral-7B-Instruct-v0.2" (general chat)
 # Some community models may cold-start; FLAN-T5 Small is a safe starter.
-
-HEADERS = {"Authorization": f"Bearer {HF_TOKEN}"} if HF_TOKEN else {}
+# HGG_AI_BACKEND=local runs the same prompts on a local GGUF model instead.
 
 def hf_generate(prompt: str, max_new_tokens=160, temperature=0.2, retries=5):
     """
     Minimal Inference API call with retry/backoff for 429/5xx.
     """
-    payload = {
-        "inputs": prompt,
-        "parameters": {
-            "max_new_tokens": max_new_tokens,
-            "temperature": temperature,
-        }
-    }
-    backoff = 0.8
-    for i in range(retries):
-        r = requests.post(HF_API_URL, headers=HEADERS, json=payload, timeout=60)
-        if r.status_code in (200, 201):
-            out = r.json()
-            # Inference API returns a list of dicts for text-generation
-            if isinstance(out, list) and out and "generated_text" in out[0]:
-                return out[0]["generated_text"].strip()
-            # Some models return dict with 'summary_text'
-            if isinstance(out, dict) and "summary_text" in out:
-                return out["summary_text"].strip()
-            return json.dumps(out)  # last resort
-        if r.status_code in (429, 500, 502, 503, 504) and i < retries-1:
-            time.sleep(backoff + uniform(0, 0.4))
-            backoff *= 1.8
-            continue
-        r.raise_for_status()
+    return ai.hf_generate(prompt, max_new_tokens=max_new_tokens, temperature=temperature, retries=retries)
 
 def summarize_chunks(chunks):
     """
@@ -56,9 +34,10 @@ def summarize_chunks(chunks):
             f"REVIEWS:\n{text}"
         )
 
+    name = ai.BACKEND if ai.BACKEND != "auto" else "hf"
+    reqs = [{"prompt": map_prompt(c), "max_tokens": 180, "temperature": 0.2} for c in chunks]
     mapped = []
-    for c in chunks:
-        out = hf_generate(map_prompt(c), max_new_tokens=180)
+    for out in ai.backend(name).generate_batch(reqs):
         try:
             mapped.append(json.loads(out))
         except Exception:
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Post-build output stage for the Pelican site.
+
+Runs over the output directory after Pelican (and the search index) and:
+
+- fingerprints theme assets: output/theme/hgg.css -> hgg.<hash>.css (content
+  hash, minified), same for search.js, and rewrites every reference in the HTML,
+  so assets can be served with a long max-age and change name when they change;
+- minifies HTML (comments, whitespace between tags; <pre>/<textarea>/<script>/
+  <style> left alone) and CSS;
+- writes .gz (and .br when the `brotli` package is installed) siblings for every
+  text file, so static hosts that support precompressed files serve them as-is;
+- prints the bytes saved per stage.
+
+Every step is idempotent and skips files that are already up to date, so it can
+run after incremental builds that only rewrote a handful of pages.
+
+Usage: python scripts/optimize_output.py [--output output]
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional: gzip only
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent.parent
+ASSETS = ("hgg.css", "search.js")         # under <output>/theme/
+TEXT_SUFFIXES = {".html", ".css", ".js", ".json", ".xml", ".svg", ".txt"}
+MIN_COMPRESS = 256                         # smaller files gain nothing from a sibling
+
+_RAW_BLOCK = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2>)", re.S | re.I)
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+
+
+# -----------------
+# Minification
+# -----------------
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r"([{;])\s*([\w-]+)\s*:\s*", r"\1\2:", css)
+    css = css.replace(";}", "}")
+    return css.strip() + "\n"
+
+
+def minify_html(html: str) -> str:
+    parts = _RAW_BLOCK.split(html)
+    out = []
+    # split() with two groups yields [text, block, tagname, text, block, tagname, ...]
+    for i in range(0, len(parts), 3):
+        text = _COMMENT.sub("", parts[i])
+        text = re.sub(r">\s+<", "> <", text)
+        text = re.sub(r"\s{2,}", " ", text)
+        out.append(text)
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip() + "\n"
+
+
+# -----------------
+# Fingerprinting
+# -----------------
+def _hashed_name(name: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def fingerprint(output: Path) -> dict:
+    """Write hashed copies of the theme assets; returns {original name: hashed name}."""
+    theme = output / "theme"
+    names = {}
+    for name in ASSETS:
+        src = theme / name
+        if not src.exists():
+            continue
+        data = src.read_bytes()
+        if name.endswith(".css"):
+            data = minify_css(data.decode("utf-8")).encode("utf-8")
+        hashed = _hashed_name(name, data)
+        target = theme / hashed
+        if not target.exists() or target.read_bytes() != data:
+            target.write_bytes(data)
+        stem, ext = os.path.splitext(name)
+        stale = re.compile(rf"^{re.escape(stem)}\.[0-9a-f]{{10}}{re.escape(ext)}(\.gz|\.br)?$")
+        for old in theme.iterdir():
+            if stale.match(old.name) and not old.name.startswith(hashed):
+                old.unlink()
+        names[name] = hashed
+    return names
+
+
+def _rewrite_refs(html: str, names: dict) -> str:
+    for name, hashed in names.items():
+        html = re.sub(rf"(/theme/){re.escape(name)}(\?[^\"'\s>]*)?", rf"\g<1>{hashed}", html)
+    return html
+
+
+# -----------------
+# Compression
+# -----------------
+def _fresh(sibling: Path, src: Path) -> bool:
+    return sibling.exists() and sibling.stat().st_mtime >= src.stat().st_mtime
+
+
+def _codecs() -> list:
+    codecs = [(".gz", lambda b: gzip.compress(b, 9, mtime=0))]
+    if brotli is not None:
+        codecs.append((".br", lambda b: brotli.compress(b, quality=11)))
+    return codecs
+
+
+def compress(path: Path, stats: dict) -> None:
+    data = path.read_bytes()
+    if len(data) < MIN_COMPRESS:
+        return
+    codecs = _codecs()
+    for ext in {".gz", ".br"} - {ext for ext, _ in codecs}:
+        sibling = path.with_name(path.name + ext)
+        if sibling.exists() and not _fresh(sibling, path):
+            sibling.unlink()   # codec unavailable now: never serve a stale sibling
+    for ext, fn in codecs:
+        sibling = path.with_name(path.name + ext)
+        if not _fresh(sibling, path):
+            packed = fn(data)
+            if len(packed) >= len(data):
+                sibling.unlink(missing_ok=True)
+                continue
+            sibling.write_bytes(packed)
+        stats[ext] += sibling.stat().st_size
+        stats[ext + "_src"] += len(data)
+
+
+# -----------------
+# Stage
+# -----------------
+def run(output: Path) -> dict:
+    stats = {"files": 0, "raw": 0, "minified": 0, ".gz": 0, ".gz_src": 0, ".br": 0, ".br_src": 0}
+    names = fingerprint(output)
+    hashed = set(names.values())
+
+    for path in sorted(output.rglob("*")):
+        if not path.is_file() or path.suffix not in TEXT_SUFFIXES:
+            continue
+        stats["files"] += 1
+        raw = path.read_bytes()
+        stats["raw"] += len(raw)
+        data = raw
+        if path.suffix == ".html":
+            data = minify_html(_rewrite_refs(raw.decode("utf-8"), names)).encode("utf-8")
+        elif path.suffix == ".css" and path.name not in hashed:
+            data = minify_css(raw.decode("utf-8")).encode("utf-8")
+        if data != raw:
+            path.write_bytes(data)
+        stats["minified"] += len(data)
+        compress(path, stats)
+    stats["assets"] = names
+    return stats
+
+
+def _kb(n: int) -> str:
+    return f"{n / 1024:.1f}KB"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--output", default="output")
+    args = ap.parse_args(argv)
+
+    output = (ROOT / args.output) if not os.path.isabs(args.output) else Path(args.output)
+    if not output.is_dir():
+        print(f"[optimize] no output directory at {output}", file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    s = run(output)
+    print(f"[optimize] assets: " + (", ".join(f"{k} -> {v}" for k, v in s["assets"].items()) or "none"))
+    print(
+        f"[optimize] {s['files']} text files: {_kb(s['raw'])} -> minified {_kb(s['minified'])} "
+        f"(saved {_kb(s['raw'] - s['minified'])})"
+    )
+    for ext, label in ((".gz", "gzip"), (".br", "brotli")):
+        if s[ext + "_src"]:
+            print(
+                f"[optimize] {label}: {_kb(s[ext + '_src'])} -> {_kb(s[ext])} "
+                f"(saved {_kb(s[ext + '_src'] - s[ext])}, {s[ext] / s[ext + '_src']:.0%} of minified)"
+            )
+        elif ext == ".br" and brotli is None:
+            print("[optimize] brotli: skipped (pip install brotli)")
+    print(f"[optimize] done in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
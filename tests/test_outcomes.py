@@ -0,0 +1,50 @@
+# tests/test_outcomes.py
+import random
+
+import pytest
+
+from app.outcomes import BloomFilter
+
+
+def _filled(n=5000, error_rate=0.01, seed=0):
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, 4_000_000), n)
+    bf = BloomFilter(n, error_rate)
+    for aid in ids:
+        bf.add(aid)
+    return bf, set(ids)
+
+
+def test_members_are_always_found():
+    bf, ids = _filled()
+    assert all(aid in bf for aid in ids)
+    assert bf.count <= len(ids)
+
+
+def test_false_positive_rate_within_target():
+    bf, ids = _filled(error_rate=0.01)
+    probes = [aid for aid in range(4_000_001, 4_040_001) if aid not in ids]
+    rate = sum(aid in bf for aid in probes) / len(probes)
+    assert rate < 0.02
+
+
+def test_round_trip_keeps_bits_and_geometry():
+    bf, ids = _filled(n=1000)
+    back = BloomFilter.from_dict(bf.to_dict())
+    assert (back.m, back.k, back.count) == (bf.m, bf.k, bf.count)
+    assert back.bits == bf.bits
+    assert all(aid in back for aid in ids)
+
+
+def test_union_contains_both_sides():
+    a, ids_a = _filled(n=1000, seed=1)
+    b, ids_b = _filled(n=1000, seed=2)
+    a.union(b)
+    assert all(aid in a for aid in ids_a | ids_b)
+
+
+def test_union_rejects_other_geometry():
+    a = BloomFilter(1000, 0.01)
+    b = BloomFilter(2000, 0.01)
+    with pytest.raises(ValueError):
+        a.union(b)
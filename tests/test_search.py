@@ -0,0 +1,60 @@
+# tests/test_search.py
+import random
+import re
+from pathlib import Path
+
+from app import search
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _docs(*rows):
+    return [{"url": url, "date": date} for url, date in rows]
+
+
+def test_vlq_known_values():
+    assert search.vlq([0]) == "A"
+    assert search.vlq([31]) == "f"
+    assert search.vlq([32]) == "gB"
+    assert search.vlq([1, 2, 3]) == "BCD"
+
+
+def test_vlq_round_trip():
+    rng = random.Random(0)
+    values = [0, 1, 31, 32, 1023, 1024, 2**31 - 1] + [rng.randrange(2**20) for _ in range(500)]
+    assert search.unvlq(search.vlq(values)) == values
+
+
+def test_postings_are_delta_pairs():
+    postings = [(3, 8), (10, 1), (10_000, 13)]
+    flat = search.unvlq(search.encode_postings(postings))
+    assert flat == [3, 8, 7, 1, 9990, 13]
+
+
+def test_alphabet_matches_search_js():
+    js = (ROOT / "themes/hgg/static/search.js").read_text(encoding="utf-8")
+    assert re.search(r'B64 = "([^"]+)"', js).group(1) == search._B64
+
+
+def test_assign_ids_appends_in_date_order():
+    ids = search.assign_ids(_docs(("b.html", "2025-01-02"), ("a.html", "2025-01-01")), {})
+    assert ids == {"a.html": 0, "b.html": 1}
+
+    more = _docs(("b.html", "2025-01-02"), ("a.html", "2025-01-01"), ("c.html", "2024-12-31"))
+    assert search.assign_ids(more, ids) == {"a.html": 0, "b.html": 1, "c.html": 2}
+
+
+def test_assign_ids_leaves_holes_for_removed_posts():
+    known = {f"{i}.html": i for i in range(8)}
+    docs = _docs(*((f"{i}.html", "2025-01-01") for i in range(8) if i != 3))
+    ids = search.assign_ids(docs, known)
+    assert ids == {url: i for url, i in known.items() if url != "3.html"}
+
+
+def test_assign_ids_renumbers_past_max_holes():
+    known = {f"{i}.html": i for i in range(8)}
+    kept = [0, 5, 6, 7]  # 4 of 8 ids unused > MAX_HOLES
+    docs = _docs(*((f"{i}.html", f"2025-01-0{i + 1}") for i in kept))
+    ids = search.assign_ids(docs, known)
+    assert sorted(ids.values()) == list(range(len(kept)))
+    assert [ids[f"{i}.html"] for i in kept] == [0, 1, 2, 3]
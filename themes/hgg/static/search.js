@@ -0,0 +1,135 @@
+/* ===========================
+   Hidden Gem Games – search.js
+   Client for the static index built by app/search.py (<site>/search/).
+   Loads meta.json on first focus, then only the term shards and doc
+   chunks a query needs; everything fetched is kept for the session.
+   =========================== */
+(function () {
+  "use strict";
+
+  var form = document.getElementById("hgg-search");
+  if (!form) return;
+  var input = form.querySelector("input[type=search]");
+  var list = form.querySelector(".search-results");
+  var base = (form.getAttribute("data-root") || "").replace(/\/$/, "");
+  var root = base + "/search/";
+  var B64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_";
+  var STOP = " a an and are as at be by for from in is it its of on or that the this to with ";
+  var LIMIT = 10;
+
+  var meta = null;
+  var cache = {};   // url -> Promise<json>
+  var seq = 0;
+
+  function get(path) {
+    if (!cache[path]) {
+      cache[path] = fetch(root + path).then(function (r) {
+        if (!r.ok) throw new Error(r.status);
+        return r.json();
+      }).catch(function (err) { delete cache[path]; throw err; });
+    }
+    return cache[path];
+  }
+
+  function loadMeta() {
+    return get("meta.json").then(function (m) { meta = m; return m; });
+  }
+
+  // same folding as app/search.py tokens(): lowercase, strip accents, [a-z0-9]{2,}
+  function tokens(text) {
+    var folded = text.toLowerCase().normalize("NFKD").replace(/[\u0300-\u036f]/g, "");
+    return (folded.match(/[a-z0-9]+/g) || []).filter(function (t) {
+      return t.length >= 2 && STOP.indexOf(" " + t + " ") < 0;
+    });
+  }
+
+  // base64 VLQ (delta, weight) pairs -> {doc: weight}
+  function postings(text) {
+    var out = {}, nums = [], value = 0, shift = 0, doc = 0;
+    for (var i = 0; i < text.length; i++) {
+      var digit = B64.indexOf(text.charAt(i));
+      value |= (digit & 31) << shift;
+      if (digit & 32) { shift += 5; continue; }
+      nums.push(value); value = 0; shift = 0;
+    }
+    for (var j = 0; j + 1 < nums.length; j += 2) {
+      doc += nums[j];
+      out[doc] = nums[j + 1];
+    }
+    return out;
+  }
+
+  // postings of one query term; the last term also matches as a prefix (type-ahead)
+  function lookup(term, prefix) {
+    var key = term.slice(0, meta.prefix);
+    if (term.length < meta.prefix || meta.shards.indexOf(key) < 0) return Promise.resolve({});
+    return get("t/" + key + ".json").then(function (shard) {
+      var hits = {};
+      Object.keys(shard).forEach(function (t) {
+        if (t !== term && !(prefix && t.lastIndexOf(term, 0) === 0)) return;
+        var p = postings(shard[t]);
+        for (var d in p) hits[d] = Math.max(hits[d] || 0, p[d]);
+      });
+      return hits;
+    });
+  }
+
+  function search(query) {
+    var terms = tokens(query);
+    if (!terms.length) return Promise.resolve([]);
+    return Promise.all(terms.map(function (t, i) { return lookup(t, i === terms.length - 1); }))
+      .then(function (sets) {
+        var scores = sets[0];
+        for (var i = 1; i < sets.length; i++) {
+          var next = {};
+          for (var d in scores) if (d in sets[i]) next[d] = scores[d] + sets[i][d];
+          scores = next;
+        }
+        var ids = Object.keys(scores).map(Number).sort(function (a, b) {
+          return scores[b] - scores[a] || b - a;   // ids are append-only: higher id = newer post
+        }).slice(0, LIMIT);
+        var chunks = {};
+        ids.forEach(function (id) { chunks[Math.floor(id / meta.chunk)] = true; });
+        return Promise.all(Object.keys(chunks).map(function (n) {
+          return get("d/" + n + ".json").then(function (docs) { chunks[n] = docs; });
+        })).then(function () {
+          return ids.map(function (id) { return chunks[Math.floor(id / meta.chunk)][id % meta.chunk]; })
+            .filter(Boolean);   // null = removed post (hole until the index is renumbered)
+        });
+      });
+  }
+
+  function esc(s) {
+    return String(s || "").replace(/[&<>"]/g, function (c) {
+      return { "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;" }[c];
+    });
+  }
+
+  function render(docs, query) {
+    if (!query) { list.hidden = true; list.innerHTML = ""; return; }
+    list.hidden = false;
+    if (!docs.length) { list.innerHTML = '<li class="muted">No games found.</li>'; return; }
+    list.innerHTML = docs.map(function (d) {
+      // [title, url, date, genres, price]
+      return '<li><a href="' + esc(base + "/" + d[1]) + '">' + esc(d[0]) + "</a>" +
+        '<span class="small muted">' + esc([d[2], d[3], d[4]].filter(Boolean).join(" · ")) + "</span></li>";
+    }).join("");
+  }
+
+  function run() {
+    var query = input.value.trim();
+    var mine = ++seq;
+    (meta ? Promise.resolve(meta) : loadMeta())
+      .then(function () { return search(query); })
+      .then(function (docs) { if (mine === seq) render(docs, query); })
+      .catch(function () { if (mine === seq) render([], query); });
+  }
+
+  var timer = null;
+  input.addEventListener("focus", function () { if (!meta) loadMeta().catch(function () {}); }, { once: true });
+  input.addEventListener("input", function () { clearTimeout(timer); timer = setTimeout(run, 120); });
+  form.addEventListener("submit", function (e) { e.preventDefault(); clearTimeout(timer); run(); });
+  document.addEventListener("keydown", function (e) {
+    if (e.key === "Escape") { list.hidden = true; input.blur(); }
+  });
+})();